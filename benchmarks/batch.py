@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Batch throughput benchmark for tinycode.
+Runs the same batch against the stub provider with different pack sizes
+and reports throughput, requests sent and tokens per command, so query
+packing can be compared with unpacked mode (pack size 1). The stub's
+token counts are estimates (four characters per token) but scale with
+the prompt the same way real ones do.
+
+Usage:
+    python3 benchmarks/batch.py
+    python3 benchmarks/batch.py --items 200 --pack-sizes 1 10 20 --latency 0.5
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_DIR / "src"))
+
+from stub_server import serve
+from startup import write_config
+from utils.config import ConfigManager
+from api.api_manager import APIManager
+
+
+QUERIES = [
+    "compress dir to tgz",
+    "find files larger than 100MB",
+    "show listening ports",
+    "kill the process using port 8080",
+    "count lines in all python files",
+    "show disk usage of the home directory",
+    "list running docker containers",
+    "follow the system log",
+]
+
+# Stand-in for the system context tinycode sends with every request
+SYSTEM_CONTEXT = "OS: Linux\nDistribution: Ubuntu 22.04\nShell: bash\nPackage manager: apt"
+
+
+def run(config_dir: Path, items: int, pack_size: int, concurrency: int) -> dict:
+    """Generate a batch with fresh clients and measure it."""
+    api_manager = APIManager(ConfigManager(str(config_dir)))
+    batch = [{"query": f"{QUERIES[i % len(QUERIES)]} ({i})"} for i in range(items)]
+    
+    started = time.perf_counter()
+    results = list(api_manager.generate_batch(batch, SYSTEM_CONTEXT, concurrency,
+                                              use_cache=False, pack_size=pack_size))
+    elapsed = time.perf_counter() - started
+    
+    usage = api_manager.get_usage()
+    generated = sum(1 for result in results if result["command"])
+    return {
+        "elapsed": elapsed,
+        "failed": items - generated,
+        "requests": usage["requests"],
+        "tokens": (usage["input_tokens"] + usage["output_tokens"]) / max(generated, 1)
+    }
+
+
+def main():
+    """Benchmark each requested pack size."""
+    parser = argparse.ArgumentParser(description="Benchmark batch throughput with query packing")
+    parser.add_argument("--items", type=int, default=100, help="Queries in the batch")
+    parser.add_argument("--pack-sizes", type=int, nargs="+", default=[1, 5, 10, 20],
+                        help="Queries per request to compare")
+    parser.add_argument("--concurrency", type=int, default=8, help="Requests in flight")
+    parser.add_argument("--latency", type=float, default=0.2,
+                        help="Seconds the stub provider takes per request")
+    args = parser.parse_args()
+    
+    server = serve(latency=args.latency)
+    print(f"{'pack':>5} {'time':>7} {'items/s':>8} {'requests':>9} {'tokens/cmd':>11} {'failed':>7}")
+    with tempfile.TemporaryDirectory(prefix="tinycode-batch-") as tmp:
+        home = Path(tmp)
+        write_config(home, f"http://127.0.0.1:{server.server_port}")
+        config_dir = home / ".config" / "tinycode"
+        
+        for pack_size in args.pack_sizes:
+            result = run(config_dir, args.items, pack_size, args.concurrency)
+            print(f"{pack_size:>5} {result['elapsed']:>6.2f}s {args.items / result['elapsed']:>8.1f} "
+                  f"{result['requests']:>9} {result['tokens']:>11.0f} {result['failed']:>7}")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Similarity cache benchmark for tinycode.
+Measures lookup and incremental insert latency of the similarity cache
+at different index sizes. The index is filled with synthetic vectors
+(sparse non-negative counts, like hashed n-grams) since vectorizing a
+million real queries would dominate the run.
+
+Usage:
+    python3 benchmarks/similarity.py
+    python3 benchmarks/similarity.py --sizes 10000 100000 1000000 --runs 50
+"""
+
+import argparse
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import List
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_DIR / "src"))
+
+from utils.similarity_cache import SimilarityCache, NUMPY_AVAILABLE, np, _scope_id
+
+
+# Rows generated per chunk while filling the index
+FILL_CHUNK = 100000
+
+# Mean count per vector component of the synthetic vectors
+FILL_DENSITY = 0.15
+
+SCOPE = "benchmark"
+
+QUERIES = [
+    "compress dir to tgz",
+    "find files larger than 100MB",
+    "show listening ports",
+    "kill the process using port 8080",
+    "list all docker containers",
+]
+
+
+def fill_index(directory: Path, size: int, dimensions: int) -> SimilarityCache:
+    """Create a similarity cache holding `size` synthetic entries."""
+    cache = SimilarityCache(directory, max_entries=size, dimensions=dimensions)
+    rng = np.random.default_rng(0)
+    
+    for start in range(0, size, FILL_CHUNK):
+        end = min(start + FILL_CHUNK, size)
+        vectors = rng.poisson(FILL_DENSITY, (end - start, dimensions)).astype(np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        cache.vectors[start:end] = vectors / np.maximum(norms, 1e-9)
+    cache.vectors.flush()
+    cache.scopes[:] = _scope_id(SCOPE)
+    cache.scopes.flush()
+    
+    cache.conn.execute("BEGIN IMMEDIATE")
+    cache.conn.executemany(
+        "INSERT INTO entries (slot, query, scope, command, accessed_at) VALUES (?, ?, ?, ?, ?)",
+        ((slot, f"synthetic query {slot}", SCOPE, "true", float(slot)) for slot in range(size))
+    )
+    cache.conn.execute("COMMIT")
+    return cache
+
+
+def measure(function, runs: int) -> List[float]:
+    """Time `runs` calls of function(i), in milliseconds."""
+    timings = []
+    for i in range(runs):
+        started = time.perf_counter()
+        function(i)
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile."""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def main():
+    """Benchmark the similarity cache at each requested size."""
+    parser = argparse.ArgumentParser(description="Benchmark similarity cache latency")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000, 1000000],
+                        help="Index sizes to benchmark")
+    parser.add_argument("--dimensions", type=int, default=256, help="Vector length")
+    parser.add_argument("--runs", type=int, default=30, help="Timed calls per operation")
+    args = parser.parse_args()
+    
+    if not NUMPY_AVAILABLE:
+        print("numpy is not installed; the similarity cache needs it", file=sys.stderr)
+        sys.exit(1)
+    
+    print(f"{'entries':>10} {'size':>9} {'fill':>8} {'lookup p50':>11} {'lookup p95':>11} "
+          f"{'add p50':>9} {'add p95':>9}")
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory(prefix="tinycode-similarity-") as tmp:
+            started = time.perf_counter()
+            cache = fill_index(Path(tmp), size, args.dimensions)
+            fill = time.perf_counter() - started
+            
+            # Warm the page cache the way a long-lived index would be
+            cache.lookup(QUERIES[0], SCOPE, 0.9)
+            
+            lookups = measure(lambda i: cache.lookup(QUERIES[i % len(QUERIES)], SCOPE, 0.9), args.runs)
+            # The index is full, so every add also evicts the LRU entry
+            adds = measure(lambda i: cache.add(f"benchmark query {i}", SCOPE, "true"), args.runs)
+            
+            megabytes = size * args.dimensions * 4 / 1e6
+            print(f"{size:>10} {megabytes:>7.0f}MB {fill:>7.1f}s "
+                  f"{statistics.median(lookups):>9.2f}ms {percentile(lookups, 0.95):>9.2f}ms "
+                  f"{statistics.median(adds):>7.2f}ms {percentile(adds, 0.95):>7.2f}ms")
+            cache.conn.close()
+            del cache
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Similarity cache accuracy check for tinycode.
+Stores one query of each pair in a fresh similarity cache and looks up the
+other: paraphrases must get the stored command, and queries that need a
+different command (opposite on/off words, other paths, file names, flags
+or numbers, other sort keys) must not. Exits with status 1 if any pair is
+answered wrongly; a missed paraphrase only costs an API call, so those
+are reported but do not fail the check unless --strict is given.
+
+Usage:
+    python3 benchmarks/similarity_accuracy.py
+    python3 benchmarks/similarity_accuracy.py --threshold 0.8 --strict
+"""
+
+import argparse
+import sys
+import tempfile
+from pathlib import Path
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_DIR / "src"))
+
+from utils.similarity_cache import SimilarityCache, NUMPY_AVAILABLE, vectorize
+
+
+# Pairs that ask for the same command
+POSITIVE_PAIRS = [
+    ("list all the files in this folder sorted by size", "list files in the directory sorted by size"),
+    ("List all files sorted by size", "list the files sorted by size"),
+    ("show disk usage of /var", "show the disk usage of /var please"),
+    ("how do I find files larger than 100MB", "find all files larger than 100MB"),
+    ("kill the process using port 8080", "kill process using port 8080"),
+    ("list all running docker containers", "list running docker containers"),
+    ("find the biggest files in my home directory", "find the largest files in my home folder"),
+    ("rename Foo.txt to bar.txt", "rename Foo.txt to bar.txt?"),
+]
+
+# Pairs that need different commands
+NEGATIVE_PAIRS = [
+    ("disable the firewall service on this machine", "enable the firewall service on this machine"),
+    ("mount /dev/sdb1 on /mnt/usb read only", "mount /dev/sdb1 on /mnt/usb read write"),
+    ("chown -R www-data /srv/www/html", "chown -R www-data /srv/www/htm"),
+    ("list files sorted by size", "list files sorted by time"),
+    ("delete files older than 7 days", "delete files older than 70 days"),
+    ("turn on wifi", "turn off wifi"),
+    ("start the nginx service", "stop the nginx service"),
+    ("copy a.txt to b.txt", "copy b.txt to a.txt"),
+    ("rename Foo.txt to bar.txt", "rename foo.txt to bar.txt"),
+    ("show hidden files with ls -a", "show hidden files with ls -A"),
+    ("compress the logs directory", "decompress the logs directory"),
+    ("find files newer than main.c", "find files older than main.c"),
+]
+
+SCOPE = "accuracy"
+
+
+def check(cache: SimilarityCache, stored: str, query: str, threshold: float) -> tuple:
+    """Store one query and look up the other; (matched, cosine similarity)."""
+    cache.conn.execute("DELETE FROM entries")
+    cache.vectors[:] = 0
+    cache.add(stored, SCOPE, "command")
+    score = float(vectorize(stored, cache.dimensions) @ vectorize(query, cache.dimensions))
+    return cache.lookup(query, SCOPE, threshold) is not None, score
+
+
+def main():
+    """Check the similarity cache against the positive and negative pairs."""
+    parser = argparse.ArgumentParser(description="Check similarity cache accuracy")
+    parser.add_argument("--threshold", type=float, default=0.7, help="Similarity threshold")
+    parser.add_argument("--dimensions", type=int, default=256, help="Vector length")
+    parser.add_argument("--strict", action="store_true", help="Fail on missed paraphrases too")
+    args = parser.parse_args()
+    
+    if not NUMPY_AVAILABLE:
+        print("numpy is not installed; the similarity cache needs it", file=sys.stderr)
+        sys.exit(1)
+    
+    wrong = missed = 0
+    with tempfile.TemporaryDirectory(prefix="tinycode-similarity-") as tmp:
+        cache = SimilarityCache(Path(tmp), max_entries=16, dimensions=args.dimensions)
+        for expected, pairs in ((True, POSITIVE_PAIRS), (False, NEGATIVE_PAIRS)):
+            for stored, query in pairs:
+                matched, score = check(cache, stored, query, args.threshold)
+                if matched == expected:
+                    outcome = "ok"
+                elif expected:
+                    outcome, missed = "MISSED", missed + 1
+                else:
+                    outcome, wrong = "WRONG", wrong + 1
+                print(f"{outcome:>6} {score:.3f}  {stored!r} / {query!r}")
+        cache.conn.close()
+    
+    print(f"\n{len(POSITIVE_PAIRS) - missed}/{len(POSITIVE_PAIRS)} paraphrases matched, "
+          f"{wrong}/{len(NEGATIVE_PAIRS)} different requests wrongly matched")
+    if wrong or (args.strict and missed):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
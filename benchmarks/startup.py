@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Startup benchmark for tinycode.
+Measures wall time and `-X importtime` breakdowns for each entry path of
+TinyCode.run, compares them against a stored baseline and fails when
+startup or a module's import cost regresses beyond the threshold.
+
+Usage:
+    python3 benchmarks/startup.py                    # compare with baseline
+    python3 benchmarks/startup.py --update-baseline  # record a new baseline
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from stub_server import serve
+
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+ENTRY_SCRIPT = REPO_DIR / "src" / "core" / "tinycode.py"
+DEFAULT_BASELINE = Path(__file__).resolve().parent / "baseline.json"
+
+# Entry paths of TinyCode.run, by name
+ENTRY_PATHS = {
+    "version": ["--version"],
+    "help": ["--help"],
+    "config": ["--config"],
+    "check-apis": ["--check-apis"],
+    "query": ["--no-cache", "list all files in current directory"],
+}
+
+# tinycode's own packages; every one of their modules is always tracked
+OWN_PACKAGES = ("api", "core", "ui", "utils")
+
+# Third-party/stdlib imports cheaper than this are not tracked individually
+MODULE_FLOOR_US = 1000
+
+# Absolute slack so that tiny timings don't trip the relative threshold
+WALL_SLACK_MS = 5.0
+MODULE_SLACK_US = 1000
+
+
+def write_config(home: Path, base_url: str):
+    """Write a tinycode config pointing both providers at the stub server."""
+    config_dir = home / ".config" / "tinycode"
+    config_dir.mkdir(parents=True, exist_ok=True)
+    config = {
+        "auto_select_api": True,
+        "preferred_api": "openai",
+        "openai": {
+            "api_key": "sk-bench",
+            "model": "gpt-3.5-turbo",
+            "max_tokens": 100,
+            "enabled": True,
+            "base_url": f"{base_url}/v1"
+        },
+        "claude": {
+            "api_key": "sk-ant-bench",
+            "model": "claude-3-sonnet-20240229",
+            "max_tokens": 100,
+            "enabled": True,
+            "base_url": base_url
+        },
+        "ui": {"loading_animation": False, "animation_style": "dots"},
+        "transport": {"mode": "lean"}
+    }
+    with open(config_dir / "config.json", "w") as f:
+        json.dump(config, f, indent=2)
+
+
+def parse_importtime(stderr: str) -> Dict[str, int]:
+    """
+    Parse `-X importtime` output into cumulative microseconds per module.
+    
+    Only top-level imports above MODULE_FLOOR_US and tinycode's own
+    modules are kept, so the baseline stays small and stable.
+    """
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        _, cumulative_field, raw_name = line.split("|", 2)
+        module = raw_name.strip()
+        cumulative = int(cumulative_field.strip())
+        # Module names are indented by two spaces per nesting level
+        raw_name = raw_name[1:]
+        depth = (len(raw_name) - len(raw_name.lstrip())) // 2
+        is_own = module.split(".")[0] in OWN_PACKAGES
+        if is_own or (depth == 0 and cumulative >= MODULE_FLOOR_US):
+            modules[module] = max(modules.get(module, 0), cumulative)
+    return modules
+
+
+def run_once(flags: List[str], env: Dict[str, str], importtime: bool) -> Tuple[float, str]:
+    """Run tinycode once and return (wall time in ms, stderr)."""
+    cmd = [sys.executable]
+    if importtime:
+        cmd += ["-X", "importtime"]
+    cmd += [str(ENTRY_SCRIPT)] + flags
+    
+    start = time.perf_counter()
+    result = subprocess.run(cmd, env=env, capture_output=True, text=True)
+    wall_ms = (time.perf_counter() - start) * 1000
+    
+    if result.returncode != 0:
+        raise RuntimeError(f"tinycode {' '.join(flags)} failed:\n{result.stdout}{result.stderr}")
+    return wall_ms, result.stderr
+
+
+def measure(runs: int) -> Dict[str, Dict]:
+    """Measure every entry path and return median timings."""
+    server = serve()
+    results = {}
+    try:
+        with tempfile.TemporaryDirectory() as home:
+            write_config(Path(home), f"http://127.0.0.1:{server.server_port}")
+            env = {**os.environ, "HOME": home, "PYTHONDONTWRITEBYTECODE": ""}
+            
+            for name, flags in ENTRY_PATHS.items():
+                # Warm-up run so bytecode caches exist before timing
+                run_once(flags, env, importtime=False)
+                
+                walls = [run_once(flags, env, importtime=False)[0] for _ in range(runs)]
+                
+                samples: Dict[str, List[int]] = {}
+                for _ in range(runs):
+                    _, stderr = run_once(flags, env, importtime=True)
+                    for module, cost in parse_importtime(stderr).items():
+                        samples.setdefault(module, []).append(cost)
+                
+                results[name] = {
+                    "wall_ms": round(statistics.median(walls), 2),
+                    "imports_us": {
+                        module: int(statistics.median(costs))
+                        for module, costs in sorted(samples.items())
+                    }
+                }
+                print(f"  {name:<12} {results[name]['wall_ms']:8.2f} ms")
+    finally:
+        server.shutdown()
+        server.server_close()
+    return results
+
+
+def compare(baseline: Dict, current: Dict, threshold: float) -> List[str]:
+    """Return a list of regressions of current against baseline."""
+    regressions = []
+    for name, measured in current.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        
+        wall_limit = base["wall_ms"] * (1 + threshold) + WALL_SLACK_MS
+        if measured["wall_ms"] > wall_limit:
+            regressions.append(
+                f"{name}: startup {measured['wall_ms']:.1f}ms > {wall_limit:.1f}ms "
+                f"(baseline {base['wall_ms']:.1f}ms)"
+            )
+        
+        base_imports = base.get("imports_us", {})
+        for module, cost in measured["imports_us"].items():
+            base_cost = base_imports.get(module, 0)
+            limit = base_cost * (1 + threshold) + MODULE_SLACK_US
+            if cost > limit:
+                label = "new import" if module not in base_imports else "import"
+                regressions.append(
+                    f"{name}: {label} {module} {cost / 1000:.1f}ms > {limit / 1000:.1f}ms "
+                    f"(baseline {base_cost / 1000:.1f}ms)"
+                )
+    return regressions
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description="tinycode startup benchmark")
+    parser.add_argument("--runs", type=int, default=10, help="Runs per entry path (default: 10)")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="Allowed relative regression (default: 0.25)")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE,
+                        help="Baseline file (default: benchmarks/baseline.json)")
+    parser.add_argument("--update-baseline", action="store_true",
+                        help="Record the measurements as the new baseline")
+    args = parser.parse_args()
+    
+    python_version = platform.python_version()
+    print(f"Measuring tinycode startup ({args.runs} runs per path, Python {python_version})")
+    current = measure(args.runs)
+    
+    if args.update_baseline or not args.baseline.exists():
+        with open(args.baseline, "w") as f:
+            json.dump({"python": python_version, "paths": current}, f, indent=2)
+        print(f"Baseline written to {args.baseline}")
+        return
+    
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    if baseline.get("python") != python_version:
+        print(f"Warning: baseline was recorded with Python {baseline.get('python')}")
+    
+    regressions = compare(baseline.get("paths", {}), current, args.threshold)
+    if regressions:
+        print("\nRegressions:")
+        for regression in regressions:
+            print(f"  ✗ {regression}")
+        sys.exit(1)
+    print("\n✓ No startup regressions")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,465 @@
+#!/usr/bin/env python3
+"""
+Stub provider server for tinycode benchmarks.
+Answers OpenAI chat completion and Anthropic messages requests (plain or
+streamed) with a canned command, so benchmarks never touch the real APIs.
+Packed requests (numbered queries) get one numbered command per query.
+Also stands in for the OpenAI Batch API and Anthropic Message Batches:
+batches end a configurable time after they were created, and queries
+containing FAIL_MARKER fail. Usage reports the prompt tokens a repeated
+system prompt prefix would have read from the providers' prompt caches.
+Stop sequences and max_tokens cut the answer short like the providers do.
+"""
+
+import os
+import re
+import json
+import sys
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+STUB_COMMAND = "ls -la"
+
+# Text a streaming model would add after the command; tinycode stops reading before it
+STUB_TRAILER = "\nThis lists all files, including hidden ones."
+
+
+# A numbered query of a packed request
+PACKED_QUERY = re.compile(r'^(\d+)\. ', re.MULTILINE)
+
+# Batch requests whose query contains this fail
+FAIL_MARKER = "[fail]"
+
+# Shortest prompt prefix the providers cache, in tokens (Anthropic's Haiku
+# models need a longer one)
+MIN_CACHED_TOKENS = 1024
+MIN_CACHED_TOKENS_HAIKU = 2048
+
+# Batch endpoint paths, by (method, provider resource)
+BATCH_ROUTES = [
+    ("POST", re.compile(r'/v1/files$'), "upload_file"),
+    ("GET", re.compile(r'/v1/files/([\w-]+)/content$'), "file_content"),
+    ("POST", re.compile(r'/v1/messages/batches$'), "create_message_batch"),
+    ("GET", re.compile(r'/v1/messages/batches/([\w-]+)$'), "get_message_batch"),
+    ("GET", re.compile(r'/v1/messages/batches/([\w-]+)/results$'), "message_batch_results"),
+    ("POST", re.compile(r'/v1/batches$'), "create_batch"),
+    ("GET", re.compile(r'/v1/batches/([\w-]+)$'), "get_batch"),
+]
+
+
+def _chunks(text: str, size: int = 3):
+    """Split text into streaming-sized pieces."""
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+def _estimate_tokens(text: str) -> int:
+    """Rough token count of a text, about four characters per token."""
+    return max(1, len(text) // 4)
+
+
+def _reply(payload: dict) -> str:
+    """The canned answer, numbered per query if the request is packed."""
+    messages = payload.get("messages") or [{}]
+    content = messages[-1].get("content") or ""
+    numbers = PACKED_QUERY.findall(content) if isinstance(content, str) else []
+    if len(numbers) > 1:
+        return "\n".join(f"{number}. {STUB_COMMAND}" for number in numbers)
+    return STUB_COMMAND
+
+
+def _generate(text: str, payload: dict) -> tuple:
+    """
+    Cut an answer at the request's stop sequences and max_tokens.
+    
+    Returns:
+        Tuple of the generated text and whether max_tokens truncated it
+    """
+    for stop in payload.get("stop") or payload.get("stop_sequences") or []:
+        text = text.split(stop, 1)[0]
+    limit = payload.get("max_tokens") or payload.get("max_completion_tokens")
+    if limit and _estimate_tokens(text) > limit:
+        return text[:limit * 4], True
+    return text, False
+
+
+def _parse_multipart(body: bytes, content_type: str) -> dict:
+    """Split a multipart/form-data body into its fields, by name."""
+    boundary = content_type.split("boundary=", 1)[1].strip('"').encode("latin-1")
+    fields = {}
+    for part in body.split(b"--" + boundary)[1:-1]:
+        head, _, content = part.strip(b"\r\n").partition(b"\r\n\r\n")
+        name = re.search(rb'name="([^"]*)"', head)
+        if name:
+            fields[name.group(1).decode("utf-8")] = content
+    return fields
+
+
+class StubBatches:
+    """State of the stand-in batch endpoints, shared by all requests of a server."""
+    
+    def __init__(self, delay: float = 0.0):
+        """
+        Initialize batch state.
+        
+        Args:
+            delay: Seconds after creation at which a batch has ended
+        """
+        self.delay = delay
+        self.files = {}
+        self.batches = {}
+        self.lock = threading.Lock()
+        self._next_id = 0
+    
+    def new_id(self, prefix: str) -> str:
+        """A fresh object ID."""
+        with self.lock:
+            self._next_id += 1
+            return f"{prefix}{self._next_id}"
+    
+    def ended(self, batch: dict) -> bool:
+        """Whether a batch has finished processing."""
+        return time.time() >= batch["created"] + self.delay
+
+
+def _failed(body: dict) -> bool:
+    """Whether a batched request's query asks to fail."""
+    return any(FAIL_MARKER in str(message.get("content")) for message in body.get("messages", []))
+
+
+class StubPromptCache:
+    """System prompt prefixes seen by a server, standing in for provider prompt caching."""
+    
+    def __init__(self):
+        """Initialize an empty cache."""
+        self.prefixes = set()
+        self.lock = threading.Lock()
+    
+    def anthropic_tokens(self, payload: dict) -> tuple:
+        """
+        Tokens a messages request reads from and writes to the cache.
+        
+        The system blocks up to the last one marked with cache_control are
+        the cached prefix.
+        """
+        system = payload.get("system")
+        if not isinstance(system, list):
+            return 0, 0
+        marked = [index for index, block in enumerate(system) if block.get("cache_control")]
+        if not marked:
+            return 0, 0
+        prefix = "".join(block.get("text", "") for block in system[:marked[-1] + 1])
+        tokens = _estimate_tokens(prefix)
+        haiku = "haiku" in str(payload.get("model", "")).lower()
+        if tokens < (MIN_CACHED_TOKENS_HAIKU if haiku else MIN_CACHED_TOKENS):
+            return 0, 0
+        with self.lock:
+            if prefix in self.prefixes:
+                return tokens, 0
+            self.prefixes.add(prefix)
+        return 0, tokens
+    
+    def openai_tokens(self, payload: dict) -> int:
+        """
+        Tokens a chat completion reads from the cache.
+        
+        OpenAI caches automatically: the longest system prompt prefix seen
+        before counts, in steps of 128 tokens.
+        """
+        messages = [message for message in payload.get("messages") or [] if message.get("role") == "system"]
+        if not messages or not isinstance(messages[0].get("content"), str):
+            return 0
+        system = messages[0]["content"]
+        with self.lock:
+            common = max((len(os.path.commonprefix([system, seen])) for seen in self.prefixes), default=0)
+            self.prefixes.add(system)
+        tokens = common // 4 // 128 * 128
+        return tokens if tokens >= MIN_CACHED_TOKENS else 0
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Request handler returning canned provider responses."""
+    
+    protocol_version = "HTTP/1.1"
+    
+    # Seconds to wait before answering, standing in for model time
+    latency = 0.0
+    
+    # Stand-in batch endpoint and prompt cache state; replaced per server by serve()
+    batches = StubBatches()
+    prompt_cache = StubPromptCache()
+    
+    def log_message(self, format, *args):
+        """Silence per-request logging."""
+    
+    def handle(self):
+        """Handle requests, ignoring clients that hang up after the first line."""
+        try:
+            super().handle()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+    
+    def do_GET(self):
+        """Handle batch status and result requests."""
+        if not self._route_batch("GET", b""):
+            self._send_json(404, {"error": {"message": f"Unknown path {self.path}"}})
+    
+    def do_POST(self):
+        """Handle chat completion, messages and batch creation requests."""
+        length = int(self.headers.get("Content-Length", 0))
+        body = self.rfile.read(length) or b"{}"
+        if self._route_batch("POST", body):
+            return
+        
+        payload = json.loads(body)
+        stream = payload.get("stream", False)
+        reply, truncated = _generate(STUB_COMMAND + STUB_TRAILER if stream else _reply(payload), payload)
+        usage = (_estimate_tokens(body.decode("utf-8")), _estimate_tokens(reply))
+        if self.path.endswith("/v1/messages"):
+            cache_read, cache_write = self.prompt_cache.anthropic_tokens(payload)
+            # Anthropic counts cached prompt tokens apart from the input tokens
+            input_usage = {"input_tokens": max(1, usage[0] - cache_read - cache_write),
+                           "cache_read_input_tokens": cache_read, "cache_creation_input_tokens": cache_write}
+        else:
+            input_usage = {"prompt_tokens": usage[0],
+                           "prompt_tokens_details": {"cached_tokens": self.prompt_cache.openai_tokens(payload)}}
+        if self.latency:
+            time.sleep(self.latency)
+        
+        finish_reason = "length" if truncated else "stop"
+        stop_reason = "max_tokens" if truncated else "end_turn"
+        if self.path.endswith("/chat/completions") and stream:
+            events = [
+                {"choices": [{"index": 0, "delta": {"content": piece}}]}
+                for piece in _chunks(reply)
+            ]
+            events.append({"choices": [{"index": 0, "delta": {}, "finish_reason": finish_reason}]})
+            if (payload.get("stream_options") or {}).get("include_usage"):
+                events.append({"choices": [], "usage": {**input_usage, "completion_tokens": usage[1]}})
+            self._send_events([(None, event) for event in events] + [(None, "[DONE]")])
+        elif self.path.endswith("/v1/messages") and stream:
+            events = [("message_start", {"type": "message_start", "message": {"usage": input_usage}})]
+            events += [
+                ("content_block_delta", {"type": "content_block_delta", "index": 0,
+                                         "delta": {"type": "text_delta", "text": piece}})
+                for piece in _chunks(reply)
+            ]
+            events.append(("message_delta", {"type": "message_delta", "delta": {"stop_reason": stop_reason},
+                                             "usage": {"output_tokens": usage[1]}}))
+            events.append(("message_stop", {"type": "message_stop"}))
+            self._send_events(events)
+        elif self.path.endswith("/chat/completions"):
+            self._send_json(200, {
+                "choices": [{"message": {"role": "assistant", "content": reply}, "finish_reason": finish_reason}],
+                "usage": {**input_usage, "completion_tokens": usage[1]}
+            })
+        elif self.path.endswith("/v1/messages"):
+            self._send_json(200, {
+                "content": [{"type": "text", "text": reply}],
+                "stop_reason": stop_reason,
+                "usage": {**input_usage, "output_tokens": usage[1]}
+            })
+        else:
+            self._send_json(404, {"error": {"message": f"Unknown path {self.path}"}})
+    
+    def _route_batch(self, method: str, body: bytes) -> bool:
+        """Dispatch a batch endpoint request; False if the path is not one."""
+        for route_method, pattern, handler in BATCH_ROUTES:
+            match = pattern.search(self.path)
+            if route_method == method and match:
+                getattr(self, f"_{handler}")(body, *match.groups())
+                return True
+        return False
+    
+    def _upload_file(self, body: bytes):
+        """OpenAI: store an uploaded batch input file."""
+        fields = _parse_multipart(body, self.headers.get("Content-Type", ""))
+        file_id = self.batches.new_id("file-")
+        self.batches.files[file_id] = fields.get("file", b"")
+        self._send_json(200, {"id": file_id, "object": "file", "purpose": "batch",
+                              "bytes": len(self.batches.files[file_id])})
+    
+    def _file_content(self, body: bytes, file_id: str):
+        """OpenAI: download a file."""
+        data = self.batches.files.get(file_id)
+        if data is None:
+            self._send_json(404, {"error": {"message": f"No such file: {file_id}"}})
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "application/octet-stream")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+    
+    def _create_batch(self, body: bytes):
+        """OpenAI: create a batch from an uploaded input file."""
+        payload = json.loads(body)
+        data = self.batches.files.get(payload.get("input_file_id"))
+        if data is None:
+            self._send_json(400, {"error": {"message": "input_file_id not found"}})
+            return
+        batch = {
+            "id": self.batches.new_id("batch_"),
+            "object": "batch",
+            "endpoint": payload.get("endpoint"),
+            "input_file_id": payload["input_file_id"],
+            "requests": [json.loads(line) for line in data.decode("utf-8").splitlines() if line.strip()],
+            "created": time.time()
+        }
+        self.batches.batches[batch["id"]] = batch
+        self._send_json(200, self._batch_object(batch))
+    
+    def _get_batch(self, body: bytes, batch_id: str):
+        """OpenAI: retrieve a batch, writing its output files once it has ended."""
+        batch = self.batches.batches.get(batch_id)
+        if batch is None or "requests" not in batch:
+            self._send_json(404, {"error": {"message": f"No such batch: {batch_id}"}})
+            return
+        if self.batches.ended(batch) and "output_file_id" not in batch:
+            output, errors = [], []
+            for request in batch["requests"]:
+                line = {"id": self.batches.new_id("batch_req_"), "custom_id": request["custom_id"]}
+                if _failed(request["body"]):
+                    errors.append({**line, "response": {"status_code": 400, "body": {
+                        "error": {"message": "Stub failure"}}}, "error": None})
+                else:
+                    output.append({**line, "response": {"status_code": 200, "body": {
+                        "choices": [{"message": {"role": "assistant", "content": STUB_COMMAND}}]}},
+                        "error": None})
+            for key, lines in (("output_file_id", output), ("error_file_id", errors)):
+                file_id = self.batches.new_id("file-") if lines else None
+                if file_id:
+                    self.batches.files[file_id] = "".join(json.dumps(line) + "\n" for line in lines).encode("utf-8")
+                batch[key] = file_id
+            batch["failed"] = len(errors)
+        self._send_json(200, self._batch_object(batch))
+    
+    def _batch_object(self, batch: dict) -> dict:
+        """OpenAI: the API representation of a batch."""
+        ended = "output_file_id" in batch
+        total = len(batch["requests"])
+        failed = batch.get("failed", 0)
+        return {
+            "id": batch["id"],
+            "object": "batch",
+            "endpoint": batch["endpoint"],
+            "input_file_id": batch["input_file_id"],
+            "status": "completed" if ended else "in_progress",
+            "output_file_id": batch.get("output_file_id"),
+            "error_file_id": batch.get("error_file_id"),
+            "request_counts": {"total": total, "completed": total - failed if ended else 0, "failed": failed}
+        }
+    
+    def _create_message_batch(self, body: bytes):
+        """Anthropic: create a message batch."""
+        batch = {
+            "id": self.batches.new_id("msgbatch_"),
+            "message_requests": json.loads(body).get("requests", []),
+            "created": time.time()
+        }
+        self.batches.batches[batch["id"]] = batch
+        self._send_json(200, self._message_batch_object(batch))
+    
+    def _get_message_batch(self, body: bytes, batch_id: str):
+        """Anthropic: retrieve a message batch."""
+        batch = self.batches.batches.get(batch_id)
+        if batch is None or "message_requests" not in batch:
+            self._send_json(404, {"error": {"message": f"No such batch: {batch_id}"}})
+            return
+        self._send_json(200, self._message_batch_object(batch))
+    
+    def _message_batch_results(self, body: bytes, batch_id: str):
+        """Anthropic: download the results of an ended message batch."""
+        batch = self.batches.batches.get(batch_id)
+        if batch is None or "message_requests" not in batch or not self.batches.ended(batch):
+            self._send_json(404, {"error": {"message": f"No results for batch: {batch_id}"}})
+            return
+        lines = []
+        for request in batch["message_requests"]:
+            if _failed(request["params"]):
+                result = {"type": "errored", "error": {"type": "invalid_request_error", "message": "Stub failure"}}
+            else:
+                result = {"type": "succeeded", "message": {"content": [{"type": "text", "text": STUB_COMMAND}]}}
+            lines.append({"custom_id": request["custom_id"], "result": result})
+        data = "".join(json.dumps(line) + "\n" for line in lines).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/binary")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+    
+    def _message_batch_object(self, batch: dict) -> dict:
+        """Anthropic: the API representation of a message batch."""
+        ended = self.batches.ended(batch)
+        requests = batch["message_requests"]
+        failed = sum(_failed(request["params"]) for request in requests) if ended else 0
+        return {
+            "id": batch["id"],
+            "type": "message_batch",
+            "processing_status": "ended" if ended else "in_progress",
+            "request_counts": {
+                "processing": 0 if ended else len(requests),
+                "succeeded": len(requests) - failed if ended else 0,
+                "errored": failed,
+                "canceled": 0,
+                "expired": 0
+            },
+            "results_url": f"/v1/messages/batches/{batch['id']}/results" if ended else None
+        }
+    
+    def _send_events(self, events: list):
+        """Send server-sent events as a chunked response, one chunk per event."""
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        try:
+            for name, data in events:
+                text = data if isinstance(data, str) else json.dumps(data)
+                event = (f"event: {name}\n" if name else "") + f"data: {text}\n\n"
+                chunk = event.encode("utf-8")
+                self.wfile.write(b"%x\r\n%s\r\n" % (len(chunk), chunk))
+                self.wfile.flush()
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True
+    
+    def _send_json(self, status: int, payload: dict):
+        """Send a JSON response."""
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def serve(port: int = 0, latency: float = 0.0, batch_delay: float = 0.0) -> ThreadingHTTPServer:
+    """
+    Start the stub server in a background thread.
+    
+    Args:
+        port: Port to listen on (0 picks a free port)
+        latency: Seconds each request waits before it is answered
+        batch_delay: Seconds after creation at which a batch has ended
+    
+    Returns:
+        Running server; its port is server.server_port
+    """
+    handler = type("StubHandler", (StubHandler,), {"latency": latency, "batches": StubBatches(batch_delay),
+                                                   "prompt_cache": StubPromptCache()})
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+if __name__ == "__main__":
+    server = serve(int(sys.argv[1]) if len(sys.argv) > 1 else 0,
+                   batch_delay=float(sys.argv[2]) if len(sys.argv) > 2 else 0.0)
+    print(f"Stub provider listening on http://127.0.0.1:{server.server_port}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
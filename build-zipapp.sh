@@ -0,0 +1,61 @@
+#!/bin/bash
+
+# tinycode zipapp build script
+# Version: 1.0.0 - Single-file distribution with precompiled bytecode
+
+set -e
+
+# Colors for output
+RED='\033[0;31m'
+GREEN='\033[0;32m'
+YELLOW='\033[1;33m'
+BLUE='\033[0;34m'
+NC='\033[0m' # No Color
+
+echo -e "${BLUE}tinycode - Zipapp Build${NC}"
+echo -e "${BLUE}======================${NC}"
+echo
+
+# Get script directory
+SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
+OUTPUT="$SCRIPT_DIR/dist/tinycode.pyz"
+PYTHON="${PYTHON:-python3}"
+
+if ! command -v "$PYTHON" &> /dev/null; then
+    echo -e "${RED}Error: $PYTHON not found${NC}"
+    exit 1
+fi
+
+BUILD_DIR="$(mktemp -d)"
+trap 'rm -rf "$BUILD_DIR"' EXIT
+
+# Copy the packages
+echo -e "${YELLOW}Copying sources...${NC}"
+for package in api core ui utils; do
+    cp -r "$SCRIPT_DIR/src/$package" "$BUILD_DIR/"
+done
+find "$BUILD_DIR" -name "__pycache__" -type d -prune -exec rm -rf {} +
+echo -e "${GREEN}✓ Sources copied${NC}"
+
+# Precompile next to the sources: zipimport cannot write __pycache__,
+# so bytecode has to ship inside the archive in the legacy location.
+# The .pyc files are only used by the same Python version that built them.
+echo -e "${YELLOW}Precompiling bytecode with $("$PYTHON" --version)...${NC}"
+"$PYTHON" -m compileall -q -b "$BUILD_DIR"
+echo -e "${GREEN}✓ Bytecode compiled${NC}"
+
+# Build the archive
+echo -e "${YELLOW}Building zipapp...${NC}"
+mkdir -p "$(dirname "$OUTPUT")"
+"$PYTHON" -m zipapp "$BUILD_DIR" \
+    --main "core.launcher:main" \
+    --python "/usr/bin/env python3" \
+    --output "$OUTPUT"
+echo -e "${GREEN}✓ Built $OUTPUT${NC}"
+
+echo
+echo "Run it directly or through the ./tinycode wrapper, which prefers it:"
+echo "  $OUTPUT --version"
+echo
+echo "Provider SDKs are not bundled; install them into the interpreter that"
+echo "runs the zipapp, or set \"transport\": {\"mode\": \"lean\"} to run without them."
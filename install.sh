@@ -325,7 +325,7 @@ cd "$SCRIPT_DIR"
 # Activate venv and install
 source "$VENV_DIR/bin/activate"
 pip install --upgrade pip
-pip install .
+pip install --compile .
 
 echo -e "${GREEN}✓ tinycode installed in virtual environment${NC}"
     
@@ -353,6 +353,30 @@ EOF
 
 chmod +x "$INSTALL_DIR/tinycode"
 echo -e "${GREEN}✓ Wrapper script created at $INSTALL_DIR/tinycode${NC}"
+
+# Create daemon wrapper script
+cat > "$INSTALL_DIR/tinycoded" << 'EOF'
+#!/bin/bash
+
+# tinycoded wrapper script
+# This script runs the tinycode daemon from the virtual environment
+
+VENV_DIR="$HOME/.local/share/tinycode/venv"
+PYTHON_SCRIPT="$VENV_DIR/bin/tinycoded"
+
+# Check if virtual environment exists
+if [[ ! -f "$PYTHON_SCRIPT" ]]; then
+    echo "Error: tinycoded not found in virtual environment"
+    echo "Please reinstall tinycode: ./install.sh"
+    exit 1
+fi
+
+# Execute tinycoded from virtual environment
+exec "$PYTHON_SCRIPT" "$@"
+EOF
+
+chmod +x "$INSTALL_DIR/tinycoded"
+echo -e "${GREEN}✓ Daemon wrapper script created at $INSTALL_DIR/tinycoded${NC}"
         
 # Check if install directory is in PATH
 if [[ ":$PATH:" != *":$INSTALL_DIR:"* ]]; then
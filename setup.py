@@ -46,7 +46,8 @@ setup(
     install_requires=read_requirements(),
     entry_points={
         "console_scripts": [
-            "tinycode=core.tinycode:main",
+            "tinycode=core.launcher:main",
+            "tinycoded=core.launcher:daemon_main",
         ],
     },
     include_package_data=True,
@@ -4,13 +4,31 @@ API manager for tinycode.
 Handles automatic API selection and fallback logic.
 """
 
-from typing import Optional, Dict, Any
-from .openai_client import OpenAIClient
-from .claude_client import ClaudeClient
+import sys
+import time
+import queue
+import random
+import threading
+import concurrent.futures
+from typing import Optional, Dict, Any, Callable, Iterable, Iterator
 
 
-class APIManager:
-    """Manages API clients and handles automatic selection."""
+# Default model per provider, used when the config section omits one
+DEFAULT_MODELS = {
+    "openai": "gpt-3.5-turbo",
+    "claude": "claude-3-sonnet-20240229",
+}
+
+# Seconds an adaptive choice is kept, so that the API warmed up for a query
+# is the one its request is sent to
+ADAPTIVE_CHOICE_TTL = 2.0
+
+
+class BaseAPIManager:
+    """API selection from the configuration, shared by the sync and async managers."""
+    
+    # Last adaptive choice by available APIs, shared by the managers of a process
+    _adaptive_choices: Dict[tuple, tuple] = {}
     
     def __init__(self, config_manager):
         """
@@ -20,44 +38,24 @@ class APIManager:
             config_manager: Configuration manager instance
         """
         self.config_manager = config_manager
-        self.openai_client = None
-        self.claude_client = None
-        self._initialize_clients()
-    
-    def _initialize_clients(self):
-        """Initialize API clients based on available keys."""
-        # Initialize OpenAI client
-        openai_key = self.config_manager.get_api_key("openai")
-        if openai_key:
-            openai_config = self.config_manager.get_api_config("openai")
-            self.openai_client = OpenAIClient(
-                api_key=openai_key,
-                model=openai_config.get("model", "gpt-3.5-turbo"),
-                max_tokens=openai_config.get("max_tokens", 100)
-            )
-        
-        # Initialize Claude client
-        claude_key = self.config_manager.get_api_key("claude")
-        if claude_key:
-            claude_config = self.config_manager.get_api_config("claude")
-            self.claude_client = ClaudeClient(
-                api_key=claude_key,
-                model=claude_config.get("model", "claude-3-sonnet-20240229"),
-                max_tokens=claude_config.get("max_tokens", 100)
-            )
+        self._provider_stats = None
+        self._answer_lengths = None
+    
+    def get_model(self, api_name: str) -> str:
+        """Get the configured model for an API."""
+        return self.config_manager.get_api_config(api_name).get("model", DEFAULT_MODELS[api_name])
     
     def get_available_apis(self) -> list:
         """
-        Get list of available API clients.
+        Get list of APIs that have a key configured.
         
         Returns:
             List of available API names
         """
         available = []
-        if self.openai_client:
-            available.append("openai")
-        if self.claude_client:
-            available.append("claude")
+        for api_name in DEFAULT_MODELS:
+            if self.config_manager.get_api_key(api_name):
+                available.append(api_name)
         return available
     
     def select_api(self, preferred_api: Optional[str] = None) -> Optional[str]:
@@ -89,6 +87,12 @@ class APIManager:
         if len(available) == 1:
             return available[0]
         
+        # Route by recent latency and errors, if enough calls were recorded
+        if self.config_manager.config.get("selection_policy", "static") == "adaptive":
+            adaptive = self._select_adaptive(available)
+            if adaptive:
+                return adaptive
+        
         # If multiple available, use preferred from config
         config_preferred = self.config_manager.config.get("preferred_api", "openai")
         if config_preferred in available:
@@ -97,85 +101,150 @@ class APIManager:
         # Fallback to first available
         return available[0]
     
-    def generate_command(self, query: str, system_context: str = "", preferred_api: Optional[str] = None) -> Optional[str]:
+    def _select_adaptive(self, available: list) -> Optional[str]:
         """
-        Generate command using the best available API.
+        Pick the API that has been fastest and healthiest lately.
+        
+        APIs are scored by the mean of their decayed p50 and p95 latency,
+        divided by their success rate. With probability
+        adaptive.exploration another API is picked instead, so that an
+        API recovering from a bad spell gets measured again.
         
         Args:
-            query: User's query
-            system_context: System information context
-            preferred_api: Manually specified API to use
-            
+            available: Available API names
+        
         Returns:
-            Generated command or None if all APIs failed
+            Chosen API, or None if no API has adaptive.min_samples calls
+            recorded
         """
-        # Select API to use
-        selected_api = self.select_api(preferred_api)
-        if not selected_api:
-            print("Error: No API keys configured. Use --set-api-key to configure.")
+        key = tuple(available)
+        choice = self._adaptive_choices.get(key)
+        if choice and time.monotonic() - choice[1] < ADAPTIVE_CHOICE_TTL:
+            return choice[0]
+        
+        stats = self._get_provider_stats()
+        if not stats:
+            return None
+        
+        config = self.config_manager.get_adaptive_config()
+        scores = {}
+        for api_name in available:
+            try:
+                entry = stats.get(api_name, self.get_model(api_name))
+            except Exception:
+                entry = None
+            if entry and entry["samples"] >= config.get("min_samples", 5) and entry["p50"] is not None:
+                success_rate = max(1.0 - entry["error_rate"], 0.05)
+                scores[api_name] = (entry["p50"] + entry["p95"]) / 2 / success_rate
+        if not scores:
             return None
         
-        # Try the selected API first
-        result = self._try_api(selected_api, query, system_context)
-        if result:
-            return result
-        
-        # If preferred API failed and auto-select is enabled, try other APIs
-        if self.config_manager.config.get("auto_select_api", True) and preferred_api:
-            available_apis = self.get_available_apis()
-            for api in available_apis:
-                if api != selected_api:
-                    result = self._try_api(api, query, system_context)
-                    if result:
-                        print(f"Note: {selected_api} failed, used {api} instead")
-                        return result
+        selected = min(scores, key=scores.get)
+        others = [api_name for api_name in available if api_name != selected]
+        if others and random.random() < config.get("exploration", 0.05):
+            selected = random.choice(others)
         
-        return None
+        self._adaptive_choices[key] = (selected, time.monotonic())
+        return selected
     
-    def _try_api(self, api_name: str, query: str, system_context: str) -> Optional[str]:
+    def get_api_stats(self) -> Dict[str, Optional[Dict[str, Any]]]:
         """
-        Try to generate command using specified API.
+        Recent latency and error statistics of the available APIs.
         
-        Args:
-            api_name: Name of the API to use
-            query: User's query
-            system_context: System information context
-            
         Returns:
-            Generated command or None if failed
+            Dictionary mapping API names to ProviderStats.get results
+        """
+        stats = self._get_provider_stats()
+        result = {}
+        for api_name in self.get_available_apis():
+            try:
+                result[api_name] = stats.get(api_name, self.get_model(api_name)) if stats else None
+            except Exception:
+                result[api_name] = None
+        return result
+    
+    def _get_provider_stats(self):
+        """Get the provider statistics store, or None if it is unavailable."""
+        if self._provider_stats is not None:
+            return self._provider_stats or None
+        
+        self._provider_stats = False
+        try:
+            from utils.provider_stats import ProviderStats
+            half_life = self.config_manager.get_adaptive_config().get("half_life", 3600)
+            self._provider_stats = ProviderStats(self.config_manager.config_dir / "provider_stats.db", half_life)
+        except Exception as e:
+            print(f"Warning: Provider statistics unavailable: {e}", file=sys.stderr)
+            return None
+        
+        return self._provider_stats
+    
+    def get_output_budget(self, api_name: str) -> Optional[int]:
         """
-        client = None
+        Get the max_tokens budget for a single-query request to an API.
         
-        if api_name == "openai" and self.openai_client:
-            client = self.openai_client
-        elif api_name == "claude" and self.claude_client:
-            client = self.claude_client
+        The budget covers a configured share of the recent answers of the
+        API's model, with headroom, between min_tokens and the configured
+        max_tokens.
         
-        if not client:
+        Args:
+            api_name: API the request goes to
+        
+        Returns:
+            Budget in tokens, or None if output budgets are disabled or
+            too few answers were recorded
+        """
+        config = self.config_manager.get_output_budget_config()
+        lengths = self._get_answer_lengths() if config.get("enabled", True) else None
+        if not lengths:
+            return None
+        
+        try:
+            budget = lengths.budget(api_name, self.get_model(api_name), config.get("quantile", 0.99),
+                                    config.get("headroom", 1.5), config.get("min_samples", 20))
+        except Exception:
+            return None
+        if budget is None:
             return None
+        max_tokens = self.config_manager.get_api_config(api_name).get("max_tokens", 100)
+        return min(max(budget, config.get("min_tokens", 16)), max_tokens)
+    
+    def _get_answer_lengths(self):
+        """Get the answer length store, or None if it is unavailable."""
+        if self._answer_lengths is not None:
+            return self._answer_lengths or None
         
+        self._answer_lengths = False
         try:
-            return client.generate_command(query, system_context)
+            from utils.answer_lengths import AnswerLengths
+            half_life = self.config_manager.get_output_budget_config().get("half_life", 604800)
+            self._answer_lengths = AnswerLengths(self.config_manager.config_dir / "answer_lengths.db", half_life)
         except Exception as e:
-            print(f"Error with {api_name} API: {e}")
+            print(f"Warning: Answer lengths unavailable: {e}", file=sys.stderr)
             return None
+        
+        return self._answer_lengths
     
-    def test_apis(self) -> Dict[str, bool]:
+    def get_hedge_api(self, api_name: str, preferred_api: Optional[str] = None) -> Optional[str]:
         """
-        Test all available APIs.
+        Get the API to hedge requests to api_name with, if hedging is on.
         
-        Returns:
-            Dictionary mapping API names to test results
-        """
-        results = {}
+        Hedging only applies when no API was forced on the command line.
         
-        if self.openai_client:
-            results["openai"] = self.openai_client.test_connection()
+        Args:
+            api_name: API the request goes to first
+            preferred_api: Manually specified API, if any
         
-        if self.claude_client:
-            results["claude"] = self.claude_client.test_connection()
+        Returns:
+            The other configured API, or None
+        """
+        if preferred_api or not self.config_manager.get_hedging_config().get("enabled", False):
+            return None
         
-        return results
+        for api in self.get_available_apis():
+            if api != api_name:
+                return api
+        return None
     
     def get_api_info(self) -> Dict[str, Dict[str, Any]]:
         """
@@ -185,30 +254,253 @@ class APIManager:
             Dictionary with API information
         """
         info = {}
+        available = self.get_available_apis()
         
-        if self.openai_client:
-            openai_config = self.config_manager.get_api_config("openai")
-            info["openai"] = {
-                "enabled": True,
-                "model": openai_config.get("model", "gpt-3.5-turbo"),
-                "max_tokens": openai_config.get("max_tokens", 100)
-            }
-        else:
-            info["openai"] = {"enabled": False}
-        
-        if self.claude_client:
-            claude_config = self.config_manager.get_api_config("claude")
-            info["claude"] = {
-                "enabled": True,
-                "model": claude_config.get("model", "claude-3-sonnet-20240229"),
-                "max_tokens": claude_config.get("max_tokens", 100)
-            }
-        else:
-            info["claude"] = {"enabled": False}
+        for api_name, default_model in DEFAULT_MODELS.items():
+            if api_name in available:
+                api_config = self.config_manager.get_api_config(api_name)
+                info[api_name] = {
+                    "enabled": True,
+                    "model": api_config.get("model", default_model),
+                    "max_tokens": api_config.get("max_tokens", 100)
+                }
+            else:
+                info[api_name] = {"enabled": False}
         
         return info
 
 
+class APIManager(BaseAPIManager):
+    """
+    Manages API clients and handles automatic selection.
+    
+    Blocking front end of AsyncAPIManager: every request runs on a
+    background event loop, which asyncio and the provider clients are
+    only loaded for when the first warm-up or request needs them, so
+    commands that never talk to an API do not pay for them.
+    """
+    
+    def __init__(self, config_manager):
+        """
+        Initialize API manager.
+        
+        Args:
+            config_manager: Configuration manager instance
+        """
+        super().__init__(config_manager)
+        self._manager = None
+        self._loop = None
+        self._warmups: Dict[str, threading.Thread] = {}
+        self._inflight = set()
+        self._lock = threading.RLock()
+        self._calls = threading.local()
+    
+    def _get_async_manager(self):
+        """Get the async manager and the loop it runs on, starting both on first use."""
+        with self._lock:
+            if self._manager is None:
+                from .event_loop import get_background_loop
+                from .async_api_manager import AsyncAPIManager
+                self._loop = get_background_loop()
+                self._manager = AsyncAPIManager(self.config_manager)
+            return self._manager, self._loop
+    
+    @property
+    def last_call(self) -> Dict[str, Any]:
+        """
+        How the last request was answered (API, model, cache, hedge, retries, throttling).
+        
+        Threads that called generate_command see their own last request,
+        so concurrent callers (e.g. daemon requests) are not mixed up.
+        """
+        last_call = getattr(self._calls, "last_call", None)
+        if last_call is not None:
+            return last_call
+        return self._manager.last_call if self._manager else {}
+    
+    def prewarm(self, api_name: str, timer=None):
+        """
+        Build the client and open its connection in the background.
+        
+        Lets the asyncio and SDK imports, DNS lookup, TCP connect and TLS
+        handshake run while the caller does local setup; the first request
+        on this API waits for the warm-up and then reuses the connection.
+        
+        Args:
+            api_name: Name of the API to warm up
+            timer: Optional PhaseTimer recording a 'connect' phase
+        """
+        def start():
+            manager, loop = self._get_async_manager()
+            loop.call_soon(manager.prewarm, api_name, timer)
+        
+        with self._lock:
+            if api_name in self._warmups:
+                return
+            thread = threading.Thread(target=start, daemon=True)
+            # Started under the lock so concurrent callers never join it unstarted
+            thread.start()
+            self._warmups[api_name] = thread
+    
+    def wait_for_warmup(self, api_name: str):
+        """Wait for a background warm-up of the API to finish, if any."""
+        thread = self._warmups.pop(api_name, None)
+        if thread:
+            thread.join()
+            manager, _ = self._get_async_manager()
+            self._run(manager.wait_for_warmup(api_name))
+    
+    def generate_command(self, query: str, system_context: str = "", preferred_api: Optional[str] = None,
+                         use_cache: bool = True, refresh: bool = False,
+                         on_text: Optional[Callable[[str], None]] = None) -> Optional[str]:
+        """
+        Generate command using the best available API.
+        
+        Args:
+            query: User's query
+            system_context: System information context
+            preferred_api: Manually specified API to use
+            use_cache: Read and write the response cache
+            refresh: Skip the cache lookup but store the new answer
+            on_text: Stream the answer, calling this (from the event loop
+                thread) with the command as it arrives
+        
+        Returns:
+            Generated command or None if all APIs failed or cancel() was called
+        """
+        manager, _ = self._get_async_manager()
+        # Warm-ups must be scheduled before the request that relies on them
+        for thread in list(self._warmups.values()):
+            thread.join()
+        
+        async def generate():
+            command = await manager.generate_command(
+                query, system_context, preferred_api, use_cache=use_cache, refresh=refresh, on_text=on_text
+            )
+            # Read inside the request's task, where last_call is its own
+            return command, manager.last_call
+        
+        self._calls.last_call = None
+        try:
+            command, self._calls.last_call = self._run(generate())
+            return command
+        except concurrent.futures.CancelledError:
+            return None
+    
+    def generate_batch(self, items: Iterable[Dict[str, Any]], system_context: str = "",
+                       concurrency: int = 8, use_cache: bool = True,
+                       refresh: bool = False, pack_size: int = 1) -> Iterator[Dict[str, Any]]:
+        """
+        Generate commands for many queries, a bounded number at a time.
+        
+        See AsyncAPIManager.generate_batch; results are yielded as they
+        complete. Closing the iterator (or Ctrl-C) cancels the rest.
+        
+        Args:
+            items: Dicts with a 'query' and optionally an 'api' to prefer
+            system_context: System information context
+            concurrency: Maximum number of requests in flight
+            use_cache: Read and write the response cache
+            refresh: Skip the cache lookup but store the new answers
+            pack_size: Queries sent per request (see query packing)
+        
+        Yields:
+            Each item with 'command', 'api', 'model', 'cache' and 'latency_ms' added
+        """
+        manager, loop = self._get_async_manager()
+        for thread in list(self._warmups.values()):
+            thread.join()
+        
+        results: "queue.Queue" = queue.Queue()
+        finished = object()
+        
+        async def produce():
+            try:
+                async for result in manager.generate_batch(items, system_context, concurrency,
+                                                           use_cache, refresh, pack_size):
+                    results.put(result)
+            finally:
+                results.put(finished)
+        
+        future = loop.submit(produce())
+        with self._lock:
+            self._inflight.add(future)
+        try:
+            while True:
+                result = results.get()
+                if result is finished:
+                    break
+                yield result
+            # Re-raise whatever stopped the batch early
+            future.result()
+        finally:
+            future.cancel()
+            with self._lock:
+                self._inflight.discard(future)
+    
+    def get_usage(self) -> Dict[str, int]:
+        """Requests sent, tokens, retries and rate limit waits so far (see AsyncAPIManager.get_usage)."""
+        if not self._manager:
+            return {"requests": 0, "input_tokens": 0, "output_tokens": 0, "retries": 0, "backoff_seconds": 0.0,
+                    "truncated": 0, "throttled": 0, "throttle_seconds": 0.0}
+        return self._manager.get_usage()
+    
+    def cancel(self):
+        """Cancel the requests in flight; their generate_command calls return None."""
+        with self._lock:
+            for future in self._inflight:
+                future.cancel()
+    
+    def submit_batch(self, api_name: str, queries: Dict[str, str], system_context: str = "") -> str:
+        """
+        Submit queries to the provider's offline batch endpoint.
+        
+        Args:
+            api_name: Name of the API to submit to
+            queries: Queries by custom ID
+            system_context: System information context
+        
+        Returns:
+            Provider ID of the batch
+        """
+        manager, _ = self._get_async_manager()
+        return self._run(manager.submit_batch(api_name, queries, system_context))
+    
+    def get_batch_status(self, api_name: str, batch_id: str) -> Dict[str, Any]:
+        """Poll an offline batch (see AsyncAPIManager.get_batch_status)."""
+        manager, _ = self._get_async_manager()
+        return self._run(manager.get_batch_status(api_name, batch_id))
+    
+    def get_batch_results(self, api_name: str, batch_id: str) -> Dict[str, Optional[str]]:
+        """Download the commands of an ended offline batch, by custom ID."""
+        manager, _ = self._get_async_manager()
+        return self._run(manager.get_batch_results(api_name, batch_id))
+    
+    def test_apis(self) -> Dict[str, bool]:
+        """
+        Test all available APIs.
+        
+        Returns:
+            Dictionary mapping API names to test results
+        """
+        manager, _ = self._get_async_manager()
+        return self._run(manager.test_apis())
+    
+    def _run(self, coroutine):
+        """Run a coroutine on the event loop and wait for it, so that cancel() can abort it."""
+        future = self._loop.submit(coroutine)
+        with self._lock:
+            self._inflight.add(future)
+        try:
+            return future.result()
+        except KeyboardInterrupt:
+            future.cancel()
+            raise
+        finally:
+            with self._lock:
+                self._inflight.discard(future)
+
+
 if __name__ == "__main__":
     # Test the API manager
     from ..utils.config import ConfigManager
@@ -0,0 +1,989 @@
+#!/usr/bin/env python3
+"""
+Asyncio API manager for tinycode.
+Handles automatic API selection, fallback, hedging and the response
+caches on the async clients; APIManager runs it for blocking callers.
+"""
+
+import os
+import sys
+import time
+import asyncio
+import threading
+import contextvars
+from typing import Optional, Dict, Any, Tuple, Callable, Iterable, Iterator, AsyncIterator, Awaitable, List, TypeVar
+
+from .api_manager import BaseAPIManager, DEFAULT_MODELS
+from .prompts import PROMPT_VERSION
+from .transport import APIError, AuthenticationError, RateLimitError, HTTPSettings
+from .retry import RetryPolicy, collect_retries, parse_retry_after
+from .usage import collect_usage
+from .key_pool import KeyPool
+
+T = TypeVar("T")
+
+
+class AsyncAPIManager(BaseAPIManager):
+    """
+    Manages the async API clients and handles automatic selection.
+    
+    Provider clients (and the vendor SDKs behind them) are imported and
+    constructed lazily, in a worker thread so the event loop keeps
+    running, the first time a provider is actually used. Requests can be
+    awaited concurrently; cancelling one aborts its connection. A provider
+    with several API keys gets one client per key, and requests are spread
+    over the keys by a KeyPool. With the SDK transport, every client shares
+    one HTTP client, so its connection pool serves the whole process.
+    """
+    
+    def __init__(self, config_manager):
+        """
+        Initialize API manager.
+        
+        Args:
+            config_manager: Configuration manager instance
+        """
+        super().__init__(config_manager)
+        self._clients: Dict[Tuple[str, str], "asyncio.Future"] = {}
+        self._pools: Dict[str, KeyPool] = {}
+        self._warmups: Dict[str, "asyncio.Task"] = {}
+        self._http_client = None
+        self._http_client_lock = threading.Lock()
+        self._cache = None
+        self._similarity = None
+        self._rate_limiter = None
+        self._ledger = None
+        self._throttled = {"throttled": 0, "throttle_seconds": 0.0}
+        self._last_call: Dict[str, Any] = {}
+        self._current_call = contextvars.ContextVar("current_call", default=None)
+    
+    @property
+    def last_call(self) -> Dict[str, Any]:
+        """
+        How the last request was answered (API, model, cache, hedge, retries,
+        time spent waiting for the local rate limit).
+        
+        Inside a task, this is the last request made by that task, so
+        concurrent requests each see their own.
+        """
+        return self._current_call.get() or self._last_call
+    
+    async def get_client(self, api_name: str, api_key: Optional[str] = None):
+        """
+        Get the client for an API key, creating it on first use.
+        
+        The provider module is imported here rather than at module load,
+        so only the SDK of the provider actually selected gets loaded.
+        
+        Args:
+            api_name: Name of the API ('openai' or 'claude')
+            api_key: Key from the API's pool (default: the primary key)
+        
+        Returns:
+            Client instance or None if the API has no key configured
+        """
+        if api_key is None:
+            live_keys = self._get_pool(api_name).live_keys
+            if not live_keys:
+                return None
+            api_key = live_keys[0]
+        
+        future = self._clients.get((api_name, api_key))
+        if future is None:
+            future = asyncio.get_running_loop().run_in_executor(None, self._create_client, api_name, api_key)
+            self._clients[(api_name, api_key)] = future
+        # Shielded: a cancelled caller must not cancel creation for the others
+        return await asyncio.shield(future)
+    
+    def _get_pool(self, api_name: str) -> KeyPool:
+        """Get the key pool of an API, built from its configured keys on first use."""
+        pool = self._pools.get(api_name)
+        if pool is None:
+            cooldown = self.config_manager.get_key_pool_config().get("cooldown", 30.0)
+            pool = self._pools[api_name] = KeyPool(self.config_manager.get_api_keys(api_name), cooldown)
+        return pool
+    
+    def _create_client(self, api_name: str, api_key: str):
+        """Import the provider module and build the client of a key; runs in a worker thread."""
+        # With other keys to switch to, rate limits and rejected keys go to _with_key
+        pooled = len(self._pools[api_name].keys) > 1
+        retry = RetryPolicy.from_config(self.config_manager.get_retry_config())
+        retry.retry_rate_limits = not pooled
+        
+        transport_config = self.config_manager.get_transport_config()
+        http = HTTPSettings.from_config(transport_config)
+        mode = transport_config.get("mode", "sdk")
+        
+        api_config = self.config_manager.get_api_config(api_name)
+        client_args = {
+            "api_key": api_key,
+            "model": api_config.get("model", DEFAULT_MODELS[api_name]),
+            "max_tokens": api_config.get("max_tokens", 100),
+            "transport": mode,
+            "base_url": api_config.get("base_url") or None,
+            "http": http,
+            "retry": retry,
+            "raise_key_errors": pooled,
+            "http_client": self._get_http_client(http) if mode != "lean" else None
+        }
+        
+        if api_name == "claude":
+            client_args["prompt_cache"] = self.config_manager.get_prompt_cache_config().get("enabled", True)
+        client_args["stop_sequences"] = self.config_manager.get_output_budget_config().get("stop_sequences", True)
+        
+        if api_name == "openai":
+            from .openai_client import AsyncOpenAIClient
+            return AsyncOpenAIClient(**client_args)
+        if api_name == "claude":
+            from .claude_client import AsyncClaudeClient
+            return AsyncClaudeClient(**client_args)
+        return None
+    
+    def _get_http_client(self, http: HTTPSettings):
+        """Get the HTTP client shared by the SDK clients, building it on first use."""
+        with self._http_client_lock:
+            if self._http_client is None:
+                self._http_client = http.create_client()
+            return self._http_client
+    
+    def prewarm(self, api_name: str, timer=None):
+        """
+        Start building the client and opening its connection.
+        
+        Must be called from the event loop. The first request on this API
+        waits for the warm-up and then reuses the open connection.
+        
+        Args:
+            api_name: Name of the API to warm up
+            timer: Optional PhaseTimer recording a 'connect' phase
+        """
+        if api_name in self._warmups or any(name == api_name for name, _ in self._clients):
+            return
+        self._warmups[api_name] = asyncio.ensure_future(self._warm_up(api_name, timer))
+    
+    async def _warm_up(self, api_name: str, timer=None):
+        """Build the client and open its connection, timed as the 'connect' phase."""
+        async def warm_up():
+            try:
+                client = await self.get_client(api_name)
+                if client:
+                    await client.warm_up()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                # The real request reports any problem
+                pass
+        
+        if timer:
+            with timer.phase("connect", background=True):
+                await warm_up()
+        else:
+            await warm_up()
+    
+    async def wait_for_warmup(self, api_name: str):
+        """Wait for a warm-up of the API to finish, if any."""
+        task = self._warmups.pop(api_name, None)
+        if task:
+            await asyncio.shield(task)
+    
+    async def generate_command(self, query: str, system_context: str = "", preferred_api: Optional[str] = None,
+                               use_cache: bool = True, refresh: bool = False,
+                               on_text: Optional[Callable[[str], None]] = None,
+                               allow_stale: bool = True) -> Optional[str]:
+        """
+        Generate command using the best available API.
+        
+        Args:
+            query: User's query
+            system_context: System information context
+            preferred_api: Manually specified API to use
+            use_cache: Read and write the response cache
+            refresh: Skip the cache lookup but store the new answer
+            on_text: Stream the answer, calling this with the command as it arrives
+            allow_stale: Serve stale cache entries (refreshed in the
+                background); otherwise they are regenerated right away
+        
+        Returns:
+            Generated command or None if all APIs failed
+        
+        Raises:
+            asyncio.CancelledError: If the request was cancelled
+        """
+        # Select API to use
+        selected_api = self.select_api(preferred_api)
+        if not selected_api:
+            print("Error: No API keys configured. Use --set-api-key to configure.")
+            return None
+        
+        started = time.perf_counter()
+        self._last_call = {"api": selected_api, "model": self.get_model(selected_api), "cache": None}
+        self._current_call.set(self._last_call)
+        
+        # Serve from the response cache when possible
+        cache = self._get_cache() if use_cache else None
+        if cache and not refresh:
+            cached = (self._lookup_cache(cache, query, system_context, selected_api, allow_stale) or
+                      self._lookup_similar(query, system_context, selected_api))
+            if cached:
+                self._record_ledger(selected_api, True, started, cache=self.last_call["cache"])
+                return cached
+        
+        result, used_api = await self._generate_uncached(query, system_context, selected_api, preferred_api, on_text)
+        
+        if result and cache:
+            self.last_call["cache"] = "miss"
+            try:
+                key = self._cache_key(query, system_context, used_api)
+                cache.put(key, result, used_api, self.get_model(used_api))
+            except Exception:
+                pass
+            self._index_similar(query, system_context, used_api, result)
+        
+        return result
+    
+    async def _generate_uncached(self, query: str, system_context: str, selected_api: str,
+                                 preferred_api: Optional[str],
+                                 on_text: Optional[Callable[[str], None]] = None) -> Tuple[Optional[str], str]:
+        """
+        Ask the providers, falling back to other APIs if allowed.
+        
+        Returns:
+            Tuple of the generated command (or None) and the API that produced it
+        """
+        # Race the other provider if the selected one is slow
+        hedge_api = self.get_hedge_api(selected_api, preferred_api)
+        if hedge_api:
+            return await self._generate_hedged(query, system_context, selected_api, hedge_api, on_text)
+        
+        # Try the selected API first
+        result = await self._try_api(selected_api, query, system_context, on_text)
+        if result:
+            return result, selected_api
+        
+        # If preferred API failed and auto-select is enabled, try other APIs
+        if self.config_manager.config.get("auto_select_api", True) and preferred_api:
+            available_apis = self.get_available_apis()
+            for api in available_apis:
+                if api != selected_api:
+                    result = await self._try_api(api, query, system_context, on_text)
+                    if result:
+                        print(f"Note: {selected_api} failed, used {api} instead")
+                        self.last_call.update({"api": api, "model": self.get_model(api)})
+                        return result, api
+        
+        return None, selected_api
+    
+    async def _generate_hedged(self, query: str, system_context: str, primary: str, secondary: str,
+                               on_text: Optional[Callable[[str], None]] = None) -> Tuple[Optional[str], str]:
+        """
+        Send the query to the primary API, and to the secondary one as well
+        if no command has arrived after the hedging delay.
+        
+        The first valid command wins and the other request is cancelled,
+        which closes its connection. A failure of the primary before the
+        delay fires the secondary straight away.
+        
+        Returns:
+            Tuple of the winning command (or None) and the API that produced it
+        """
+        delay = self.config_manager.get_hedging_config().get("delay", 1.0)
+        display = {}
+        
+        def stream_to(api):
+            if not on_text:
+                return None
+            
+            def on_api_text(preview):
+                # The first API to produce text owns the display
+                if display.setdefault("owner", api) == api:
+                    on_text(preview)
+            return on_api_text
+        
+        def start(api):
+            return asyncio.ensure_future(self._try_api(api, query, system_context, stream_to(api)))
+        
+        self.prewarm(secondary)
+        started = time.perf_counter()
+        tasks = {start(primary): primary}
+        fired_after = None
+        api, result = None, None
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            while True:
+                for task in done:
+                    finished_api = tasks.pop(task)
+                    if not result and task.result():
+                        api, result = finished_api, task.result()
+                if result or (not tasks and fired_after is not None):
+                    break
+                if fired_after is None:
+                    fired_after = time.perf_counter() - started
+                    tasks[start(secondary)] = secondary
+                done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            # Cancel the losing request, if it is still running, and let it close its connection
+            for task in tasks:
+                task.cancel()
+            if tasks:
+                await asyncio.wait(tasks)
+        
+        winner = api if result else primary
+        self.last_call.update({
+            "api": winner,
+            "model": self.get_model(winner),
+            "hedge": {
+                "primary": primary,
+                "secondary": secondary,
+                "fired_after": fired_after,
+                "winner": api if result else None,
+                "latency": time.perf_counter() - started
+            }
+        })
+        return result, winner
+    
+    def _get_cache(self):
+        """Get the response cache, or None if it is disabled or unavailable."""
+        if self._cache is not None:
+            return self._cache
+        
+        cache_config = self.config_manager.get_cache_config()
+        if not cache_config.get("enabled", True):
+            return None
+        
+        try:
+            from utils.response_cache import ResponseCache
+            stale_ttl = cache_config.get("stale_ttl", 2592000) if cache_config.get("stale_while_revalidate", False) else 0
+            self._cache = ResponseCache(
+                self.config_manager.config_dir / "cache.db",
+                max_entries=cache_config.get("max_entries", 1000),
+                ttl=cache_config.get("ttl", 86400),
+                stale_ttl=stale_ttl
+            )
+        except Exception as e:
+            print(f"Warning: Response cache unavailable: {e}", file=sys.stderr)
+            return None
+        
+        return self._cache
+    
+    def _cache_key(self, query: str, system_context: str, api_name: str) -> str:
+        """Build the response cache key for a query sent to an API."""
+        from utils.response_cache import make_cache_key
+        return make_cache_key(query, system_context, api_name, self.get_model(api_name), PROMPT_VERSION)
+    
+    def _lookup_cache(self, cache, query: str, system_context: str, api_name: str,
+                      allow_stale: bool = True) -> Optional[str]:
+        """
+        Look up a cached command for the query.
+        
+        A stale entry (past its TTL but within the stale window) is served
+        as-is while a detached process refreshes it in the background,
+        unless allow_stale is False.
+        
+        Returns:
+            Cached command or None on a miss
+        """
+        try:
+            key = self._cache_key(query, system_context, api_name)
+            entry = cache.get(key)
+            if not entry:
+                return None
+            
+            if entry["fresh"]:
+                self.last_call["cache"] = "hit"
+            elif not allow_stale:
+                return None
+            else:
+                self.last_call["cache"] = "stale"
+                if cache.claim_refresh(key):
+                    self._spawn_refresh(query, api_name)
+        except Exception:
+            return None
+        
+        return entry["command"]
+    
+    def _get_rate_limiter(self):
+        """Get the host-wide rate limiter, or None if it is disabled or unavailable."""
+        if self._rate_limiter is not None:
+            return self._rate_limiter or None
+        
+        self._rate_limiter = False
+        if not self.config_manager.get_rate_limit_config().get("enabled", False):
+            return None
+        
+        try:
+            from utils.rate_limiter import RateLimiter
+            self._rate_limiter = RateLimiter(self.config_manager.config_dir / "ratelimit.db")
+        except Exception as e:
+            print(f"Warning: Rate limiter unavailable: {e}", file=sys.stderr)
+            return None
+        
+        return self._rate_limiter
+    
+    def _rate_limits(self, api_name: str) -> Tuple[int, int]:
+        """Requests and tokens per minute allowed per key of an API; 0 for no limit."""
+        limits = self.config_manager.get_rate_limit_config().get(api_name, {})
+        return limits.get("requests_per_minute", 0), limits.get("tokens_per_minute", 0)
+    
+    def _quota_left(self, api_name: str) -> Optional[Callable[[str], float]]:
+        """How full each key's local rate limit buckets are, if the limiter applies to the API."""
+        limiter = self._get_rate_limiter()
+        requests_per_minute, tokens_per_minute = self._rate_limits(api_name)
+        if not limiter or not (requests_per_minute or tokens_per_minute):
+            return None
+        
+        from utils.rate_limiter import limiter_key
+        
+        def quota_left(api_key: str) -> float:
+            try:
+                # Rounded so that keys about as full rotate by load instead
+                return round(limiter.remaining(limiter_key(api_name, api_key),
+                                               requests_per_minute, tokens_per_minute), 2)
+            except Exception:
+                return 1.0
+        return quota_left
+    
+    async def _throttle(self, api_name: str, client, tokens: int) -> bool:
+        """
+        Wait until the host-wide rate limit of the client's API key allows a request.
+        
+        Args:
+            api_name: Name of the API
+            client: Client about to send the request
+            tokens: Tokens the request is expected to use
+        
+        Returns:
+            False if the wait would exceed rate_limit.max_wait, in which
+            case the request must not be sent
+        """
+        limiter = self._get_rate_limiter()
+        requests_per_minute, tokens_per_minute = self._rate_limits(api_name)
+        if not limiter or not (requests_per_minute or tokens_per_minute):
+            return True
+        
+        from utils.rate_limiter import limiter_key
+        max_wait = self.config_manager.get_rate_limit_config().get("max_wait", 60)
+        try:
+            wait = limiter.reserve(limiter_key(api_name, client.api_key), requests_per_minute,
+                                   tokens_per_minute, tokens, max_wait)
+        except Exception:
+            # A broken limiter must not stop requests
+            return True
+        
+        if wait is None:
+            print(f"Error: Local {api_name} rate limit would hold the request for more than {max_wait:g}s")
+            return False
+        if wait > 0:
+            self._throttled["throttled"] += 1
+            self._throttled["throttle_seconds"] += wait
+            call = self.last_call
+            call["throttle_seconds"] = call.get("throttle_seconds", 0.0) + wait
+            await asyncio.sleep(wait)
+        return True
+    
+    def _get_similarity_cache(self):
+        """Get the similarity cache, or None if it is disabled or unavailable."""
+        if self._similarity is not None:
+            return self._similarity or None
+        
+        similarity_config = self.config_manager.get_cache_config().get("similarity", {})
+        self._similarity = False
+        if not similarity_config.get("enabled", False):
+            return None
+        
+        try:
+            from utils.similarity_cache import SimilarityCache
+            self._similarity = SimilarityCache(
+                self.config_manager.config_dir,
+                max_entries=similarity_config.get("max_entries", 10000),
+                dimensions=similarity_config.get("dimensions", 256)
+            )
+        except Exception as e:
+            print(f"Warning: Similarity cache unavailable: {e}", file=sys.stderr)
+            return None
+        
+        return self._similarity
+    
+    def _lookup_similar(self, query: str, system_context: str, api_name: str) -> Optional[str]:
+        """
+        Look up the command of a near-duplicate past query.
+        
+        Returns:
+            Cached command or None if no past query is similar enough
+        """
+        similarity = self._get_similarity_cache()
+        if not similarity:
+            return None
+        
+        threshold = self.config_manager.get_cache_config().get("similarity", {}).get("threshold", 0.7)
+        try:
+            # The key of an empty query covers everything but the query itself
+            match = similarity.lookup(query, self._cache_key("", system_context, api_name), threshold)
+        except Exception:
+            return None
+        
+        if not match:
+            return None
+        
+        command, score = match
+        self.last_call.update({"cache": "similar", "similarity": score})
+        return command
+    
+    def _index_similar(self, query: str, system_context: str, api_name: str, command: str):
+        """Add a freshly generated command to the similarity cache."""
+        similarity = self._get_similarity_cache()
+        if not similarity:
+            return
+        
+        try:
+            similarity.add(query, self._cache_key("", system_context, api_name), command)
+        except Exception:
+            pass
+    
+    def _spawn_refresh(self, query: str, api_name: str):
+        """Regenerate a cached answer in a detached tinycode process that keeps out of the history."""
+        import subprocess
+        
+        src_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        python_path = os.pathsep.join(filter(None, [src_dir, os.environ.get("PYTHONPATH")]))
+        env = {**os.environ, "PYTHONPATH": python_path, "TINYCODE_NO_DAEMON": "1"}
+        
+        subprocess.Popen(
+            [sys.executable, "-m", "core.tinycode", "--refresh", "--no-history", f"--{api_name}", query],
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            start_new_session=True,
+            env=env
+        )
+    
+    async def _try_api(self, api_name: str, query: str, system_context: str,
+                       on_text: Optional[Callable[[str], None]] = None) -> Optional[str]:
+        """
+        Try to generate command using specified API.
+        
+        Args:
+            api_name: Name of the API to use
+            query: User's query
+            system_context: System information context
+            on_text: Stream the answer to this callback
+        
+        Returns:
+            Generated command or None if failed
+        """
+        stream = {"on_text": on_text} if on_text else {}
+        budget = self.get_output_budget(api_name)
+        try:
+            return await self._with_key(
+                api_name, lambda client: client.estimate_tokens(query, system_context, budget=budget),
+                lambda client: self._send_recorded(
+                    api_name, client.generate_command(query, system_context, budget=budget, **stream)
+                )
+            )
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"Error with {api_name} API: {e}")
+            return None
+    
+    async def _send_recorded(self, api_name: str, request: Awaitable[T], queries: int = 1) -> T:
+        """
+        Await a provider request and record it for adaptive selection and in the usage ledger.
+        
+        The retries of a single-query request are added to last_call, with
+        the input tokens it was billed and those read from the prompt cache,
+        and the length of its answer is recorded for output budgets.
+        
+        Args:
+            api_name: Name of the API the request goes to
+            request: The client call
+            queries: Queries packed into the request
+        
+        Returns:
+            Result of the request; an empty result counts as failed
+        """
+        started = time.perf_counter()
+        with collect_usage() as usage, collect_retries() as retries:
+            try:
+                result = await request
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                self._record_request(api_name, False, started, usage, retries["retries"], queries)
+                raise
+            finally:
+                call = self.last_call
+                if queries == 1 and retries["retries"]:
+                    call["retries"] = call.get("retries", 0) + retries["retries"]
+                    call["backoff_seconds"] = call.get("backoff_seconds", 0.0) + retries["backoff_seconds"]
+                if queries == 1 and usage["input_tokens"] is not None:
+                    call.update(input_tokens=usage["input_tokens"], cache_read_tokens=usage["cache_read_tokens"])
+        
+        ok = any(result) if isinstance(result, list) else bool(result)
+        self._record_request(api_name, ok, started, usage, retries["retries"], queries)
+        if ok and queries == 1:
+            self._record_answer_length(api_name, result, usage["output_tokens"])
+        return result
+    
+    def _record_answer_length(self, api_name: str, command: str, output_tokens: Optional[int]):
+        """Record the length of an answer, estimated if the provider did not report it."""
+        lengths = self._get_answer_lengths()
+        if lengths:
+            try:
+                from utils.answer_lengths import estimate_answer_tokens
+                lengths.record(api_name, self.get_model(api_name), output_tokens or estimate_answer_tokens(command))
+            except Exception:
+                pass
+    
+    def _record_request(self, api_name: str, ok: bool, started: float, usage: Dict[str, Any],
+                        retries: int, queries: int):
+        """Record a finished provider request in the provider statistics and the usage ledger."""
+        latency = time.perf_counter() - started
+        if queries == 1:
+            stats = self._get_provider_stats()
+            if stats:
+                try:
+                    stats.record(api_name, self.get_model(api_name), latency if ok else None)
+                except Exception:
+                    pass
+        
+        first_byte = usage["first_byte"]
+        self._record_ledger(api_name, ok, started,
+                            ttfb_ms=(first_byte - started) * 1000 if first_byte else None,
+                            input_tokens=usage["input_tokens"], output_tokens=usage["output_tokens"],
+                            cache_read_tokens=usage["cache_read_tokens"], retries=retries, queries=queries)
+    
+    def _record_ledger(self, api_name: str, ok: bool, started: float, **details):
+        """Append a provider request or cache answer to the usage ledger, if it is enabled."""
+        ledger = self._get_ledger()
+        if ledger:
+            try:
+                ledger.record(api_name, self.get_model(api_name), ok,
+                              (time.perf_counter() - started) * 1000, **details)
+            except Exception:
+                pass
+    
+    def _get_ledger(self):
+        """Get the usage ledger, or None if it is disabled or unavailable."""
+        if self._ledger is not None:
+            return self._ledger or None
+        
+        self._ledger = False
+        ledger_config = self.config_manager.get_ledger_config()
+        if not ledger_config.get("enabled", True):
+            return None
+        
+        try:
+            from utils.ledger import Ledger
+            self._ledger = Ledger(self.config_manager.config_dir / "ledger.db",
+                                  retention_days=ledger_config.get("retention_days", 90))
+        except Exception as e:
+            print(f"Warning: Usage ledger unavailable: {e}", file=sys.stderr)
+            return None
+        
+        return self._ledger
+    
+    async def _with_key(self, api_name: str, estimate_tokens: Callable[[Any], int],
+                        send: Callable[[Any], Awaitable[T]]) -> Optional[T]:
+        """
+        Send a request with a key from the API's pool.
+        
+        A key the provider rate limits cools off and the request moves on
+        to the next key, waiting only if every key is cooling off; a key
+        the provider rejects is dropped. With a single key, the client's
+        own retries handle rate limits as usual.
+        
+        Args:
+            api_name: Name of the API
+            estimate_tokens: Tokens the request is expected to use, given
+                the client it goes to
+            send: Sends the request with the given client
+        
+        Returns:
+            Result of send, or None if no key could take the request
+        """
+        await self.wait_for_warmup(api_name)
+        pool = self._get_pool(api_name)
+        policy = RetryPolicy.from_config(self.config_manager.get_retry_config())
+        quota_left = self._quota_left(api_name)
+        
+        for _ in range(len(pool.keys) + policy.max_attempts):
+            api_key, wait = pool.acquire(quota_left)
+            if not api_key:
+                if pool.dropped:
+                    print(f"Error: Every {api_name} API key was rejected")
+                return None
+            
+            try:
+                if wait > policy.max_retry_after:
+                    break
+                if wait:
+                    await asyncio.sleep(wait)
+                client = await self.get_client(api_name, api_key)
+                if not client or not await self._throttle(api_name, client, estimate_tokens(client)):
+                    return None
+                return await send(client)
+            except RateLimitError as e:
+                pool.cool_down(api_key, parse_retry_after(e.headers))
+            except AuthenticationError:
+                pool.drop(api_key)
+                print(f"Warning: {api_name} API key ending in {api_key[-4:]} was rejected and is no longer used",
+                      file=sys.stderr)
+            finally:
+                pool.release(api_key)
+        
+        print(f"Error: {api_name} API rate limit exceeded on every key")
+        return None
+    
+    async def generate_batch(self, items: Iterable[Dict[str, Any]], system_context: str = "",
+                             concurrency: int = 8, use_cache: bool = True,
+                             refresh: bool = False, pack_size: int = 1) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Generate commands for many queries, a bounded number at a time.
+        
+        The requests share the clients and their connections. Stale cache
+        entries are regenerated rather than served, since a batch would
+        otherwise start one background refresh per entry.
+        
+        Args:
+            items: Dicts with a 'query' and optionally an 'api' to prefer;
+                other keys are passed through to the results
+            system_context: System information context
+            concurrency: Maximum number of requests in flight
+            use_cache: Read and write the response cache
+            refresh: Skip the cache lookup but store the new answers
+            pack_size: Queries sent per request; above 1, consecutive items
+                for the same API are packed into one numbered request
+        
+        Yields:
+            Each item, in completion order, with 'command' (None on
+            failure), 'api', 'model', 'cache', 'retries' and 'latency_ms' added
+            ('packed' too if its command came from a packed request)
+        """
+        groups = self._group_items(items, pack_size)
+        pending = set()
+        try:
+            while True:
+                for group in groups:
+                    if len(group) == 1:
+                        coroutine = self._generate_item(group[0], system_context, use_cache, refresh)
+                    else:
+                        coroutine = self._generate_pack(group, system_context, use_cache, refresh)
+                    pending.add(asyncio.ensure_future(coroutine))
+                    if len(pending) >= concurrency:
+                        break
+                if not pending:
+                    return
+                
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    result = task.result()
+                    if isinstance(result, list):
+                        for item_result in result:
+                            yield item_result
+                    else:
+                        yield result
+        finally:
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.wait(pending)
+    
+    @staticmethod
+    def _group_items(items: Iterable[Dict[str, Any]], size: int) -> Iterator[List[Dict[str, Any]]]:
+        """Split items into runs of at most size consecutive items preferring the same API."""
+        group: List[Dict[str, Any]] = []
+        for item in items:
+            if group and (len(group) >= size or item.get("api") != group[0].get("api")):
+                yield group
+                group = []
+            group.append(item)
+        if group:
+            yield group
+    
+    async def _generate_pack(self, items: List[Dict[str, Any]], system_context: str,
+                             use_cache: bool, refresh: bool) -> List[Dict[str, Any]]:
+        """
+        Generate the commands of several batch items with one packed request.
+        
+        Fresh cache hits are answered directly. Items the packed reply has
+        no usable answer for, or all of them if the request fails, fall
+        back to one regular request each.
+        
+        Returns:
+            Results of the items, in the form generate_batch yields them
+        """
+        started = time.perf_counter()
+        api = self.select_api(items[0].get("api"))
+        if not api:
+            print("Error: No API keys configured. Use --set-api-key to configure.")
+            return [self._item_result(item, None, {}, started) for item in items]
+        
+        model = self.get_model(api)
+        cache = self._get_cache() if use_cache else None
+        results: Dict[int, Dict[str, Any]] = {}
+        
+        # Only fresh exact hits: anything else goes into the pack
+        if cache and not refresh:
+            for index, item in enumerate(items):
+                try:
+                    entry = cache.get(self._cache_key(item["query"], system_context, api))
+                except Exception:
+                    entry = None
+                if entry and entry["fresh"]:
+                    call = {"api": api, "model": model, "cache": "hit"}
+                    results[index] = self._item_result(item, entry["command"], call, started)
+        
+        missing = [index for index in range(len(items)) if index not in results]
+        commands: List[Optional[str]] = [None] * len(missing)
+        if len(missing) > 1:
+            queries = [items[index]["query"] for index in missing]
+            budget = self.get_output_budget(api)
+            try:
+                commands = await self._with_key(
+                    api, lambda client: client.estimate_tokens("\n".join(queries), system_context, len(queries),
+                                                               budget),
+                    lambda client: self._send_recorded(api, client.generate_commands(queries, system_context, budget),
+                                                       len(queries))
+                ) or commands
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Error with {api} API: {e}")
+        
+        fallback = []
+        for index, command in zip(missing, commands):
+            if not command:
+                fallback.append(index)
+                continue
+            item = items[index]
+            call = {"api": api, "model": model, "cache": "miss" if cache else None}
+            results[index] = {**self._item_result(item, command, call, started), "packed": True}
+            if cache:
+                try:
+                    cache.put(self._cache_key(item["query"], system_context, api), command, api, model)
+                except Exception:
+                    pass
+                self._index_similar(item["query"], system_context, api, command)
+        
+        if fallback:
+            retried = await asyncio.gather(*(
+                self._generate_item(items[index], system_context, use_cache, refresh) for index in fallback
+            ))
+            results.update(zip(fallback, retried))
+        
+        return [results[index] for index in range(len(items))]
+    
+    async def _generate_item(self, item: Dict[str, Any], system_context: str,
+                             use_cache: bool, refresh: bool) -> Dict[str, Any]:
+        """Generate the command of one batch item; runs as its own task."""
+        started = time.perf_counter()
+        command = await self.generate_command(
+            item["query"], system_context, item.get("api"),
+            use_cache=use_cache, refresh=refresh, allow_stale=False
+        )
+        return self._item_result(item, command, self.last_call, started)
+    
+    @staticmethod
+    def _item_result(item: Dict[str, Any], command: Optional[str], call: Dict[str, Any],
+                     started: float) -> Dict[str, Any]:
+        """Build the result of a batch item from how its command was obtained."""
+        return {
+            **item,
+            "command": command,
+            "api": call.get("api"),
+            "model": call.get("model"),
+            "cache": call.get("cache"),
+            "retries": call.get("retries", 0),
+            "latency_ms": round((time.perf_counter() - started) * 1000, 1)
+        }
+    
+    def get_usage(self) -> Dict[str, int]:
+        """
+        Requests sent, tokens reported, retries and local rate limit waits so far.
+        
+        Returns:
+            Dict with 'requests', 'input_tokens', 'output_tokens', 'retries',
+            'backoff_seconds', 'truncated' (answers asked again after
+            hitting their output budget), 'throttled' and 'throttle_seconds'
+        """
+        usage = {"requests": 0, "input_tokens": 0, "output_tokens": 0, "retries": 0, "backoff_seconds": 0.0,
+                 "truncated": 0, **self._throttled}
+        for future in self._clients.values():
+            client = future.result() if future.done() and not future.exception() else None
+            for key, value in getattr(client, "usage", {}).items():
+                usage[key] = usage.get(key, 0) + value
+        return usage
+    
+    async def submit_batch(self, api_name: str, queries: Dict[str, str], system_context: str = "") -> str:
+        """
+        Submit queries to the provider's offline batch endpoint.
+        
+        Args:
+            api_name: Name of the API to submit to
+            queries: Queries by custom ID
+            system_context: System information context
+        
+        Returns:
+            Provider ID of the batch
+        
+        Raises:
+            APIError: If the API has no key or the submission failed
+        """
+        client = await self._get_batch_client(api_name)
+        return await client.submit_batch(queries, system_context)
+    
+    async def get_batch_status(self, api_name: str, batch_id: str) -> Dict[str, Any]:
+        """Poll an offline batch (see the clients' get_batch_status)."""
+        client = await self._get_batch_client(api_name)
+        return await client.get_batch_status(batch_id)
+    
+    async def get_batch_results(self, api_name: str, batch_id: str) -> Dict[str, Optional[str]]:
+        """Download the commands of an ended offline batch, by custom ID."""
+        client = await self._get_batch_client(api_name)
+        return await client.get_batch_results(batch_id)
+    
+    async def _get_batch_client(self, api_name: str):
+        """
+        Get the client for an offline batch call, which needs a configured key.
+        
+        Offline batches always use the primary key: a provider batch can
+        only be polled and downloaded with a key of the account that
+        submitted it.
+        """
+        client = await self.get_client(api_name)
+        if not client:
+            raise APIError(f"No API key configured for {api_name}")
+        return client
+    
+    async def test_apis(self) -> Dict[str, bool]:
+        """
+        Test all available APIs concurrently.
+        
+        Returns:
+            Dictionary mapping API names to test results
+        """
+        apis = self.get_available_apis()
+        results = await asyncio.gather(*(self._test_api(api_name) for api_name in apis))
+        return dict(zip(apis, results))
+    
+    async def _test_api(self, api_name: str) -> bool:
+        """Test one API's connection."""
+        try:
+            client = await self.get_client(api_name)
+            return await client.test_connection()
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            return False
+
+
+if __name__ == "__main__":
+    # Test the async API manager
+    from utils.config import ConfigManager
+    
+    async def main():
+        manager = AsyncAPIManager(ConfigManager())
+        print("Available APIs:", manager.get_available_apis())
+        print("API Test Results:", await manager.test_apis())
+    
+    asyncio.run(main())
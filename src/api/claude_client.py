@@ -5,15 +5,47 @@ Handles Anthropic Claude API calls for command generation.
 """
 
 import os
-import time
-from typing import Dict, Any, Optional
-import anthropic
+import json
+import socket
+import asyncio
+from typing import Dict, Any, AsyncIterator, Callable, List, Optional, Tuple
+from urllib.parse import urlsplit
 
+from .transport import (APIError, APITimeoutError, AuthenticationError, RateLimitError,
+                        HTTPSettings, LeanTransport)
+from .retry import RetryPolicy, call_with_retries
+from .usage import mark_first_byte, record_tokens
+from .streaming import LANGUAGE_TAGS, stream_first_line
+from .prompts import build_system_prompt, prefix_cacheable
+from .packing import PACKED_INSTRUCTIONS, ANSWER_NUMBER_TOKENS, format_packed_queries, parse_packed_answers
+from .event_loop import run_sync
 
-class ClaudeClient:
-    """Claude API client for command generation."""
+
+DEFAULT_BASE_URL = "https://api.anthropic.com"
+ANTHROPIC_VERSION = "2023-06-01"
+
+# Timeout for Message Batches calls, which send and receive whole batches
+BATCH_TIMEOUT = 300.0
+
+# Stop sequences of live requests. Anthropic rejects whitespace-only ones,
+# so unlike OpenAI the end of the first line cannot be one; the stream is
+# closed there instead
+STOP_SEQUENCES = ["```"]
+
+
+class AsyncClaudeClient:
+    """
+    Claude API client for command generation, on asyncio.
     
-    def __init__(self, api_key: str, model: str = "claude-3-sonnet-20240229", max_tokens: int = 100):
+    Cancelling the task awaiting a request aborts it: the connection is
+    closed, so the provider stops generating as well.
+    """
+    
+    def __init__(self, api_key: str, model: str = "claude-3-sonnet-20240229", max_tokens: int = 100,
+                 transport: str = "sdk", base_url: Optional[str] = None,
+                 http: Optional[HTTPSettings] = None, retry: Optional[RetryPolicy] = None,
+                 raise_key_errors: bool = False, http_client=None, prompt_cache: bool = True,
+                 stop_sequences: bool = True):
         """
         Initialize Claude client.
         
@@ -21,80 +53,511 @@ class ClaudeClient:
             api_key: Anthropic API key
             model: Model to use for generation
             max_tokens: Maximum tokens for response
+            transport: 'sdk' to use the anthropic package, 'lean' for the built-in HTTP client
+            base_url: Override for the API base URL
+            http: Timeouts, connection pooling and proxy (default:
+                HTTPSettings()); its total timeout limits each attempt of
+                a request
+            retry: Retry policy for failed requests (default: RetryPolicy())
+            raise_key_errors: Let generate_command raise AuthenticationError
+                and RateLimitError instead of reporting them, so that a
+                key pool can switch keys
+            http_client: httpx.AsyncClient for the SDK transport, shared
+                with other clients; by default one is built from http
+            prompt_cache: Mark the stable prefix of the system prompt for
+                Anthropic's prompt cache, if the model caches a prefix that
+                short; otherwise the few-shot examples are left out
+            stop_sequences: Stop live single-query requests at a code fence
         """
         self.api_key = api_key
         self.model = model
         self.max_tokens = max_tokens
-        self.client = anthropic.Anthropic(api_key=api_key)
+        self.http = http or HTTPSettings()
+        self.timeout = self.http.total_timeout
+        self.base_url = base_url or DEFAULT_BASE_URL
+        self.retry = retry or RetryPolicy()
+        self.raise_key_errors = raise_key_errors
+        self.prompt_cache = prompt_cache
+        self.stop_sequences = stop_sequences
+        # The few-shot examples only pay for themselves when they are cached
+        self.few_shot = prompt_cache and prefix_cacheable(model)
+        self.client = None
+        self.transport = None
+        self._batch_transport = None
+        # Requests sent, tokens reported by the API and retries, for statistics
+        self.usage = {"requests": 0, "input_tokens": 0, "output_tokens": 0, "cache_read_tokens": 0,
+                      "retries": 0, "backoff_seconds": 0.0, "truncated": 0}
+        
+        if transport == "lean":
+            self.transport = self._create_transport()
+        else:
+            import anthropic
+            # Retries follow self.retry rather than the SDK's own policy
+            self.client = anthropic.AsyncAnthropic(
+                api_key=api_key, base_url=base_url, timeout=self.http.sdk_timeout(), max_retries=0,
+                http_client=http_client or self.http.create_client()
+            )
     
-    def generate_command(self, query: str, system_context: str = "") -> Optional[str]:
+    async def generate_command(self, query: str, system_context: str = "",
+                               on_text: Optional[Callable[[str], None]] = None,
+                               budget: Optional[int] = None) -> Optional[str]:
         """
         Generate a command using Claude API.
         
+        Transient failures are retried according to the retry policy; a
+        streamed request only until part of the command has been shown.
+        
         Args:
             query: User's query
             system_context: System information context
+            on_text: Stream the message, calling this with the command as
+                it arrives; the stream is closed after the first line
+            budget: max_tokens for the request, if below the client's; an
+                answer cut short by it or by a stop sequence is asked
+                again with max_tokens and no stop sequences
             
         Returns:
             Generated command or None if failed
+        
+        Raises:
+            asyncio.CancelledError: If the request was cancelled
+            AuthenticationError, RateLimitError: With raise_key_errors
         """
+        streamed = False
+        
+        def show(preview: str):
+            nonlocal streamed
+            streamed = True
+            on_text(preview)
+        
         try:
-            # Build system prompt
-            system_prompt = self._build_system_prompt(system_context)
-            
-            # Make API call
-            response = self.client.messages.create(
-                model=self.model,
-                max_tokens=self.max_tokens,
-                system=system_prompt,
-                messages=[
-                    {"role": "user", "content": query}
-                ]
+            return await call_with_retries(
+                lambda: self._generate(query, system_context, show if on_text else None, budget),
+                self.retry, self.usage, can_retry=lambda: not streamed
             )
-            
-            # Extract and clean response
-            if response.content and len(response.content) > 0:
-                command = response.content[0].text.strip()
-                return self._clean_command(command)
-            
+        except asyncio.CancelledError:
+            raise
+        except asyncio.TimeoutError:
+            print(f"Error: Claude API request timed out after {self.timeout:g}s")
             return None
-            
-        except anthropic.AuthenticationError:
+        except AuthenticationError:
+            if self.raise_key_errors:
+                raise
             print("Error: Invalid Claude API key")
             return None
-        except anthropic.RateLimitError:
+        except RateLimitError:
+            if self.raise_key_errors:
+                raise
             print("Error: Claude API rate limit exceeded")
             return None
-        except anthropic.APIError as e:
+        except APIError as e:
             print(f"Error: Claude API error: {e}")
             return None
         except Exception as e:
             print(f"Error: Unexpected error with Claude API: {e}")
             return None
     
-    def _build_system_prompt(self, system_context: str) -> str:
+    async def _generate(self, query: str, system_context: str, on_text: Optional[Callable[[str], None]],
+                        budget: Optional[int] = None) -> Optional[str]:
+        """
+        Build the request and send it, streamed or not; errors are left to the caller.
+        
+        The governed request and the re-ask without limits each get the
+        full client timeout.
+        """
+        params = self._request_params(query, system_context)
+        governed = dict(params, max_tokens=min(budget or self.max_tokens, self.max_tokens))
+        if self.stop_sequences:
+            governed["stop_sequences"] = STOP_SEQUENCES
+        
+        command, cut_short = await asyncio.wait_for(self._generate_once(governed, on_text), self.timeout)
+        if cut_short and governed != params:
+            # Truncated by the budget, or stopped before the command began
+            # (a leading fence): ask again without limits
+            self.usage["truncated"] += 1
+            command, _ = await asyncio.wait_for(self._generate_once(params, on_text), self.timeout)
+        return command
+    
+    async def _generate_once(self, params: Dict[str, Any],
+                             on_text: Optional[Callable[[str], None]]) -> Tuple[Optional[str], bool]:
         """
-        Build system prompt with context.
+        Send one request, streamed or not.
+        
+        Returns:
+            Tuple of the cleaned command and whether the answer was cut
+            short: truncated by max_tokens, or empty
+        """
+        outcome = {"truncated": False}
+        if on_text:
+            command = await stream_first_line(self._stream_message(outcome=outcome, **params),
+                                              self._clean_command, on_text)
+        else:
+            text = await self._create_message(outcome=outcome, **params)
+            command = self._clean_command(text.strip()) if text is not None else None
+        return command, outcome["truncated"] or not command
+    
+    def _request_params(self, query: str, system_context: str) -> Dict[str, Any]:
+        """Messages API parameters for a query, shared by live and batch requests."""
+        return dict(
+            max_tokens=self.max_tokens,
+            system=self._system_blocks(system_context),
+            messages=[
+                {"role": "user", "content": query}
+            ]
+        )
+    
+    def _create_transport(self) -> LeanTransport:
+        """Build a lean transport for this client's API key and base URL."""
+        return LeanTransport(
+            self.base_url,
+            headers={"x-api-key": self.api_key, "anthropic-version": ANTHROPIC_VERSION},
+            settings=self.http
+        )
+    
+    async def _create_message(self, outcome: Optional[Dict[str, Any]] = None, **params) -> Optional[str]:
+        """
+        Send a messages request through the configured transport.
         
         Args:
+            outcome: Dict whose 'truncated' is set if the answer hit max_tokens
+            **params: Messages API parameters (max_tokens, system, messages, ...)
+        
+        Returns:
+            Text of the first content block, or None if the response has none
+        
+        Raises:
+            APIError: On any API failure, classified the same way for both transports
+        """
+        if self.transport:
+            data = await self.transport.post_json("/v1/messages", {"model": self.model, **params})
+            self._record_usage(*self._usage_tokens(data.get("usage") or {}))
+            if outcome is not None and data.get("stop_reason") == "max_tokens":
+                outcome["truncated"] = True
+            content = data.get("content") or []
+            if content:
+                return content[0].get("text") or ""
+            return None
+        
+        import anthropic
+        try:
+            response = await self.client.messages.create(model=self.model, **params)
+        except anthropic.AuthenticationError as e:
+            raise AuthenticationError.from_exception(e) from e
+        except anthropic.RateLimitError as e:
+            raise RateLimitError.from_exception(e) from e
+        except anthropic.APITimeoutError as e:
+            raise APITimeoutError.from_exception(e) from e
+        except anthropic.APIError as e:
+            raise APIError.from_exception(e) from e
+        
+        self._record_usage(*self._usage_tokens(response.usage))
+        if outcome is not None and response.stop_reason == "max_tokens":
+            outcome["truncated"] = True
+        if response.content and len(response.content) > 0:
+            return response.content[0].text
+        return None
+    
+    async def _stream_message(self, outcome: Optional[Dict[str, Any]] = None, **params) -> AsyncIterator[str]:
+        """
+        Stream a messages request through the configured transport.
+        
+        The output tokens reported by the final message_delta event are
+        recorded; when the caller closes the stream before it arrives
+        (after the first line), they are estimated from the text received.
+        
+        Args:
+            outcome: Dict whose 'truncated' is set if the stream ends at max_tokens
+            **params: Messages API parameters (max_tokens, system, messages, ...)
+        
+        Yields:
+            Text deltas of the message
+        
+        Raises:
+            APIError: On any API failure, classified the same way for both transports
+        """
+        self._record_usage()
+        reported = {"output_tokens": None}
+        text = ""
+        deltas = self._stream_deltas(outcome, reported, **params)
+        try:
+            async for delta in deltas:
+                text += delta
+                yield delta
+        finally:
+            await deltas.aclose()
+            if reported["output_tokens"] is not None:
+                self._record_usage(output_tokens=reported["output_tokens"], request=False)
+            elif text:
+                self._record_usage(output_tokens=max(1, len(text) // 4), request=False)
+    
+    async def _stream_deltas(self, outcome: Optional[Dict[str, Any]], reported: Dict[str, Any],
+                             **params) -> AsyncIterator[str]:
+        """Stream the text deltas, recording the input tokens and storing reported['output_tokens']."""
+        if self.transport:
+            events = self.transport.stream_json(
+                "/v1/messages", {"model": self.model, "stream": True, **params}
+            )
+            try:
+                async for event in events:
+                    if event.get("type") == "error":
+                        error = event.get("error") or {}
+                        raise APIError(f"Stream error: {error.get('message', error)}")
+                    if event.get("type") == "message_start":
+                        usage = (event.get("message") or {}).get("usage") or {}
+                        input_tokens, _, cache_read_tokens = self._usage_tokens(usage)
+                        self._record_usage(input_tokens, cache_read_tokens=cache_read_tokens, request=False)
+                    if event.get("type") == "message_delta":
+                        reported["output_tokens"] = (event.get("usage") or {}).get("output_tokens")
+                        if outcome is not None and (event.get("delta") or {}).get("stop_reason") == "max_tokens":
+                            outcome["truncated"] = True
+                    if event.get("type") == "content_block_delta":
+                        text = (event.get("delta") or {}).get("text")
+                        if text:
+                            yield text
+            finally:
+                await events.aclose()
+            return
+        
+        import anthropic
+        try:
+            stream = await self.client.messages.create(model=self.model, stream=True, **params)
+            try:
+                async for event in stream:
+                    mark_first_byte()
+                    if event.type == "message_start":
+                        input_tokens, _, cache_read_tokens = self._usage_tokens(event.message.usage)
+                        self._record_usage(input_tokens, cache_read_tokens=cache_read_tokens, request=False)
+                    if event.type == "message_delta":
+                        reported["output_tokens"] = getattr(event.usage, "output_tokens", None)
+                        if outcome is not None and getattr(event.delta, "stop_reason", None) == "max_tokens":
+                            outcome["truncated"] = True
+                    if event.type == "content_block_delta" and getattr(event.delta, "text", None):
+                        yield event.delta.text
+            finally:
+                await stream.response.aclose()
+        except anthropic.AuthenticationError as e:
+            raise AuthenticationError.from_exception(e) from e
+        except anthropic.RateLimitError as e:
+            raise RateLimitError.from_exception(e) from e
+        except anthropic.APITimeoutError as e:
+            raise APITimeoutError.from_exception(e) from e
+        except anthropic.APIError as e:
+            raise APIError.from_exception(e) from e
+    
+    async def generate_commands(self, queries: List[str], system_context: str = "",
+                                budget: Optional[int] = None) -> List[Optional[str]]:
+        """
+        Generate commands for several queries with one packed request.
+        
+        Args:
+            queries: User queries
             system_context: System information context
-            
+            budget: max_tokens per answer, if below the client's; a reply
+                truncated by it is asked again with max_tokens per answer
+        
         Returns:
-            Formatted system prompt
+            Command per query, None where the reply had no usable answer
+        
+        Raises:
+            APIError: If the request failed
+            asyncio.TimeoutError: If an attempt took longer than the client timeout
         """
-        base_prompt = """You are a command-line expert for Linux systems. Generate ONLY a single command line that solves the user's request. Do not include explanations, markdown formatting, or multiple commands. Return only the executable command suitable for the user's system.
-
-Important rules:
-1. Return ONLY the command, no explanations
-2. No markdown formatting (no backticks, no code blocks)
-3. No multiple commands separated by semicolons or newlines
-4. Ensure the command is safe and appropriate for the user's system
-5. Use the appropriate package manager and tools for their distribution"""
-
-        if system_context:
-            base_prompt += f"\n\nSystem Information: {system_context}"
+        params = dict(
+            max_tokens=self.max_tokens * len(queries),
+            system=self._system_blocks(system_context, PACKED_INSTRUCTIONS),
+            messages=[
+                {"role": "user", "content": format_packed_queries(queries)}
+            ]
+        )
+        if budget and budget < self.max_tokens:
+            outcome = {"truncated": False}
+            governed = dict(params, max_tokens=min(budget + ANSWER_NUMBER_TOKENS, self.max_tokens) * len(queries))
+            text = await call_with_retries(
+                lambda: asyncio.wait_for(self._create_message(outcome=outcome, **governed), self.timeout),
+                self.retry, self.usage
+            )
+            if not outcome["truncated"]:
+                return parse_packed_answers(text or "", len(queries), self._clean_command)
+            self.usage["truncated"] += 1
+        
+        text = await call_with_retries(
+            lambda: asyncio.wait_for(self._create_message(**params), self.timeout), self.retry, self.usage
+        )
+        return parse_packed_answers(text or "", len(queries), self._clean_command)
+    
+    def _get_batch_transport(self) -> LeanTransport:
+        """
+        The transport used for Message Batches.
+        
+        The batch endpoints always go through the lean transport; with the
+        SDK transport configured, a separate lean one is created for them.
+        """
+        if self.transport:
+            return self.transport
+        if self._batch_transport is None:
+            self._batch_transport = self._create_transport()
+        return self._batch_transport
+    
+    async def submit_batch(self, queries: Dict[str, str], system_context: str = "") -> str:
+        """
+        Submit queries as a message batch.
+        
+        Each query becomes one messages request, with the same prompt
+        generate_command sends.
+        
+        Args:
+            queries: Queries by custom ID
+            system_context: System information context
+        
+        Returns:
+            ID of the created batch
+        
+        Raises:
+            APIError: If the batch could not be created
+        """
+        batch = await self._get_batch_transport().post_json("/v1/messages/batches", {
+            "requests": [
+                {"custom_id": custom_id,
+                 "params": {"model": self.model, **self._request_params(query, system_context)}}
+                for custom_id, query in queries.items()
+            ]
+        }, BATCH_TIMEOUT)
+        return batch["id"]
+    
+    async def get_batch_status(self, batch_id: str) -> Dict[str, Any]:
+        """
+        Poll a message batch.
+        
+        Args:
+            batch_id: ID returned by submit_batch
+        
+        Returns:
+            Dict with the provider's 'status', whether the batch has 'ended',
+            and the 'completed', 'failed' and 'total' request counts
+        
+        Raises:
+            APIError: If the batch could not be retrieved
+        """
+        batch = await self._get_batch_transport().get_json(f"/v1/messages/batches/{batch_id}", BATCH_TIMEOUT)
+        counts = batch.get("request_counts") or {}
+        failed = sum(counts.get(key, 0) for key in ("errored", "canceled", "expired"))
+        return {
+            "status": batch.get("processing_status"),
+            "ended": batch.get("processing_status") == "ended",
+            "completed": counts.get("succeeded", 0),
+            "failed": failed,
+            "total": counts.get("processing", 0) + counts.get("succeeded", 0) + failed
+        }
+    
+    async def get_batch_results(self, batch_id: str) -> Dict[str, Optional[str]]:
+        """
+        Download the results of an ended message batch.
+        
+        Args:
+            batch_id: ID returned by submit_batch
+        
+        Returns:
+            Cleaned command by custom ID, None for requests that did not succeed
+        
+        Raises:
+            APIError: If the results could not be retrieved
+        """
+        data = await self._get_batch_transport().request(
+            "GET", f"/v1/messages/batches/{batch_id}/results", timeout=BATCH_TIMEOUT
+        )
+        
+        results: Dict[str, Optional[str]] = {}
+        for line in data.decode("utf-8").splitlines():
+            if not line.strip():
+                continue
+            result = json.loads(line)
+            outcome = result.get("result") or {}
+            content = (outcome.get("message") or {}).get("content") or []
+            text = content[0].get("text") if outcome.get("type") == "succeeded" and content else None
+            results[result["custom_id"]] = (self._clean_command(text.strip()) or None) if text else None
+        return results
+    
+    def estimate_tokens(self, query: str, system_context: str = "", answers: int = 1,
+                        budget: Optional[int] = None) -> int:
+        """
+        Estimate the tokens a request counts against the provider's rate limits.
+        
+        Providers count the prompt and the max_tokens the request allows,
+        so this is about four characters per prompt token plus max_tokens
+        (or the budget) per answer.
+        
+        Args:
+            query: User's query (or the numbered queries of a packed request)
+            system_context: System information context
+            answers: Number of answers the request asks for
+            budget: Output token budget per answer, if below max_tokens
+        
+        Returns:
+            Estimated token count
+        """
+        prompt = "".join(build_system_prompt(system_context, self.few_shot)) + query
+        return len(prompt) // 4 + min(budget or self.max_tokens, self.max_tokens) * answers
+    
+    def _system_blocks(self, system_context: str, instructions: str = "") -> List[Dict[str, Any]]:
+        """
+        System prompt as content blocks, the stable prefix first.
+        
+        With prompt caching on, the prefix block carries a cache_control
+        breakpoint, so repeat requests within the cache lifetime read it
+        from Anthropic's prompt cache. Models whose minimum cacheable
+        prompt is longer than the prefix (Haiku) get no breakpoint, since
+        Anthropic would never cache it.
+        
+        Args:
+            system_context: System information context
+            instructions: Further instructions appended after the context
         
-        return base_prompt
+        Returns:
+            Text blocks for the system parameter
+        """
+        prefix, context = build_system_prompt(system_context, self.few_shot)
+        blocks = [{"type": "text", "text": prefix}]
+        if self.few_shot:
+            blocks[0]["cache_control"] = {"type": "ephemeral"}
+        if context + instructions:
+            blocks.append({"type": "text", "text": context + instructions})
+        return blocks
+    
+    @staticmethod
+    def _usage_tokens(usage) -> Tuple[Optional[int], Optional[int], Optional[int]]:
+        """
+        Read a usage report, from the JSON response or the SDK.
+        
+        Anthropic counts the prompt tokens read from and written to the
+        prompt cache apart from the other input tokens; they are added
+        back, so input tokens mean the whole prompt for both providers.
+        
+        Returns:
+            Tuple of the input tokens, the output tokens and the input
+            tokens read from the prompt cache
+        """
+        def get(name):
+            return usage.get(name) if isinstance(usage, dict) else getattr(usage, name, None)
+        
+        input_tokens, cache_read_tokens = get("input_tokens"), get("cache_read_input_tokens")
+        if input_tokens is not None:
+            input_tokens += (cache_read_tokens or 0) + (get("cache_creation_input_tokens") or 0)
+        return input_tokens, get("output_tokens"), cache_read_tokens
+    
+    def _record_usage(self, input_tokens: Optional[int] = None, output_tokens: Optional[int] = None,
+                      cache_read_tokens: Optional[int] = None, request: bool = True):
+        """
+        Count a request and the tokens the API reported for it.
+        
+        A stream reports its input tokens only after it was counted, so
+        those are added with request=False.
+        """
+        if request:
+            self.usage["requests"] += 1
+        self.usage["input_tokens"] += input_tokens or 0
+        self.usage["output_tokens"] += output_tokens or 0
+        self.usage["cache_read_tokens"] += cache_read_tokens or 0
+        record_tokens(input_tokens, output_tokens, cache_read_tokens)
     
     def _clean_command(self, command: str) -> str:
         """
@@ -116,17 +579,35 @@ Important rules:
         # Remove backticks
         command = command.strip('`')
         
+        # Remove a markdown language specifier on a line of its own (a
+        # command that merely starts with 'sh', like sha256sum, is kept)
+        lines = command.split('\n', 1)
+        if lines[0].strip() in LANGUAGE_TAGS:
+            command = lines[1] if len(lines) > 1 else ''
+        
         # Remove any trailing explanations
+        command = command.strip()
         if '\n' in command:
             command = command.split('\n')[0]
         
-        # Remove any markdown language specifiers
-        if command.startswith('bash') or command.startswith('sh'):
-            command = command[4:].strip()
-        
         return command.strip()
     
-    def test_connection(self) -> bool:
+    async def warm_up(self):
+        """
+        Prepare the connection ahead of the first request.
+        
+        The lean transport opens its connection (DNS, TCP and TLS); the SDK
+        manages its own connection pool, so only the DNS lookup is done.
+        """
+        if self.transport:
+            await self.transport.connect()
+            return
+        
+        host = urlsplit(str(self.client.base_url)).hostname
+        if host:
+            await asyncio.get_running_loop().getaddrinfo(host, 443, proto=socket.IPPROTO_TCP)
+    
+    async def test_connection(self) -> bool:
         """
         Test API connection.
         
@@ -134,16 +615,72 @@ Important rules:
             True if connection successful, False otherwise
         """
         try:
-            response = self.client.messages.create(
-                model=self.model,
+            await asyncio.wait_for(self._create_message(
                 max_tokens=10,
                 messages=[{"role": "user", "content": "echo hello"}]
-            )
+            ), 10)
             return True
+        except asyncio.CancelledError:
+            raise
         except Exception:
             return False
 
 
+class ClaudeClient:
+    """
+    Blocking Claude API client.
+    
+    Runs an AsyncClaudeClient on the shared background event loop, so
+    its connection stays open from one call to the next.
+    """
+    
+    def __init__(self, api_key: str, model: str = "claude-3-sonnet-20240229", max_tokens: int = 100,
+                 transport: str = "sdk", base_url: Optional[str] = None, timeout: float = 30.0,
+                 retry: Optional[RetryPolicy] = None):
+        """
+        Initialize Claude client.
+        
+        Args:
+            api_key: Anthropic API key
+            model: Model to use for generation
+            max_tokens: Maximum tokens for response
+            transport: 'sdk' to use the anthropic package, 'lean' for the built-in HTTP client
+            base_url: Override for the API base URL
+            timeout: Time limit in seconds for each attempt of a request
+            retry: Retry policy for failed requests (default: RetryPolicy())
+        """
+        self.async_client = AsyncClaudeClient(api_key, model, max_tokens, transport, base_url,
+                                              HTTPSettings(total_timeout=timeout), retry)
+    
+    def generate_command(self, query: str, system_context: str = "",
+                         on_text: Optional[Callable[[str], None]] = None) -> Optional[str]:
+        """
+        Generate a command using Claude API.
+        
+        Args:
+            query: User's query
+            system_context: System information context
+            on_text: Stream the message, calling this with the command as it arrives
+        
+        Returns:
+            Generated command or None if failed
+        """
+        return run_sync(self.async_client.generate_command(query, system_context, on_text))
+    
+    def warm_up(self):
+        """Prepare the connection ahead of the first request."""
+        run_sync(self.async_client.warm_up())
+    
+    def test_connection(self) -> bool:
+        """
+        Test API connection.
+        
+        Returns:
+            True if connection successful, False otherwise
+        """
+        return run_sync(self.async_client.test_connection())
+
+
 if __name__ == "__main__":
     # Test the Claude client
     api_key = os.getenv("ANTHROPIC_API_KEY")
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Background event loop for tinycode.
+Runs the asyncio API layer for blocking callers: one event loop per
+process, on a daemon thread, kept alive so that clients and their open
+connections are reused from one call to the next.
+"""
+
+import asyncio
+import threading
+import concurrent.futures
+from typing import Any, Awaitable, Optional
+
+
+class BackgroundLoop:
+    """An asyncio event loop running forever on a daemon thread."""
+    
+    def __init__(self):
+        """Create the loop and start its thread."""
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self._run, name="tinycode-event-loop", daemon=True)
+        self.thread.start()
+    
+    def _run(self):
+        """Thread body: run the loop until the process exits."""
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+    
+    def submit(self, coroutine: Awaitable) -> concurrent.futures.Future:
+        """
+        Schedule a coroutine on the loop.
+        
+        Args:
+            coroutine: Coroutine to run
+        
+        Returns:
+            Future for its result; cancelling it cancels the coroutine
+        """
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop)
+    
+    def call_soon(self, callback, *args):
+        """Call a plain function on the loop thread."""
+        self.loop.call_soon_threadsafe(callback, *args)
+    
+    def run(self, coroutine: Awaitable) -> Any:
+        """
+        Run a coroutine on the loop and wait for its result.
+        
+        Ctrl-C while waiting cancels the coroutine before re-raising.
+        
+        Args:
+            coroutine: Coroutine to run
+        
+        Returns:
+            The coroutine's result
+        
+        Raises:
+            concurrent.futures.CancelledError: If the coroutine was cancelled
+        """
+        future = self.submit(coroutine)
+        try:
+            return future.result()
+        except KeyboardInterrupt:
+            future.cancel()
+            raise
+
+
+_background_loop: Optional[BackgroundLoop] = None
+_background_loop_lock = threading.Lock()
+
+
+def get_background_loop() -> BackgroundLoop:
+    """Get the process-wide background loop, starting it on first use."""
+    global _background_loop
+    with _background_loop_lock:
+        if _background_loop is None:
+            _background_loop = BackgroundLoop()
+        return _background_loop
+
+
+def run_sync(coroutine: Awaitable) -> Any:
+    """
+    Run a coroutine on the background loop from blocking code.
+    
+    Args:
+        coroutine: Coroutine to run
+    
+    Returns:
+        The coroutine's result
+    """
+    return get_background_loop().run(coroutine)
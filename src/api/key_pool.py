@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+API key pool for tinycode.
+Spreads the requests to a provider over several API keys. Each request
+goes to the key with the most quota left (by the local rate limiter, when
+it applies) and the fewest requests in flight, rotating between equals.
+A key the provider rate limited sits out a cool-off period; a key it
+rejected is dropped for the rest of the process.
+"""
+
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+class KeyPool:
+    """The API keys of one provider and which of them can take a request."""
+    
+    def __init__(self, keys: List[str], cooldown: float = 30.0):
+        """
+        Initialize key pool.
+        
+        Args:
+            keys: API keys, the primary one first
+            cooldown: Seconds a rate-limited key sits out when the
+                provider does not say how long to wait
+        """
+        self.keys = list(dict.fromkeys(keys))
+        self.cooldown = cooldown
+        self.dropped: List[str] = []
+        self._in_flight = {key: 0 for key in self.keys}
+        self._last_used = {key: 0.0 for key in self.keys}
+        self._cooling_until: Dict[str, float] = {}
+    
+    @property
+    def live_keys(self) -> List[str]:
+        """Keys that have not been dropped."""
+        return [key for key in self.keys if key not in self.dropped]
+    
+    def acquire(self, quota_left: Optional[Callable[[str], float]] = None) -> Tuple[Optional[str], float]:
+        """
+        Pick the key for the next request and count it as in flight.
+        
+        Every key acquired must be released.
+        
+        Args:
+            quota_left: Share of a key's quota left, 1 for a full quota;
+                keys with more left are preferred
+        
+        Returns:
+            Tuple of the key (None if every key was dropped) and the
+            seconds to wait before using it, which is nonzero only when
+            every key is cooling off
+        """
+        keys = self.live_keys
+        if not keys:
+            return None, 0.0
+        
+        now = time.monotonic()
+        ready = [key for key in keys if self._cooling_until.get(key, 0.0) <= now]
+        if ready:
+            key = max(ready, key=lambda key: (quota_left(key) if quota_left else 1.0,
+                                              -self._in_flight[key], -self._last_used[key]))
+            wait = 0.0
+        else:
+            key = min(keys, key=lambda key: self._cooling_until[key])
+            wait = self._cooling_until[key] - now
+        
+        self._in_flight[key] += 1
+        self._last_used[key] = now + wait
+        return key, wait
+    
+    def release(self, key: str):
+        """Count a request acquired with this key as finished."""
+        self._in_flight[key] -= 1
+    
+    def cool_down(self, key: str, seconds: Optional[float] = None):
+        """
+        Take a key that hit the provider's rate limit out of rotation.
+        
+        Args:
+            key: API key
+            seconds: How long, if the provider said (Retry-After);
+                defaults to the pool's cool-off period
+        """
+        until = time.monotonic() + (self.cooldown if seconds is None else seconds)
+        self._cooling_until[key] = max(self._cooling_until.get(key, 0.0), until)
+    
+    def drop(self, key: str):
+        """Stop using a key the provider rejected."""
+        if key not in self.dropped:
+            self.dropped.append(key)
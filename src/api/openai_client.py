@@ -5,16 +5,48 @@ Handles ChatGPT API calls for command generation.
 """
 
 import os
-import time
-from typing import Dict, Any, Optional
-import openai
-from openai import OpenAI
+import json
+import uuid
+import socket
+import asyncio
+from typing import Dict, Any, AsyncIterator, Callable, List, Optional, Tuple
+from urllib.parse import urlsplit
 
+from .transport import (APIError, APITimeoutError, AuthenticationError, RateLimitError,
+                        HTTPSettings, LeanTransport)
+from .retry import RetryPolicy, call_with_retries
+from .usage import mark_first_byte, record_tokens
+from .streaming import LANGUAGE_TAGS, stream_first_line
+from .prompts import build_system_prompt, prefix_cacheable
+from .packing import PACKED_INSTRUCTIONS, ANSWER_NUMBER_TOKENS, format_packed_queries, parse_packed_answers
+from .event_loop import run_sync
 
-class OpenAIClient:
-    """OpenAI API client for command generation."""
+
+DEFAULT_BASE_URL = "https://api.openai.com/v1"
+
+# Batch API statuses after which a batch no longer changes
+BATCH_FINAL_STATUSES = ("completed", "failed", "expired", "cancelled")
+
+# Timeout for Batch API calls, which upload and download whole files
+BATCH_TIMEOUT = 300.0
+
+# Stop sequences of live requests: a code fence, and the end of the first
+# line, after which _clean_command discards everything anyway
+STOP_SEQUENCES = ["```", "\n"]
+
+
+class AsyncOpenAIClient:
+    """
+    OpenAI API client for command generation, on asyncio.
+    
+    Cancelling the task awaiting a request aborts it: the connection is
+    closed, so the provider stops generating as well.
+    """
     
-    def __init__(self, api_key: str, model: str = "gpt-3.5-turbo", max_tokens: int = 100):
+    def __init__(self, api_key: str, model: str = "gpt-3.5-turbo", max_tokens: int = 100,
+                 transport: str = "sdk", base_url: Optional[str] = None,
+                 http: Optional[HTTPSettings] = None, retry: Optional[RetryPolicy] = None,
+                 raise_key_errors: bool = False, http_client=None, stop_sequences: bool = True):
         """
         Initialize OpenAI client.
         
@@ -22,82 +54,512 @@ class OpenAIClient:
             api_key: OpenAI API key
             model: Model to use for generation
             max_tokens: Maximum tokens for response
+            transport: 'sdk' to use the openai package, 'lean' for the built-in HTTP client
+            base_url: Override for the API base URL
+            http: Timeouts, connection pooling and proxy (default:
+                HTTPSettings()); its total timeout limits each attempt of
+                a request
+            retry: Retry policy for failed requests (default: RetryPolicy())
+            raise_key_errors: Let generate_command raise AuthenticationError
+                and RateLimitError instead of reporting them, so that a
+                key pool can switch keys
+            http_client: httpx.AsyncClient for the SDK transport, shared
+                with other clients; by default one is built from http
+            stop_sequences: Stop live single-query requests at a code fence
+                or the end of the first line
         """
         self.api_key = api_key
         self.model = model
         self.max_tokens = max_tokens
-        self.client = OpenAI(api_key=api_key)
+        self.http = http or HTTPSettings()
+        self.timeout = self.http.total_timeout
+        self.base_url = base_url or DEFAULT_BASE_URL
+        self.retry = retry or RetryPolicy()
+        self.raise_key_errors = raise_key_errors
+        self.stop_sequences = stop_sequences
+        # The few-shot examples only pay for themselves when OpenAI caches them
+        self.few_shot = prefix_cacheable(model)
+        self.client = None
+        self.transport = None
+        self._batch_transport = None
+        # Requests sent, tokens reported by the API and retries, for statistics
+        self.usage = {"requests": 0, "input_tokens": 0, "output_tokens": 0, "cache_read_tokens": 0,
+                      "retries": 0, "backoff_seconds": 0.0, "truncated": 0}
+        
+        if transport == "lean":
+            self.transport = self._create_transport()
+        else:
+            from openai import AsyncOpenAI
+            # Retries follow self.retry rather than the SDK's own policy
+            self.client = AsyncOpenAI(api_key=api_key, base_url=base_url, timeout=self.http.sdk_timeout(),
+                                      max_retries=0, http_client=http_client or self.http.create_client())
     
-    def generate_command(self, query: str, system_context: str = "") -> Optional[str]:
+    async def generate_command(self, query: str, system_context: str = "",
+                               on_text: Optional[Callable[[str], None]] = None,
+                               budget: Optional[int] = None) -> Optional[str]:
         """
         Generate a command using OpenAI API.
         
+        Transient failures are retried according to the retry policy; a
+        streamed request only until part of the command has been shown.
+        
         Args:
             query: User's query
             system_context: System information context
+            on_text: Stream the completion, calling this with the command
+                as it arrives; the stream is closed after the first line
+            budget: max_tokens for the request, if below the client's; an
+                answer cut short by it or by a stop sequence is asked
+                again with max_tokens and no stop sequences
             
         Returns:
             Generated command or None if failed
+        
+        Raises:
+            asyncio.CancelledError: If the request was cancelled
+            AuthenticationError, RateLimitError: With raise_key_errors
         """
+        streamed = False
+        
+        def show(preview: str):
+            nonlocal streamed
+            streamed = True
+            on_text(preview)
+        
         try:
-            # Build system prompt
-            system_prompt = self._build_system_prompt(system_context)
-            
-            # Make API call
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": query}
-                ],
-                max_tokens=self.max_tokens,
-                temperature=0.1,  # Low temperature for consistent command generation
-                timeout=30
+            return await call_with_retries(
+                lambda: self._generate(query, system_context, show if on_text else None, budget),
+                self.retry, self.usage, can_retry=lambda: not streamed
             )
-            
-            # Extract and clean response
-            if response.choices and response.choices[0].message:
-                command = response.choices[0].message.content.strip()
-                return self._clean_command(command)
-            
+        except asyncio.CancelledError:
+            raise
+        except asyncio.TimeoutError:
+            print(f"Error: OpenAI API request timed out after {self.timeout:g}s")
             return None
-            
-        except openai.AuthenticationError:
+        except AuthenticationError:
+            if self.raise_key_errors:
+                raise
             print("Error: Invalid OpenAI API key")
             return None
-        except openai.RateLimitError:
+        except RateLimitError:
+            if self.raise_key_errors:
+                raise
             print("Error: OpenAI API rate limit exceeded")
             return None
-        except openai.APIError as e:
+        except APIError as e:
             print(f"Error: OpenAI API error: {e}")
             return None
         except Exception as e:
             print(f"Error: Unexpected error with OpenAI API: {e}")
             return None
     
-    def _build_system_prompt(self, system_context: str) -> str:
+    async def _generate(self, query: str, system_context: str, on_text: Optional[Callable[[str], None]],
+                        budget: Optional[int] = None) -> Optional[str]:
+        """
+        Build the request and send it, streamed or not; errors are left to the caller.
+        
+        The governed request and the re-ask without limits each get the
+        full client timeout.
+        """
+        params = dict(self._request_params(query, system_context), timeout=self.timeout)
+        governed = dict(params, max_tokens=min(budget or self.max_tokens, self.max_tokens))
+        if self.stop_sequences:
+            governed["stop"] = STOP_SEQUENCES
+        
+        command, cut_short = await asyncio.wait_for(self._generate_once(governed, on_text), self.timeout)
+        if cut_short and governed != params:
+            # Truncated by the budget, or stopped before the command began
+            # (a leading fence or blank line): ask again without limits
+            self.usage["truncated"] += 1
+            command, _ = await asyncio.wait_for(self._generate_once(params, on_text), self.timeout)
+        return command
+    
+    async def _generate_once(self, params: Dict[str, Any],
+                             on_text: Optional[Callable[[str], None]]) -> Tuple[Optional[str], bool]:
+        """
+        Send one request, streamed or not.
+        
+        Returns:
+            Tuple of the cleaned command and whether the answer was cut
+            short: truncated by max_tokens, or empty
+        """
+        outcome = {"truncated": False}
+        if on_text:
+            command = await stream_first_line(self._stream_completion(outcome=outcome, **params),
+                                              self._clean_command, on_text)
+        else:
+            content = await self._create_completion(outcome=outcome, **params)
+            command = self._clean_command(content.strip()) if content is not None else None
+        return command, outcome["truncated"] or not command
+    
+    def _request_params(self, query: str, system_context: str) -> Dict[str, Any]:
+        """Chat completion parameters for a query, shared by live and batch requests."""
+        # The stable prefix comes first, so OpenAI's automatic prompt
+        # caching can reuse it across requests
+        system_prompt = "".join(build_system_prompt(system_context, self.few_shot))
+        
+        return dict(
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": query}
+            ],
+            max_tokens=self.max_tokens,
+            temperature=0.1  # Low temperature for consistent command generation
+        )
+    
+    def _create_transport(self) -> LeanTransport:
+        """Build a lean transport for this client's API key and base URL."""
+        return LeanTransport(
+            self.base_url,
+            headers={"Authorization": f"Bearer {self.api_key}"},
+            settings=self.http
+        )
+    
+    async def _create_completion(self, timeout: float, outcome: Optional[Dict[str, Any]] = None,
+                                 **params) -> Optional[str]:
+        """
+        Send a chat completion request through the configured transport.
+        
+        Args:
+            timeout: Request timeout in seconds
+            outcome: Dict whose 'truncated' is set if the answer hit max_tokens
+            **params: Chat completion parameters (messages, max_tokens, ...)
+        
+        Returns:
+            Content of the first choice, or None if the response has none
+        
+        Raises:
+            APIError: On any API failure, classified the same way for both transports
+        """
+        if self.transport:
+            data = await self.transport.post_json(
+                "/chat/completions", {"model": self.model, **params}, timeout=timeout
+            )
+            self._record_usage(*self._usage_tokens(data.get("usage") or {}))
+            choices = data.get("choices") or []
+            if outcome is not None and choices and choices[0].get("finish_reason") == "length":
+                outcome["truncated"] = True
+            if choices and choices[0].get("message"):
+                return choices[0]["message"].get("content") or ""
+            return None
+        
+        import openai
+        try:
+            response = await self.client.chat.completions.create(
+                model=self.model, timeout=self.http.sdk_timeout(timeout), **params
+            )
+        except openai.AuthenticationError as e:
+            raise AuthenticationError.from_exception(e) from e
+        except openai.RateLimitError as e:
+            raise RateLimitError.from_exception(e) from e
+        except openai.APITimeoutError as e:
+            raise APITimeoutError.from_exception(e) from e
+        except openai.APIError as e:
+            raise APIError.from_exception(e) from e
+        
+        self._record_usage(*self._usage_tokens(response.usage))
+        if outcome is not None and response.choices and response.choices[0].finish_reason == "length":
+            outcome["truncated"] = True
+        if response.choices and response.choices[0].message:
+            return response.choices[0].message.content or ""
+        return None
+    
+    async def _stream_completion(self, timeout: float, outcome: Optional[Dict[str, Any]] = None,
+                                 **params) -> AsyncIterator[str]:
+        """
+        Stream a chat completion through the configured transport.
+        
+        The usage chunk that ends the stream is recorded; when the caller
+        closes the stream before it arrives (after the first line), the
+        tokens are estimated from the prompt and the text received.
+        
+        Args:
+            timeout: Timeout in seconds for the response and for each chunk
+            outcome: Dict whose 'truncated' is set if the stream ends at max_tokens
+            **params: Chat completion parameters (messages, max_tokens, ...)
+        
+        Yields:
+            Content deltas of the first choice
+        
+        Raises:
+            APIError: On any API failure, classified the same way for both transports
+        """
+        reported = {"usage": None}
+        text = ""
+        deltas = self._stream_deltas(timeout, outcome, reported, **params)
+        try:
+            async for delta in deltas:
+                text += delta
+                yield delta
+        finally:
+            await deltas.aclose()
+            if reported["usage"] is not None:
+                self._record_usage(*self._usage_tokens(reported["usage"]))
+            elif text:
+                prompt = "".join(message["content"] for message in params["messages"])
+                self._record_usage(len(prompt) // 4, max(1, len(text) // 4))
+            else:
+                self._record_usage()
+    
+    async def _stream_deltas(self, timeout: float, outcome: Optional[Dict[str, Any]],
+                             reported: Dict[str, Any], **params) -> AsyncIterator[str]:
+        """Stream the content deltas, storing the usage chunk in reported['usage']."""
+        stream_options = {"include_usage": True}
+        if self.transport:
+            events = self.transport.stream_json(
+                "/chat/completions",
+                {"model": self.model, "stream": True, "stream_options": stream_options, **params},
+                timeout=timeout
+            )
+            try:
+                async for event in events:
+                    if event.get("error"):
+                        error = event["error"]
+                        raise APIError(f"Stream error: {error.get('message') if isinstance(error, dict) else error}")
+                    if event.get("usage"):
+                        reported["usage"] = event["usage"]
+                    choices = event.get("choices") or []
+                    if outcome is not None and choices and choices[0].get("finish_reason") == "length":
+                        outcome["truncated"] = True
+                    if choices and (choices[0].get("delta") or {}).get("content"):
+                        yield choices[0]["delta"]["content"]
+            finally:
+                await events.aclose()
+            return
+        
+        import openai
+        try:
+            stream = await self.client.chat.completions.create(
+                model=self.model, timeout=self.http.sdk_timeout(timeout), stream=True,
+                stream_options=stream_options, **params
+            )
+            try:
+                async for chunk in stream:
+                    mark_first_byte()
+                    if chunk.usage:
+                        reported["usage"] = chunk.usage
+                    if outcome is not None and chunk.choices and chunk.choices[0].finish_reason == "length":
+                        outcome["truncated"] = True
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        yield chunk.choices[0].delta.content
+            finally:
+                await stream.response.aclose()
+        except openai.AuthenticationError as e:
+            raise AuthenticationError.from_exception(e) from e
+        except openai.RateLimitError as e:
+            raise RateLimitError.from_exception(e) from e
+        except openai.APITimeoutError as e:
+            raise APITimeoutError.from_exception(e) from e
+        except openai.APIError as e:
+            raise APIError.from_exception(e) from e
+    
+    async def generate_commands(self, queries: List[str], system_context: str = "",
+                                budget: Optional[int] = None) -> List[Optional[str]]:
         """
-        Build system prompt with context.
+        Generate commands for several queries with one packed request.
         
         Args:
+            queries: User queries
             system_context: System information context
-            
+            budget: max_tokens per answer, if below the client's; a reply
+                truncated by it is asked again with max_tokens per answer
+        
         Returns:
-            Formatted system prompt
+            Command per query, None where the reply had no usable answer
+        
+        Raises:
+            APIError: If the request failed
+            asyncio.TimeoutError: If an attempt took longer than the client timeout
         """
-        base_prompt = """You are a command-line expert for Linux systems. Generate ONLY a single command line that solves the user's request. Do not include explanations, markdown formatting, or multiple commands. Return only the executable command suitable for the user's system.
-
-Important rules:
-1. Return ONLY the command, no explanations
-2. No markdown formatting (no backticks, no code blocks)
-3. No multiple commands separated by semicolons or newlines
-4. Ensure the command is safe and appropriate for the user's system
-5. Use the appropriate package manager and tools for their distribution"""
-
-        if system_context:
-            base_prompt += f"\n\nSystem Information: {system_context}"
+        system_prompt = "".join(build_system_prompt(system_context, self.few_shot)) + PACKED_INSTRUCTIONS
+        params = dict(
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": format_packed_queries(queries)}
+            ],
+            max_tokens=self.max_tokens * len(queries),
+            temperature=0.1,
+            timeout=self.timeout
+        )
+        if budget and budget < self.max_tokens:
+            outcome = {"truncated": False}
+            governed = dict(params, max_tokens=min(budget + ANSWER_NUMBER_TOKENS, self.max_tokens) * len(queries))
+            content = await call_with_retries(
+                lambda: asyncio.wait_for(self._create_completion(outcome=outcome, **governed), self.timeout),
+                self.retry, self.usage
+            )
+            if not outcome["truncated"]:
+                return parse_packed_answers(content or "", len(queries), self._clean_command)
+            self.usage["truncated"] += 1
+        
+        content = await call_with_retries(
+            lambda: asyncio.wait_for(self._create_completion(**params), self.timeout), self.retry, self.usage
+        )
+        return parse_packed_answers(content or "", len(queries), self._clean_command)
+    
+    def _get_batch_transport(self) -> LeanTransport:
+        """
+        The transport used for the Batch API.
         
-        return base_prompt
+        The batch endpoints always go through the lean transport; with the
+        SDK transport configured, a separate lean one is created for them.
+        """
+        if self.transport:
+            return self.transport
+        if self._batch_transport is None:
+            self._batch_transport = self._create_transport()
+        return self._batch_transport
+    
+    async def submit_batch(self, queries: Dict[str, str], system_context: str = "") -> str:
+        """
+        Submit queries to the Batch API.
+        
+        Each query becomes one chat completion request, with the same
+        prompt generate_command sends.
+        
+        Args:
+            queries: Queries by custom ID
+            system_context: System information context
+        
+        Returns:
+            ID of the created batch
+        
+        Raises:
+            APIError: If the upload or the batch creation failed
+        """
+        lines = [
+            json.dumps({
+                "custom_id": custom_id,
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": {"model": self.model, **self._request_params(query, system_context)}
+            })
+            for custom_id, query in queries.items()
+        ]
+        
+        boundary = uuid.uuid4().hex
+        body = (
+            f'--{boundary}\r\nContent-Disposition: form-data; name="purpose"\r\n\r\nbatch\r\n'
+            f'--{boundary}\r\nContent-Disposition: form-data; name="file"; filename="tinycode-batch.jsonl"\r\n'
+            f'Content-Type: application/jsonl\r\n\r\n'
+        ).encode("utf-8") + "\n".join(lines).encode("utf-8") + f"\r\n--{boundary}--\r\n".encode("utf-8")
+        
+        transport = self._get_batch_transport()
+        data = await transport.request(
+            "POST", "/files", body, f"multipart/form-data; boundary={boundary}", BATCH_TIMEOUT
+        )
+        input_file = json.loads(data)
+        batch = await transport.post_json("/batches", {
+            "input_file_id": input_file["id"],
+            "endpoint": "/v1/chat/completions",
+            "completion_window": "24h"
+        }, BATCH_TIMEOUT)
+        return batch["id"]
+    
+    async def get_batch_status(self, batch_id: str) -> Dict[str, Any]:
+        """
+        Poll a batch.
+        
+        Args:
+            batch_id: ID returned by submit_batch
+        
+        Returns:
+            Dict with the provider's 'status', whether the batch has 'ended',
+            and the 'completed', 'failed' and 'total' request counts
+        
+        Raises:
+            APIError: If the batch could not be retrieved
+        """
+        batch = await self._get_batch_transport().get_json(f"/batches/{batch_id}", BATCH_TIMEOUT)
+        counts = batch.get("request_counts") or {}
+        return {
+            "status": batch.get("status"),
+            "ended": batch.get("status") in BATCH_FINAL_STATUSES,
+            "completed": counts.get("completed", 0),
+            "failed": counts.get("failed", 0),
+            "total": counts.get("total", 0)
+        }
+    
+    async def get_batch_results(self, batch_id: str) -> Dict[str, Optional[str]]:
+        """
+        Download the results of an ended batch.
+        
+        Args:
+            batch_id: ID returned by submit_batch
+        
+        Returns:
+            Cleaned command by custom ID, None for failed requests;
+            requests that never ran are missing
+        
+        Raises:
+            APIError: If the batch or its output could not be retrieved
+        """
+        transport = self._get_batch_transport()
+        batch = await transport.get_json(f"/batches/{batch_id}", BATCH_TIMEOUT)
+        
+        results: Dict[str, Optional[str]] = {}
+        for file_id in (batch.get("output_file_id"), batch.get("error_file_id")):
+            if not file_id:
+                continue
+            data = await transport.request("GET", f"/files/{file_id}/content", timeout=BATCH_TIMEOUT)
+            for line in data.decode("utf-8").splitlines():
+                if not line.strip():
+                    continue
+                result = json.loads(line)
+                response = result.get("response") or {}
+                choices = (response.get("body") or {}).get("choices") or []
+                content = None
+                if response.get("status_code") == 200 and choices:
+                    content = (choices[0].get("message") or {}).get("content")
+                results[result["custom_id"]] = (self._clean_command(content.strip()) or None) if content else None
+        return results
+    
+    def estimate_tokens(self, query: str, system_context: str = "", answers: int = 1,
+                        budget: Optional[int] = None) -> int:
+        """
+        Estimate the tokens a request counts against the provider's rate limits.
+        
+        Providers count the prompt and the max_tokens the request allows,
+        so this is about four characters per prompt token plus max_tokens
+        (or the budget) per answer.
+        
+        Args:
+            query: User's query (or the numbered queries of a packed request)
+            system_context: System information context
+            answers: Number of answers the request asks for
+            budget: Output token budget per answer, if below max_tokens
+        
+        Returns:
+            Estimated token count
+        """
+        prompt = "".join(build_system_prompt(system_context, self.few_shot)) + query
+        return len(prompt) // 4 + min(budget or self.max_tokens, self.max_tokens) * answers
+    
+    @staticmethod
+    def _usage_tokens(usage) -> Tuple[Optional[int], Optional[int], Optional[int]]:
+        """
+        Read a usage report, from the JSON response or the SDK.
+        
+        Returns:
+            Tuple of the prompt tokens, the completion tokens and the
+            prompt tokens read from the prompt cache
+        """
+        def get(source, name):
+            if source is None:
+                return None
+            return source.get(name) if isinstance(source, dict) else getattr(source, name, None)
+        
+        details = get(usage, "prompt_tokens_details")
+        return get(usage, "prompt_tokens"), get(usage, "completion_tokens"), get(details, "cached_tokens")
+    
+    def _record_usage(self, input_tokens: Optional[int] = None, output_tokens: Optional[int] = None,
+                      cache_read_tokens: Optional[int] = None):
+        """Count a request and the tokens the API reported for it."""
+        self.usage["requests"] += 1
+        self.usage["input_tokens"] += input_tokens or 0
+        self.usage["output_tokens"] += output_tokens or 0
+        self.usage["cache_read_tokens"] += cache_read_tokens or 0
+        record_tokens(input_tokens, output_tokens, cache_read_tokens)
     
     def _clean_command(self, command: str) -> str:
         """
@@ -119,17 +581,35 @@ Important rules:
         # Remove backticks
         command = command.strip('`')
         
+        # Remove a markdown language specifier on a line of its own (a
+        # command that merely starts with 'sh', like sha256sum, is kept)
+        lines = command.split('\n', 1)
+        if lines[0].strip() in LANGUAGE_TAGS:
+            command = lines[1] if len(lines) > 1 else ''
+        
         # Remove any trailing explanations
+        command = command.strip()
         if '\n' in command:
             command = command.split('\n')[0]
         
-        # Remove any markdown language specifiers
-        if command.startswith('bash') or command.startswith('sh'):
-            command = command[4:].strip()
-        
         return command.strip()
     
-    def test_connection(self) -> bool:
+    async def warm_up(self):
+        """
+        Prepare the connection ahead of the first request.
+        
+        The lean transport opens its connection (DNS, TCP and TLS); the SDK
+        manages its own connection pool, so only the DNS lookup is done.
+        """
+        if self.transport:
+            await self.transport.connect()
+            return
+        
+        host = urlsplit(str(self.client.base_url)).hostname
+        if host:
+            await asyncio.get_running_loop().getaddrinfo(host, 443, proto=socket.IPPROTO_TCP)
+    
+    async def test_connection(self) -> bool:
         """
         Test API connection.
         
@@ -137,17 +617,73 @@ Important rules:
             True if connection successful, False otherwise
         """
         try:
-            response = self.client.chat.completions.create(
-                model=self.model,
+            await asyncio.wait_for(self._create_completion(
                 messages=[{"role": "user", "content": "echo hello"}],
                 max_tokens=10,
                 timeout=10
-            )
+            ), 10)
             return True
+        except asyncio.CancelledError:
+            raise
         except Exception:
             return False
 
 
+class OpenAIClient:
+    """
+    Blocking OpenAI API client.
+    
+    Runs an AsyncOpenAIClient on the shared background event loop, so
+    its connection stays open from one call to the next.
+    """
+    
+    def __init__(self, api_key: str, model: str = "gpt-3.5-turbo", max_tokens: int = 100,
+                 transport: str = "sdk", base_url: Optional[str] = None, timeout: float = 30.0,
+                 retry: Optional[RetryPolicy] = None):
+        """
+        Initialize OpenAI client.
+        
+        Args:
+            api_key: OpenAI API key
+            model: Model to use for generation
+            max_tokens: Maximum tokens for response
+            transport: 'sdk' to use the openai package, 'lean' for the built-in HTTP client
+            base_url: Override for the API base URL
+            timeout: Time limit in seconds for each attempt of a request
+            retry: Retry policy for failed requests (default: RetryPolicy())
+        """
+        self.async_client = AsyncOpenAIClient(api_key, model, max_tokens, transport, base_url,
+                                              HTTPSettings(total_timeout=timeout), retry)
+    
+    def generate_command(self, query: str, system_context: str = "",
+                         on_text: Optional[Callable[[str], None]] = None) -> Optional[str]:
+        """
+        Generate a command using OpenAI API.
+        
+        Args:
+            query: User's query
+            system_context: System information context
+            on_text: Stream the completion, calling this with the command as it arrives
+        
+        Returns:
+            Generated command or None if failed
+        """
+        return run_sync(self.async_client.generate_command(query, system_context, on_text))
+    
+    def warm_up(self):
+        """Prepare the connection ahead of the first request."""
+        run_sync(self.async_client.warm_up())
+    
+    def test_connection(self) -> bool:
+        """
+        Test API connection.
+        
+        Returns:
+            True if connection successful, False otherwise
+        """
+        return run_sync(self.async_client.test_connection())
+
+
 if __name__ == "__main__":
     # Test the OpenAI client
     api_key = os.getenv("OPENAI_API_KEY")
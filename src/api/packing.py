@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Query packing for tinycode.
+Puts several queries into one provider request as a numbered list and
+splits the numbered answers back into one command per query, so batch
+jobs pay the system prompt and the request overhead once per pack.
+"""
+
+import re
+from typing import Callable, List, Optional
+
+
+# Appended to the client's system prompt for packed requests
+PACKED_INSTRUCTIONS = """
+
+You will receive several numbered requests. Answer every request on its own line, starting with its number, a period and a space, followed by ONLY the command for that request, for example:
+1. ls -la
+2. df -h"""
+
+# Output tokens a packed answer adds for its number and line break
+ANSWER_NUMBER_TOKENS = 4
+
+# A numbered answer line: "3. cmd" or "3) cmd"
+ANSWER_LINE = re.compile(r'^\s*(\d+)[.)]\s+(.*\S)\s*$')
+
+
+def format_packed_queries(queries: List[str]) -> str:
+    """
+    Number the queries for a packed request.
+    
+    Line breaks inside a query are flattened so that each query keeps
+    exactly one number.
+    
+    Args:
+        queries: User queries
+    
+    Returns:
+        User message with one numbered query per line
+    """
+    return "\n".join(f"{number}. {' '.join(query.split())}" for number, query in enumerate(queries, 1))
+
+
+def parse_packed_answers(text: str, count: int, clean: Callable[[str], str]) -> List[Optional[str]]:
+    """
+    Split a packed reply into one command per query.
+    
+    Args:
+        text: Reply text
+        count: Number of queries in the pack
+        clean: The client's _clean_command, applied to each answer
+    
+    Returns:
+        Command per query, in order; None where the reply has no usable
+        answer for that number
+    """
+    answers: List[Optional[str]] = [None] * count
+    for line in text.splitlines():
+        match = ANSWER_LINE.match(line)
+        if not match:
+            continue
+        index = int(match.group(1)) - 1
+        if 0 <= index < count and answers[index] is None:
+            answers[index] = clean(match.group(2)) or None
+    return answers
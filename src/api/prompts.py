@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+System prompt for tinycode.
+Builds the system prompt shared by both clients in two parts: a stable
+prefix (instructions and few-shot examples for every common distribution)
+that is byte-for-byte the same on every host and every request, so the
+providers can cache it, followed by the host-specific system context.
+Whether the prefix can be cached depends on the model; models that cannot
+cache it get the instructions without the examples.
+"""
+
+from typing import Optional, Tuple
+
+
+# Version of the system prompt; part of the response cache key, so bump it
+# whenever the prompt changes
+PROMPT_VERSION = 4
+
+INSTRUCTIONS = """You are a command-line expert for Linux systems. Generate ONLY a single command line that solves the user's request. Do not include explanations, markdown formatting, or multiple commands. Return only the executable command suitable for the user's system.
+
+Important rules:
+1. Return ONLY the command, no explanations
+2. No markdown formatting (no backticks, no code blocks)
+3. No multiple commands separated by semicolons or newlines
+4. Ensure the command is safe and appropriate for the user's system
+5. Use the appropriate package manager and tools for their distribution
+6. Prefer standard tools that are installed by default over ones that may be missing
+7. Quote paths and patterns that contain spaces or shell metacharacters
+8. Never delete, overwrite or change permissions beyond what the request asks for"""
+
+# Requests that look the same everywhere
+GENERAL_EXAMPLES = (
+    ("list all files including hidden ones", "ls -la"),
+    ("show disk usage of each mounted filesystem", "df -h"),
+    ("size of the current directory", "du -sh ."),
+    ("ten largest files under /var", "find /var -type f -printf '%s %p\\n' 2>/dev/null | sort -rn | head -n 10"),
+    ("find files named config.yaml below the current directory", "find . -name 'config.yaml'"),
+    ("search for TODO in all python files recursively", "grep -rn 'TODO' --include='*.py' ."),
+    ("count lines in main.c", "wc -l main.c"),
+    ("show the last 50 lines of syslog and keep following it", "tail -n 50 -f /var/log/syslog"),
+    ("which process is listening on port 8080", "ss -ltnp 'sport = :8080'"),
+    ("show memory usage in human readable units", "free -h"),
+    ("top 5 processes by memory", "ps aux --sort=-%mem | head -n 6"),
+    ("kill the process named firefox", "pkill firefox"),
+    ("extract archive.tar.gz", "tar -xzf archive.tar.gz"),
+    ("compress the logs directory into logs.tar.gz", "tar -czf logs.tar.gz logs"),
+    ("make deploy.sh executable", "chmod +x deploy.sh"),
+    ("change owner of /srv/www to www-data recursively", "sudo chown -R www-data:www-data /srv/www"),
+    ("download https://example.com/file.iso", "curl -LO https://example.com/file.iso"),
+    ("show my public ip address", "curl -s https://ifconfig.me"),
+    ("replace foo with bar in notes.txt in place", "sed -i 's/foo/bar/g' notes.txt"),
+    ("files modified in the last 24 hours in the home directory", "find ~ -type f -mtime -1"),
+    ("copy the photos folder to /mnt/backup keeping permissions", "rsync -a photos /mnt/backup/"),
+    ("show the kernel version", "uname -r"),
+    ("how long has the system been running", "uptime -p"),
+    ("create a 4 GB swap file", "sudo fallocate -l 4G /swapfile"),
+    ("restart the nginx service", "sudo systemctl restart nginx"),
+    ("show errors logged by the ssh service since yesterday", "journalctl -u ssh --since yesterday -p err"),
+    ("list block devices with filesystems", "lsblk -f"),
+    ("generate a random 32 character password", "openssl rand -base64 24"),
+    ("show the routing table", "ip route"),
+    ("list the ip addresses of all interfaces", "ip -brief address"),
+    ("test whether port 443 on example.com is reachable", "nc -zv example.com 443"),
+    ("list my scheduled cron jobs", "crontab -l"),
+    ("show the 20 most used shell commands", "history | awk '{print $2}' | sort | uniq -c | sort -rn | head -n 20"),
+    ("delete empty directories below build", "find build -type d -empty -delete"),
+    ("sha256 checksum of file.iso", "sha256sum file.iso"),
+    ("add user alice to the docker group", "sudo usermod -aG docker alice"),
+    ("mount /dev/sdb1 on /mnt/usb", "sudo mount /dev/sdb1 /mnt/usb"),
+    ("convert video.mov to mp4", "ffmpeg -i video.mov video.mp4"),
+)
+
+# Package management differs per distribution family
+DISTRO_EXAMPLES = (
+    ("Debian, Ubuntu and derivatives (apt)", (
+        ("install htop", "sudo apt install htop"),
+        ("refresh the package lists", "sudo apt update"),
+        ("upgrade all installed packages", "sudo apt upgrade"),
+        ("remove nginx and its configuration", "sudo apt purge nginx"),
+        ("which package provides /usr/bin/dig", "dpkg -S /usr/bin/dig"),
+        ("list installed packages", "apt list --installed"),
+    )),
+    ("Fedora, RHEL 8+, CentOS Stream and Rocky Linux (dnf)", (
+        ("install htop", "sudo dnf install htop"),
+        ("update all packages", "sudo dnf upgrade --refresh"),
+        ("remove nginx", "sudo dnf remove nginx"),
+        ("which package provides /usr/bin/dig", "dnf provides /usr/bin/dig"),
+        ("list installed packages", "dnf list --installed"),
+    )),
+    ("CentOS 7 and RHEL 7 (yum)", (
+        ("install htop", "sudo yum install htop"),
+        ("update all packages", "sudo yum update"),
+        ("which package provides /usr/bin/dig", "yum provides /usr/bin/dig"),
+    )),
+    ("Arch Linux and Manjaro (pacman)", (
+        ("install htop", "sudo pacman -S htop"),
+        ("update all packages", "sudo pacman -Syu"),
+        ("remove nginx with its unused dependencies", "sudo pacman -Rns nginx"),
+        ("which package owns /usr/bin/dig", "pacman -Qo /usr/bin/dig"),
+        ("list explicitly installed packages", "pacman -Qe"),
+    )),
+    ("openSUSE (zypper)", (
+        ("install htop", "sudo zypper install htop"),
+        ("update all packages", "sudo zypper update"),
+        ("which package provides /usr/bin/dig", "zypper search --provides /usr/bin/dig"),
+    )),
+    ("Alpine Linux (apk)", (
+        ("install htop", "sudo apk add htop"),
+        ("update all packages", "sudo apk upgrade --update-cache"),
+        ("which package owns /usr/bin/dig", "apk info --who-owns /usr/bin/dig"),
+    )),
+)
+
+
+def _format_examples() -> str:
+    """Render the few-shot examples as request/command pairs."""
+    lines = ["Examples (request => command):"]
+    lines += [f"{request} => {command}" for request, command in GENERAL_EXAMPLES]
+    for distribution, examples in DISTRO_EXAMPLES:
+        lines.append(f"\nOn {distribution}:")
+        lines += [f"{request} => {command}" for request, command in examples]
+    lines.append("\nUse the examples for the distribution named in the system information; "
+                 "if it is not listed, use the package manager it names.")
+    return "\n".join(lines)
+
+
+# Identical for every host and request, so providers can cache it
+STABLE_PREFIX = INSTRUCTIONS + "\n\n" + _format_examples()
+
+# Estimated length of the prefix, at about four characters per token
+STABLE_PREFIX_TOKENS = len(STABLE_PREFIX) // 4
+
+# Shortest prompt prefix each model caches, in tokens, by model name prefix
+# (more specific prefixes first). Models not listed, such as gpt-3.5-turbo,
+# gpt-4 and claude-3-sonnet, do not cache prompts.
+PROMPT_CACHE_MINIMUMS = (
+    ("gpt-4o", 1024),
+    ("gpt-4.1", 1024),
+    ("gpt-5", 1024),
+    ("o1", 1024),
+    ("o3", 1024),
+    ("o4", 1024),
+    ("claude-opus-4-5", 4096),
+    ("claude-haiku-4-5", 4096),
+    ("claude-opus-4", 1024),
+    ("claude-sonnet-4", 1024),
+    ("claude-3-7-sonnet", 1024),
+    ("claude-3-5-sonnet", 1024),
+    ("claude-3-opus", 1024),
+    ("claude-3-5-haiku", 2048),
+    ("claude-3-haiku", 2048),
+)
+
+
+def min_cacheable_tokens(model: str) -> Optional[int]:
+    """Shortest prompt prefix a model caches, in tokens, or None if it does not cache prompts."""
+    model = model.lower()
+    for prefix, minimum in PROMPT_CACHE_MINIMUMS:
+        if model.startswith(prefix):
+            return minimum
+    return None
+
+
+def prefix_cacheable(model: str) -> bool:
+    """Whether the model caches prompts and the stable prefix is long enough for it."""
+    minimum = min_cacheable_tokens(model)
+    return minimum is not None and STABLE_PREFIX_TOKENS >= minimum
+
+
+def build_system_prompt(system_context: str = "", few_shot: bool = True) -> Tuple[str, str]:
+    """
+    Build the system prompt for a host.
+    
+    Args:
+        system_context: System information context
+        few_shot: Include the few-shot examples; only worth their tokens
+            when the provider caches the prefix (see prefix_cacheable)
+    
+    Returns:
+        Tuple of the stable prefix and the host-specific part, which is
+        empty without system context; the prompt is their concatenation
+    """
+    prefix = STABLE_PREFIX if few_shot else INSTRUCTIONS
+    if not system_context:
+        return prefix, ""
+    return prefix, f"\n\nSystem Information: {system_context}"
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Retry policy for tinycode.
+Retries provider requests that failed for a transient reason (rate
+limits, overload, server errors, dropped connections) with exponential
+backoff and full jitter, honouring the provider's Retry-After, and counts
+the retries and the time spent backing off.
+"""
+
+import time
+import random
+import asyncio
+import contextvars
+from contextlib import contextmanager
+from email.utils import parsedate_to_datetime
+from typing import Dict, Any, Awaitable, Callable, Iterator, Optional, TypeVar
+
+from .transport import APIError, APITimeoutError, AuthenticationError, RateLimitError
+
+
+# HTTP statuses worth retrying: timeouts, conflicts, rate limits, server
+# errors and Anthropic's 529 overloaded
+RETRYABLE_STATUSES = (408, 409, 429, 500, 502, 503, 504, 529)
+
+T = TypeVar("T")
+
+# Retries of the requests made by the current task, see collect_retries
+_task_retries: contextvars.ContextVar = contextvars.ContextVar("task_retries", default=None)
+
+
+class RetryPolicy:
+    """When and how long to wait before retrying a failed request."""
+    
+    def __init__(self, max_attempts: int = 3, base_delay: float = 0.5, max_delay: float = 8.0,
+                 max_retry_after: float = 30.0, retry_rate_limits: bool = True):
+        """
+        Initialize retry policy.
+        
+        Args:
+            max_attempts: Attempts per request, including the first one
+            base_delay: Backoff cap before the first retry, in seconds;
+                doubled for each further retry
+            max_delay: Upper bound of the backoff cap, in seconds
+            max_retry_after: Longest Retry-After to wait for; a longer
+                one fails the request right away
+            retry_rate_limits: Whether to retry 429s; off for keys in a
+                pool, where the manager moves on to another key instead
+        """
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_retry_after = max_retry_after
+        self.retry_rate_limits = retry_rate_limits
+    
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> "RetryPolicy":
+        """Build a policy from the 'retry' configuration section."""
+        return cls(
+            max_attempts=config.get("max_attempts", 3),
+            base_delay=config.get("base_delay", 0.5),
+            max_delay=config.get("max_delay", 8.0),
+            max_retry_after=config.get("max_retry_after", 30.0)
+        )
+    
+    def delay(self, attempt: int, error: APIError) -> Optional[float]:
+        """
+        Seconds to wait before retrying after a failed attempt.
+        
+        Args:
+            attempt: Number of the attempt that failed (1 for the first)
+            error: The error it failed with
+        
+        Returns:
+            Delay in seconds, or None if the request should not be retried
+        """
+        if attempt >= self.max_attempts or not is_retryable(error):
+            return None
+        if isinstance(error, RateLimitError) and not self.retry_rate_limits:
+            return None
+        
+        retry_after = parse_retry_after(error.headers)
+        if retry_after is not None:
+            return retry_after if retry_after <= self.max_retry_after else None
+        
+        # Full jitter: spreads out clients that failed at the same moment
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+
+def is_retryable(error: APIError) -> bool:
+    """
+    Whether a request that failed with this error may succeed if retried.
+    
+    Rejected keys and invalid requests will fail again; timeouts already
+    used up the request's time limit.
+    """
+    if isinstance(error, (AuthenticationError, APITimeoutError)):
+        return False
+    if error.status_code is None:
+        # No response: the connection failed or was dropped
+        return True
+    return error.status_code in RETRYABLE_STATUSES
+
+
+def parse_retry_after(headers: Dict[str, str]) -> Optional[float]:
+    """
+    Read the delay a provider asked for from its response headers.
+    
+    Understands OpenAI's retry-after-ms and the standard Retry-After, in
+    seconds or as an HTTP date.
+    
+    Args:
+        headers: Response headers, lowercase keys
+    
+    Returns:
+        Delay in seconds, or None if the response does not set one
+    """
+    try:
+        if "retry-after-ms" in headers:
+            return max(0.0, float(headers["retry-after-ms"]) / 1000)
+        value = headers.get("retry-after")
+        if value is None:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError, OverflowError):
+        return None
+
+
+async def call_with_retries(call: Callable[[], Awaitable[T]], policy: RetryPolicy,
+                            usage: Dict[str, Any],
+                            can_retry: Optional[Callable[[], bool]] = None) -> T:
+    """
+    Await a request, retrying it according to the policy.
+    
+    Args:
+        call: Makes one attempt; called again for every retry
+        policy: Retry policy
+        usage: The client's usage counters; 'retries' and
+            'backoff_seconds' are added to
+        can_retry: Checked before every retry; e.g. a streamed request
+            must not be retried once part of it was shown
+    
+    Returns:
+        Result of the first successful attempt
+    
+    Raises:
+        APIError: Error of the last attempt, if none succeeded
+    """
+    attempt = 1
+    while True:
+        try:
+            return await call()
+        except APIError as e:
+            delay = policy.delay(attempt, e)
+            if delay is None or (can_retry and not can_retry()):
+                raise
+        
+        usage["retries"] += 1
+        usage["backoff_seconds"] += delay
+        task_retries = _task_retries.get()
+        if task_retries is not None:
+            task_retries["retries"] += 1
+            task_retries["backoff_seconds"] += delay
+        
+        await asyncio.sleep(delay)
+        attempt += 1
+
+
+@contextmanager
+def collect_retries() -> Iterator[Dict[str, Any]]:
+    """
+    Count the retries of the requests the current task makes in the block.
+    
+    Yields:
+        Dict with 'retries' and 'backoff_seconds', updated as retries happen
+    """
+    retries = {"retries": 0, "backoff_seconds": 0.0}
+    token = _task_retries.set(retries)
+    try:
+        yield retries
+    finally:
+        _task_retries.reset(token)
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Streaming helpers for tinycode.
+Cleans a streamed completion incrementally, so the command can be shown
+as it arrives and the stream closed as soon as its first line is known.
+"""
+
+from typing import AsyncIterator, Callable, Optional
+
+
+# Markdown language specifiers that _clean_command drops when they stand
+# on a line of their own before the command
+LANGUAGE_TAGS = ("bash", "sh")
+
+
+class FirstLineStream:
+    """Accumulates streamed text and tracks the first command line in it."""
+    
+    def __init__(self, clean: Callable[[str], str]):
+        """
+        Initialize first-line stream.
+        
+        Args:
+            clean: The client's _clean_command, applied to the text received
+        """
+        self.clean = clean
+        self.text = ""
+    
+    def feed(self, delta: str):
+        """
+        Add a chunk of streamed text.
+        
+        Args:
+            delta: Text received since the last chunk
+        """
+        self.text += delta
+    
+    def _body(self) -> Optional[str]:
+        """
+        Text after a leading code fence line and a language tag line, if any.
+        
+        Returns:
+            The body, or None while it is not yet known whether the text
+            opens with a fence or a language tag
+        """
+        text = self.text.lstrip()
+        if text.startswith("```"):
+            if "\n" not in text:
+                return None
+            text = text.split("\n", 1)[1]
+        elif "```".startswith(text):
+            return None
+        
+        first = text.split("\n", 1)[0].strip()
+        if "\n" not in text:
+            return None if any(tag.startswith(first) for tag in LANGUAGE_TAGS) else text
+        return text.split("\n", 1)[1] if first in LANGUAGE_TAGS else text
+    
+    @property
+    def complete(self) -> bool:
+        """Whether a complete, non-empty first command line has arrived."""
+        body = self._body()
+        return body is not None and "\n" in body and body.split("\n", 1)[0].strip() != ""
+    
+    def preview(self) -> str:
+        """
+        The command as far as it can already be shown.
+        
+        Only ever grows as text arrives: trailing backticks and whitespace
+        are held back.
+        
+        Returns:
+            Cleaned prefix of the command (possibly empty)
+        """
+        body = self._body()
+        if body is None:
+            return ""
+        
+        line = body.split("\n", 1)[0]
+        if not self.complete:
+            line = line.rstrip("` \t\r")
+        return self.clean(line)
+    
+    def result(self) -> str:
+        """
+        The cleaned command.
+        
+        Returns:
+            Cleaned first line once complete, else the cleaned text so far
+        """
+        if self.complete:
+            # Clean only up to the end of the first line, as if the model had stopped there
+            body = self._body()
+            cut = len(self.text) - len(body) + body.index("\n") + 1
+            return self.clean(self.text[:cut].strip())
+        return self.clean(self.text.strip())
+
+
+async def stream_first_line(deltas: AsyncIterator[str], clean: Callable[[str], str],
+                            on_text: Callable[[str], None]) -> str:
+    """
+    Consume a stream of text deltas until the first command line is complete.
+    
+    Args:
+        deltas: Async generator of streamed text chunks; closed early once the
+            first line is complete, which stops the generation
+        clean: The client's _clean_command
+        on_text: Called with the growing command preview whenever it changes
+    
+    Returns:
+        Cleaned command
+    """
+    stream = FirstLineStream(clean)
+    shown = ""
+    try:
+        async for delta in deltas:
+            stream.feed(delta)
+            preview = stream.preview()
+            if preview != shown:
+                shown = preview
+                on_text(preview)
+            if stream.complete:
+                break
+    finally:
+        await deltas.aclose()
+    return stream.result()
@@ -0,0 +1,709 @@
+#!/usr/bin/env python3
+"""
+HTTP transport for tinycode.
+Provides the error types shared by both API clients, the connection
+settings (timeouts, pool limits, HTTP/2, proxy) of the HTTP client shared
+by the vendor SDKs, and a lean built-in HTTP client that talks to the
+provider APIs without the vendor SDKs.
+"""
+
+import ssl
+import sys
+import json
+import time
+import base64
+import socket
+import asyncio
+from typing import Dict, Any, AsyncIterator, List, Optional, Tuple
+from urllib.parse import urlsplit, unquote
+
+from .usage import mark_first_byte
+
+
+class APIError(Exception):
+    """Error returned by a provider API (or raised while reaching it)."""
+    
+    def __init__(self, message: str, status_code: Optional[int] = None,
+                 headers: Optional[Dict[str, str]] = None):
+        """
+        Initialize API error.
+        
+        Args:
+            message: Error message
+            status_code: HTTP status code, if a response was received
+            headers: Response headers, if a response was received
+        """
+        super().__init__(message)
+        self.status_code = status_code
+        self.headers = {k.lower(): v for k, v in (headers or {}).items()}
+    
+    @classmethod
+    def from_exception(cls, error: Exception) -> "APIError":
+        """
+        Build an error of this class from a vendor SDK exception.
+        
+        Args:
+            error: Exception raised by the openai or anthropic SDK
+        
+        Returns:
+            Equivalent transport error
+        """
+        response = getattr(error, "response", None)
+        headers = getattr(response, "headers", None)
+        return cls(
+            str(error),
+            status_code=getattr(error, "status_code", None),
+            headers=dict(headers) if headers else None
+        )
+
+
+class AuthenticationError(APIError):
+    """The API key was rejected."""
+
+
+class RateLimitError(APIError):
+    """The provider rate limit was exceeded."""
+
+
+class APITimeoutError(APIError):
+    """The request did not complete within its time limit."""
+
+
+def raise_for_status(status: int, body: bytes, headers: Dict[str, str]):
+    """
+    Raise the matching APIError for an unsuccessful HTTP status.
+    
+    Args:
+        status: HTTP status code
+        body: Raw response body
+        headers: Response headers
+    """
+    if status < 400:
+        return
+    
+    message = body.decode("utf-8", "replace")
+    try:
+        error = json.loads(message).get("error", {})
+        if isinstance(error, dict) and error.get("message"):
+            message = error["message"]
+    except (ValueError, AttributeError):
+        pass
+    message = f"Error code: {status} - {message}"
+    
+    if status in (401, 403):
+        raise AuthenticationError(message, status, headers)
+    if status == 429:
+        raise RateLimitError(message, status, headers)
+    raise APIError(message, status, headers)
+
+
+class HTTPSettings:
+    """Timeouts, connection pool limits and proxy of the HTTP clients."""
+    
+    def __init__(self, connect_timeout: float = 5.0, read_timeout: float = 30.0,
+                 total_timeout: float = 30.0, max_connections: int = 20, max_keepalive: int = 10,
+                 keepalive_expiry: float = 60.0, http2: bool = False, proxy: Optional[str] = None):
+        """
+        Initialize HTTP settings.
+        
+        Args:
+            connect_timeout: Time limit in seconds for opening a connection
+                (DNS, TCP, proxy tunnel and TLS)
+            read_timeout: Longest wait in seconds for the response to
+                start, or for the next chunk of a streamed response
+            total_timeout: Time limit in seconds for each attempt of a
+                request, from sending it to the end of the response
+            max_connections: Connections open at once, in use or idle
+                (shared SDK client only)
+            max_keepalive: Idle connections kept open for reuse
+            keepalive_expiry: Seconds an idle connection is kept open
+            http2: Negotiate HTTP/2 with the shared SDK client (needs the
+                h2 package)
+            proxy: Proxy URL (http://[user:password@]host:port); None
+                uses the HTTPS_PROXY/HTTP_PROXY/NO_PROXY environment
+        """
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.total_timeout = total_timeout
+        self.max_connections = max(1, max_connections)
+        self.max_keepalive = max(0, max_keepalive)
+        self.keepalive_expiry = keepalive_expiry
+        self.http2 = http2
+        self.proxy = proxy or None
+    
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> "HTTPSettings":
+        """Build settings from the 'transport' configuration section."""
+        return cls(
+            connect_timeout=config.get("connect_timeout", 5.0),
+            read_timeout=config.get("read_timeout", 30.0),
+            total_timeout=config.get("total_timeout", 30.0),
+            max_connections=config.get("max_connections", 20),
+            max_keepalive=config.get("max_keepalive", 10),
+            keepalive_expiry=config.get("keepalive_expiry", 60.0),
+            http2=config.get("http2", False),
+            proxy=config.get("proxy") or None
+        )
+    
+    def proxy_for(self, url: str) -> Optional[str]:
+        """
+        Proxy to reach a URL through, if any.
+        
+        Args:
+            url: URL of the request
+        
+        Returns:
+            The configured proxy, else the environment's proxy for the
+            URL's scheme unless NO_PROXY exempts its host
+        """
+        if self.proxy:
+            return self.proxy
+        # Imported here: urllib.request pulls in http.client and email
+        import urllib.request
+        parts = urlsplit(url)
+        if parts.hostname and urllib.request.proxy_bypass(parts.hostname):
+            return None
+        return urllib.request.getproxies().get(parts.scheme or "https")
+    
+    def sdk_timeout(self, total: Optional[float] = None):
+        """
+        The settings' timeouts as an httpx.Timeout, for the vendor SDKs.
+        
+        Args:
+            total: Time limit of the request, if not the default; the
+                connect and read timeouts never exceed it
+        """
+        import httpx
+        total = total or self.total_timeout
+        return httpx.Timeout(total, connect=min(self.connect_timeout, total),
+                             read=min(self.read_timeout, total))
+    
+    def create_client(self):
+        """
+        Build an httpx.AsyncClient with these settings, for the vendor SDKs.
+        
+        Both SDKs are built on httpx, so one client (and its connection
+        pool) can serve both providers for the life of the process.
+        
+        Returns:
+            httpx.AsyncClient
+        """
+        import httpx
+        http2 = self.http2
+        if http2:
+            try:
+                import h2  # noqa: F401 - required by httpx for HTTP/2
+            except ImportError:
+                print("Warning: HTTP/2 needs the h2 package (pip install 'httpx[http2]'); "
+                      "using HTTP/1.1", file=sys.stderr)
+                http2 = False
+        
+        options = dict(
+            timeout=self.sdk_timeout(),
+            limits=httpx.Limits(max_connections=self.max_connections,
+                                max_keepalive_connections=self.max_keepalive,
+                                keepalive_expiry=self.keepalive_expiry),
+            http2=http2
+        )
+        if not self.proxy:
+            return httpx.AsyncClient(**options)
+        try:
+            return httpx.AsyncClient(proxy=self.proxy, **options)
+        except TypeError:
+            # httpx before 0.26 only takes 'proxies'
+            return httpx.AsyncClient(proxies=self.proxy, **options)
+
+
+class _Connection:
+    """One open HTTP/1.1 connection of a LeanTransport."""
+    
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """
+        Wrap an open connection.
+        
+        Args:
+            reader: Stream to read responses from
+            writer: Stream to write requests to
+        """
+        self.reader = reader
+        self.writer = writer
+        self.idle_since = 0.0
+    
+    @property
+    def closed(self) -> bool:
+        """Whether the connection was closed (by either side)."""
+        return self.writer.is_closing() or self.reader.at_eof()
+    
+    def close(self):
+        """Close the connection."""
+        self.writer.close()
+
+
+class LeanTransport:
+    """
+    Minimal keep-alive HTTP/1.1 client for JSON APIs, on asyncio.
+    
+    Speaks just enough HTTP over asyncio streams (Content-Length and
+    chunked bodies, server-sent events) that no third-party HTTP stack has
+    to be imported. Connections to the host are pooled: a request reuses
+    an idle connection or opens a new one, so concurrent requests run in
+    parallel and the number of connections follows the concurrency.
+    Cancelling the task awaiting a request closes its connection, which
+    also tells the server to stop generating. An HTTP proxy is reached
+    with a CONNECT tunnel for HTTPS APIs.
+    """
+    
+    def __init__(self, base_url: str, headers: Optional[Dict[str, str]] = None,
+                 settings: Optional[HTTPSettings] = None):
+        """
+        Initialize lean transport.
+        
+        Args:
+            base_url: Base URL of the API (e.g. https://api.openai.com/v1)
+            headers: Headers sent with every request
+            settings: Timeouts, keep-alive and proxy (default:
+                HTTPSettings()); the request timeout defaults to its
+                total timeout
+        """
+        self.settings = settings or HTTPSettings()
+        parts = urlsplit(base_url)
+        self.scheme = parts.scheme or "https"
+        self.host = parts.hostname or ""
+        self.port = parts.port or (443 if self.scheme == "https" else 80)
+        self.base_path = parts.path.rstrip("/")
+        self.headers = dict(headers or {})
+        self.timeout = self.settings.total_timeout
+        self._idle: List[_Connection] = []
+        self._ssl_context = None
+        
+        default_port = 443 if self.scheme == "https" else 80
+        self._host_header = self.host if self.port == default_port else f"{self.host}:{self.port}"
+        
+        proxy = self.settings.proxy_for(base_url)
+        self._proxy = urlsplit(proxy if "://" in proxy else f"http://{proxy}") if proxy else None
+        self._proxy_headers: Dict[str, str] = {}
+        if self._proxy is not None and self._proxy.username:
+            credentials = f"{unquote(self._proxy.username)}:{unquote(self._proxy.password or '')}"
+            self._proxy_headers["Proxy-Authorization"] = \
+                "Basic " + base64.b64encode(credentials.encode("utf-8")).decode("ascii")
+    
+    @property
+    def connected(self) -> bool:
+        """Whether an idle connection is open."""
+        return any(not connection.closed for connection in self._idle)
+    
+    async def connect(self, timeout: Optional[float] = None):
+        """
+        Open a connection to the API host if none is open yet.
+        
+        Args:
+            timeout: Connection timeout in seconds
+        """
+        if not self.connected:
+            self._release(await self._open(timeout or self.timeout))
+    
+    @property
+    def _read_timeout(self) -> float:
+        """Longest wait for a response to start or a stream to go on."""
+        return self.settings.read_timeout or self.timeout
+    
+    def close(self):
+        """Close the idle connections; connections in use close when cancelled."""
+        for connection in self._idle:
+            connection.close()
+        self._idle = []
+    
+    async def post_json(self, path: str, payload: Dict[str, Any],
+                        timeout: Optional[float] = None) -> Dict[str, Any]:
+        """
+        POST a JSON payload and return the decoded JSON response.
+        
+        Args:
+            path: Request path relative to the base URL
+            payload: JSON-serializable request body
+            timeout: Timeout in seconds for the whole request
+        
+        Returns:
+            Decoded response body
+        
+        Raises:
+            AuthenticationError: On 401/403 responses
+            RateLimitError: On 429 responses
+            APIError: On any other failure, including timeouts
+        """
+        body = json.dumps(payload).encode("utf-8")
+        return self._decode_json(await self.request("POST", path, body, "application/json", timeout))
+    
+    async def get_json(self, path: str, timeout: Optional[float] = None) -> Dict[str, Any]:
+        """
+        GET a resource and return the decoded JSON response.
+        
+        Args:
+            path: Request path relative to the base URL
+            timeout: Timeout in seconds for the whole request
+        
+        Returns:
+            Decoded response body
+        
+        Raises:
+            APIError: As for post_json
+        """
+        return self._decode_json(await self.request("GET", path, timeout=timeout))
+    
+    async def request(self, method: str, path: str, body: bytes = b"",
+                      content_type: Optional[str] = None, timeout: Optional[float] = None) -> bytes:
+        """
+        Send a request and return the raw body of a successful response.
+        
+        Args:
+            method: HTTP method
+            path: Request path relative to the base URL
+            body: Request body
+            content_type: Content-Type of the body, if any
+            timeout: Timeout in seconds for the whole request
+        
+        Returns:
+            Response body
+        
+        Raises:
+            AuthenticationError: On 401/403 responses
+            RateLimitError: On 429 responses
+            APIError: On any other failure, including timeouts
+        """
+        headers = dict(self.headers)
+        if content_type:
+            headers["Content-Type"] = content_type
+        timeout = timeout or self.timeout
+        
+        try:
+            status, response_headers, data = await asyncio.wait_for(
+                self._request(method, path, body, headers, timeout), timeout
+            )
+        except asyncio.TimeoutError:
+            raise APITimeoutError(f"Request timed out after {timeout:g}s")
+        
+        raise_for_status(status, data, response_headers)
+        return data
+    
+    @staticmethod
+    def _decode_json(data: bytes) -> Dict[str, Any]:
+        """Decode a JSON response body."""
+        try:
+            return json.loads(data)
+        except ValueError as e:
+            raise APIError(f"Invalid JSON in response: {e}")
+    
+    async def stream_json(self, path: str, payload: Dict[str, Any],
+                          timeout: Optional[float] = None) -> AsyncIterator[Dict[str, Any]]:
+        """
+        POST a JSON payload and yield the decoded server-sent events.
+        
+        Closing the generator before the stream ends closes the connection,
+        which tells the server to stop generating.
+        
+        Args:
+            path: Request path relative to the base URL
+            payload: JSON-serializable request body
+            timeout: Timeout in seconds for the response and for each event
+        
+        Yields:
+            Decoded data of each event, up to OpenAI's [DONE] marker
+        
+        Raises:
+            AuthenticationError: On 401/403 responses
+            RateLimitError: On 429 responses
+            APIError: On any other failure, including timeouts
+        """
+        body = json.dumps(payload).encode("utf-8")
+        headers = {**self.headers, "Content-Type": "application/json", "Accept": "text/event-stream"}
+        timeout = timeout or self.timeout
+        
+        connection = None
+        response_headers: Dict[str, str] = {}
+        lines = None
+        finished = False
+        try:
+            connection, status, response_headers = await self._with_timeout(
+                self._send("POST", path, body, headers, timeout), timeout
+            )
+            if status >= 400:
+                data = await self._with_timeout(self._read_body(connection, response_headers), timeout)
+                finished = True
+                raise_for_status(status, data, response_headers)
+            
+            # Each event may take up to the read timeout, the whole stream
+            # is bounded by the caller
+            event_timeout = min(self._read_timeout, timeout)
+            lines = self._iter_lines(connection, response_headers)
+            while True:
+                line = await self._with_timeout(lines.__anext__(), event_timeout, end=StopAsyncIteration)
+                if line is None:
+                    finished = True
+                    break
+                line = line.strip()
+                if not line.startswith(b"data:"):
+                    continue
+                data = line[5:].strip()
+                if data == b"[DONE]":
+                    # Drain the rest so the connection can be reused
+                    while await self._with_timeout(lines.__anext__(), event_timeout, end=StopAsyncIteration):
+                        pass
+                    finished = True
+                    break
+                try:
+                    event = json.loads(data)
+                except ValueError as e:
+                    raise APIError(f"Invalid JSON in event: {e}", status)
+                yield event
+        finally:
+            if lines is not None:
+                await lines.aclose()
+            if connection is not None:
+                if finished and not self._will_close(response_headers):
+                    self._release(connection)
+                else:
+                    connection.close()
+    
+    async def _open(self, timeout: float) -> _Connection:
+        """Open a new connection to the API host, through the proxy if there is one."""
+        if self.scheme == "https" and self._ssl_context is None:
+            self._ssl_context = ssl.create_default_context()
+        try:
+            reader, writer = await asyncio.wait_for(
+                self._open_streams(), min(self.settings.connect_timeout or timeout, timeout)
+            )
+        except asyncio.TimeoutError:
+            raise APITimeoutError("Connection error: timed out connecting")
+        except OSError as e:
+            raise APIError(f"Connection error: {e}")
+        return _Connection(reader, writer)
+    
+    async def _open_streams(self) -> Tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+        """Open the TCP (and TLS) streams of a new connection."""
+        server_hostname = self.host if self._ssl_context else None
+        if self._proxy is None:
+            return await asyncio.open_connection(
+                self.host, self.port, ssl=self._ssl_context, server_hostname=server_hostname
+            )
+        
+        proxy_port = self._proxy.port or 80
+        if self.scheme != "https":
+            # Plain HTTP goes to the proxy with absolute request targets
+            return await asyncio.open_connection(self._proxy.hostname, proxy_port)
+        
+        # HTTPS goes through a CONNECT tunnel, set up on a bare socket so
+        # that TLS can start on it once the proxy has answered
+        loop = asyncio.get_running_loop()
+        family, kind, proto, _, address = (await loop.getaddrinfo(
+            self._proxy.hostname, proxy_port, type=socket.SOCK_STREAM
+        ))[0]
+        sock = socket.socket(family, kind, proto)
+        try:
+            sock.setblocking(False)
+            await loop.sock_connect(sock, address)
+            head = [f"CONNECT {self.host}:{self.port} HTTP/1.1", f"Host: {self.host}:{self.port}"]
+            head += [f"{name}: {value}" for name, value in self._proxy_headers.items()]
+            await loop.sock_sendall(sock, ("\r\n".join(head) + "\r\n\r\n").encode("latin-1"))
+            
+            response = b""
+            while b"\r\n\r\n" not in response:
+                chunk = await loop.sock_recv(sock, 4096)
+                if not chunk:
+                    raise ConnectionResetError("Proxy closed the connection")
+                response += chunk
+            status_line = response.split(b"\r\n", 1)[0]
+            parts = status_line.split(None, 2)
+            if len(parts) < 2 or parts[1] != b"200":
+                raise APIError(f"Connection error: proxy refused the tunnel: "
+                               f"{status_line.decode('latin-1', 'replace')}")
+            
+            return await asyncio.open_connection(
+                sock=sock, ssl=self._ssl_context, server_hostname=server_hostname
+            )
+        except BaseException:
+            sock.close()
+            raise
+    
+    def _acquire_idle(self) -> Optional[_Connection]:
+        """Take an open idle connection from the pool, if any and not expired."""
+        expiry = self.settings.keepalive_expiry
+        now = time.monotonic()
+        while self._idle:
+            connection = self._idle.pop()
+            if connection.closed or (expiry and now - connection.idle_since > expiry):
+                connection.close()
+                continue
+            return connection
+        return None
+    
+    def _release(self, connection: _Connection):
+        """Return a connection whose response was fully read to the pool."""
+        if connection.closed or len(self._idle) >= self.settings.max_keepalive:
+            connection.close()
+        else:
+            connection.idle_since = time.monotonic()
+            self._idle.append(connection)
+    
+    async def _with_timeout(self, awaitable, timeout: float, end=None):
+        """
+        Await with a timeout, mapping timeouts to APIError.
+        
+        Args:
+            awaitable: What to await
+            timeout: Timeout in seconds
+            end: Exception type that signals the end of an iterator; mapped to None
+        """
+        try:
+            return await asyncio.wait_for(awaitable, timeout)
+        except asyncio.TimeoutError:
+            raise APITimeoutError(f"Request timed out after {timeout:g}s")
+        except Exception as e:
+            if end is not None and isinstance(e, end):
+                return None
+            raise
+    
+    async def _request(self, method: str, path: str, body: bytes, headers: Dict[str, str],
+                       timeout: float):
+        """Send a request and read the whole response, returning (status, headers, body)."""
+        connection, status, response_headers = await self._send(method, path, body, headers, timeout)
+        try:
+            data = await self._read_body(connection, response_headers)
+        except BaseException:
+            # Cancelled or failed mid-response: the connection state is unknown
+            connection.close()
+            raise
+        if self._will_close(response_headers):
+            connection.close()
+        else:
+            self._release(connection)
+        return status, response_headers, data
+    
+    async def _send(self, method: str, path: str, body: bytes, headers: Dict[str, str],
+                    timeout: float):
+        """
+        Send a request and read the response head.
+        
+        Uses an idle connection if there is one, and retries once on a new
+        connection if the idle one turns out to be stale.
+        
+        Returns:
+            Tuple of the connection, the status code and the response
+            headers (lowercase keys); the caller must read the body
+        """
+        target = f"{self.base_path}{path}"
+        if self._proxy is not None and self.scheme != "https":
+            target = f"{self.scheme}://{self._host_header}{target}"
+            headers = {**headers, **self._proxy_headers}
+        head = [f"{method} {target} HTTP/1.1", f"Host: {self._host_header}",
+                f"Content-Length: {len(body)}"]
+        head += [f"{name}: {value}" for name, value in headers.items()]
+        request = ("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + body
+        
+        while True:
+            connection = self._acquire_idle()
+            reused = connection is not None
+            if not reused:
+                connection = await self._open(timeout)
+            try:
+                connection.writer.write(request)
+                await connection.writer.drain()
+                try:
+                    status_line = await asyncio.wait_for(
+                        connection.reader.readline(), min(self._read_timeout, timeout)
+                    )
+                except asyncio.TimeoutError:
+                    raise APITimeoutError(
+                        f"Request timed out after {min(self._read_timeout, timeout):g}s "
+                        f"waiting for the response"
+                    )
+                if not status_line:
+                    raise ConnectionResetError("Remote end closed connection without response")
+                
+                parts = status_line.decode("latin-1").split(None, 2)
+                if len(parts) < 2 or not parts[0].startswith("HTTP/") or not parts[1].isdigit():
+                    raise APIError(f"Invalid response: {status_line!r}")
+                if int(parts[1]) < 400:
+                    mark_first_byte()
+                
+                response_headers = {"http-version": parts[0]}
+                while True:
+                    line = await connection.reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    response_headers[name.strip().lower()] = value.strip()
+                return connection, int(parts[1]), response_headers
+            except (ConnectionResetError, BrokenPipeError, asyncio.IncompleteReadError) as e:
+                connection.close()
+                if reused:
+                    continue
+                raise APIError(f"Connection error: {e}")
+            except OSError as e:
+                connection.close()
+                raise APIError(f"Connection error: {e}")
+            except BaseException:
+                # Cancelled (or failed) mid-request: the connection state is unknown
+                connection.close()
+                raise
+    
+    async def _read_body(self, connection: _Connection, response_headers: Dict[str, str]) -> bytes:
+        """Read a whole response body."""
+        chunks = []
+        async for chunk in self._iter_body(connection, response_headers):
+            chunks.append(chunk)
+        return b"".join(chunks)
+    
+    async def _iter_lines(self, connection: _Connection,
+                          response_headers: Dict[str, str]) -> AsyncIterator[bytes]:
+        """Yield the lines of a response body as they arrive."""
+        buffer = b""
+        async for chunk in self._iter_body(connection, response_headers):
+            buffer += chunk
+            while b"\n" in buffer:
+                line, buffer = buffer.split(b"\n", 1)
+                yield line + b"\n"
+        if buffer:
+            yield buffer
+    
+    async def _iter_body(self, connection: _Connection,
+                         response_headers: Dict[str, str]) -> AsyncIterator[bytes]:
+        """Yield a response body as it arrives, honoring its framing."""
+        reader = connection.reader
+        try:
+            if "chunked" in response_headers.get("transfer-encoding", "").lower():
+                while True:
+                    size = int((await reader.readline()).split(b";")[0].strip() or b"0", 16)
+                    if size == 0:
+                        # Skip trailers up to the final empty line
+                        while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                            pass
+                        return
+                    yield await reader.readexactly(size)
+                    await reader.readline()
+            elif "content-length" in response_headers:
+                remaining = int(response_headers["content-length"])
+                while remaining > 0:
+                    chunk = await reader.read(min(remaining, 65536))
+                    if not chunk:
+                        raise asyncio.IncompleteReadError(b"", remaining)
+                    remaining -= len(chunk)
+                    yield chunk
+            else:
+                # Delimited by the server closing the connection
+                while True:
+                    chunk = await reader.read(65536)
+                    if not chunk:
+                        connection.close()
+                        return
+                    yield chunk
+        except (OSError, ValueError, asyncio.IncompleteReadError) as e:
+            connection.close()
+            raise APIError(f"Connection error: {e}")
+    
+    @staticmethod
+    def _will_close(response_headers: Dict[str, str]) -> bool:
+        """Whether the server closes the connection after this response."""
+        if response_headers.get("connection", "").lower() == "close":
+            return True
+        return response_headers.get("http-version") == "HTTP/1.0" and \
+            response_headers.get("connection", "").lower() != "keep-alive"
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Per-request usage for tinycode.
+Lets a caller see the tokens the provider reported for the requests the
+current task makes, and when their first response byte arrived, while
+the clients keep their running totals.
+"""
+
+import time
+import contextvars
+from contextlib import contextmanager
+from typing import Dict, Any, Iterator, Optional
+
+
+# Usage of the requests made by the current task, see collect_usage
+_task_usage: contextvars.ContextVar = contextvars.ContextVar("task_usage", default=None)
+
+
+def record_tokens(input_tokens: Optional[int], output_tokens: Optional[int],
+                  cache_read_tokens: Optional[int] = None):
+    """Add the tokens a provider reported to the current task's usage, if collected."""
+    usage = _task_usage.get()
+    if usage is None:
+        return
+    for key, value in (("input_tokens", input_tokens), ("output_tokens", output_tokens),
+                       ("cache_read_tokens", cache_read_tokens)):
+        if value is not None:
+            usage[key] = (usage[key] or 0) + value
+
+
+def mark_first_byte():
+    """Note that a successful response started arriving, if not noted yet."""
+    usage = _task_usage.get()
+    if usage is not None and usage["first_byte"] is None:
+        usage["first_byte"] = time.perf_counter()
+
+
+@contextmanager
+def collect_usage() -> Iterator[Dict[str, Any]]:
+    """
+    Collect the usage of the requests the current task makes in the block.
+    
+    Yields:
+        Dict with 'input_tokens', 'output_tokens' and
+        'cache_read_tokens' (input tokens read from the provider's prompt
+        cache; None until a provider reports them) and 'first_byte'
+        (perf_counter time of the first successful response byte, None
+        if unknown)
+    """
+    usage = {"input_tokens": None, "output_tokens": None, "cache_read_tokens": None, "first_byte": None}
+    token = _task_usage.set(usage)
+    try:
+        yield usage
+    finally:
+        _task_usage.reset(token)
@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+Batch mode for tinycode.
+Generates commands for a whole file of queries with a bounded number of
+concurrent requests, streams the results as JSON lines, and journals
+finished items so an interrupted job can be resumed.
+"""
+
+import os
+import json
+from pathlib import Path
+from typing import Dict, Any, Iterable, Iterator, List, Optional
+
+# Providers an input line may ask for
+PROVIDERS = ("openai", "claude")
+
+# Keys a JSON input line may have
+ITEM_KEYS = ("query", "provider", "id")
+
+# Journal records written between two fsyncs
+SYNC_EVERY = 100
+
+
+def read_items(lines: Iterable[str]) -> List[Dict[str, Any]]:
+    """
+    Parse batch input.
+    
+    Each non-empty line is either a plain query or a JSON object with a
+    'query', an optional 'provider' ('openai' or 'claude') and an
+    optional 'id' that is copied to the result.
+    
+    Args:
+        lines: Input lines
+    
+    Returns:
+        Items with their 1-based input line number under 'line'
+    
+    Raises:
+        ValueError: If a JSON line is malformed or has keys other than
+            ITEM_KEYS (e.g. a misspelt 'provider')
+    """
+    items = []
+    for number, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line:
+            continue
+        
+        if not line.startswith("{"):
+            items.append({"line": number, "query": line})
+            continue
+        
+        try:
+            data = json.loads(line)
+        except ValueError as e:
+            raise ValueError(f"line {number}: invalid JSON: {e}")
+        query = data.get("query") if isinstance(data, dict) else None
+        if not isinstance(query, str) or not query.strip():
+            raise ValueError(f"line {number}: missing 'query'")
+        unknown = [key for key in data if key not in ITEM_KEYS]
+        if unknown:
+            raise ValueError(f"line {number}: unknown key '{unknown[0]}' "
+                             f"(expected {', '.join(repr(key) for key in ITEM_KEYS)})")
+        provider = data.get("provider")
+        if provider is not None and provider not in PROVIDERS:
+            raise ValueError(f"line {number}: unknown provider '{provider}'")
+        
+        item = {"line": number, "query": query.strip()}
+        if provider:
+            item["provider"] = provider
+        if "id" in data:
+            item["id"] = data["id"]
+        items.append(item)
+    
+    return items
+
+
+class BatchJournal:
+    """Append-only log of the finished items of a batch job."""
+    
+    def __init__(self, path: Path):
+        """
+        Open a journal, loading the items it already records.
+        
+        Args:
+            path: Journal file; created if missing
+        """
+        self.path = Path(path)
+        self.records = self._load()
+        self._unsynced = 0
+        
+        self.file = open(self.path, "a", encoding="utf-8")
+        if self.file.tell() and not self._ends_with_newline():
+            # Terminate a record cut short by a crash so the next one parses
+            self.file.write("\n")
+    
+    def _load(self) -> Dict[int, Dict[str, Any]]:
+        """Read the finished records, keyed by input line."""
+        records = {}
+        if not self.path.exists():
+            return records
+        
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # A record cut short by a crash
+                    continue
+                if isinstance(record, dict) and "line" in record:
+                    records[record["line"]] = record
+        return records
+    
+    def _ends_with_newline(self) -> bool:
+        """Whether the journal file ends with a complete line."""
+        with open(self.path, "rb") as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b"\n"
+    
+    def finished(self, item: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Get the journaled result of an item, if it was finished before.
+        
+        The query must match too, so a journal is never applied to an
+        edited input file line by line.
+        """
+        record = self.records.get(item["line"])
+        if record and record.get("query") == item["query"]:
+            return record
+        return None
+    
+    def append(self, record: Dict[str, Any]):
+        """Record a finished item."""
+        self.file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self.file.flush()
+        self._unsynced += 1
+        if self._unsynced >= SYNC_EVERY:
+            os.fsync(self.file.fileno())
+            self._unsynced = 0
+    
+    def close(self):
+        """Flush the journal to disk and close it."""
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.file.close()
+
+
+def _make_record(item: Dict[str, Any], result: Dict[str, Any]) -> Dict[str, Any]:
+    """Build the output record of an item from its generation result."""
+    record = {"line": item["line"]}
+    if "id" in item:
+        record["id"] = item["id"]
+    record.update({
+        "query": item["query"],
+        "command": result["command"],
+        "provider": result["api"],
+        "model": result["model"],
+        "cache": result["cache"],
+        "latency_ms": result["latency_ms"]
+    })
+    if result.get("packed"):
+        record["packed"] = True
+    if result.get("retries"):
+        record["retries"] = result["retries"]
+    if result["command"] is None:
+        record["error"] = "generation failed"
+    return record
+
+
+def run_batch(api_manager, items: List[Dict[str, Any]], system_context: str = "",
+              concurrency: int = 8, ordered: bool = True, journal: Optional[BatchJournal] = None,
+              preferred_api: Optional[str] = None, use_cache: bool = True,
+              refresh: bool = False, pack_size: int = 1) -> Iterator[Dict[str, Any]]:
+    """
+    Generate the commands of a batch.
+    
+    Items already in the journal are not requested again; new successes
+    are journaled as they arrive. Failed items are not journaled, so a
+    resumed job retries them.
+    
+    Args:
+        api_manager: APIManager to generate with
+        items: Items from read_items
+        system_context: System information context
+        concurrency: Maximum number of requests in flight
+        ordered: Yield in input order (buffering early results) rather
+            than in completion order
+        journal: Journal to resume from and record to
+        preferred_api: Provider for items that do not name one
+        use_cache: Read and write the response cache
+        refresh: Skip the cache lookup but store the new answers
+        pack_size: Queries sent per request; consecutive items for the
+            same provider are packed into one numbered request
+    
+    Yields:
+        One output record per item
+    """
+    waiting: Dict[int, Dict[str, Any]] = {}
+    requests = []
+    for index, item in enumerate(items):
+        record = journal.finished(item) if journal else None
+        if record:
+            waiting[index] = {**record, "resumed": True}
+        else:
+            requests.append({"index": index, "query": item["query"],
+                             "api": item.get("provider") or preferred_api})
+    
+    next_index = 0
+    
+    def ready() -> List[Dict[str, Any]]:
+        """Take the waiting records that are next in line (all of them if unordered)."""
+        nonlocal next_index
+        if not ordered:
+            records = list(waiting.values())
+            waiting.clear()
+            return records
+        records = []
+        while next_index in waiting:
+            records.append(waiting.pop(next_index))
+            next_index += 1
+        return records
+    
+    # Journaled items need not wait for the first request
+    yield from ready()
+    
+    results = api_manager.generate_batch(requests, system_context, concurrency, use_cache, refresh, pack_size)
+    for result in results:
+        record = _make_record(items[result["index"]], result)
+        if journal and record["command"] is not None:
+            journal.append(record)
+        waiting[result["index"]] = record
+        yield from ready()
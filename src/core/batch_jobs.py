@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Offline batch jobs for tinycode.
+Submits a whole file of queries to the providers' batch endpoints (the
+OpenAI Batch API and Anthropic Message Batches), keeps the job and its
+provider batch IDs under the config directory, and turns the results
+into the same JSON lines as batch mode once the providers are done.
+"""
+
+import os
+import json
+import time
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+
+class BatchJobStore:
+    """Submitted offline batch jobs, one JSON file per job."""
+    
+    def __init__(self, config_dir: Path):
+        """
+        Initialize job store.
+        
+        Args:
+            config_dir: tinycode configuration directory
+        """
+        self.jobs_dir = Path(config_dir) / "batch_jobs"
+    
+    def _job_file(self, job_id: str) -> Path:
+        """Path of a job's state file."""
+        return self.jobs_dir / f"{job_id}.json"
+    
+    def results_file(self, job_id: str) -> Path:
+        """Path of a job's collected results."""
+        return self.jobs_dir / f"{job_id}.jsonl"
+    
+    def save(self, job: Dict[str, Any]):
+        """Write a job's state, atomically."""
+        self.jobs_dir.mkdir(parents=True, exist_ok=True)
+        job_file = self._job_file(job["id"])
+        temp_file = job_file.with_name(f"{job_file.name}.{os.getpid()}.tmp")
+        with open(temp_file, "w", encoding="utf-8") as f:
+            json.dump(job, f, indent=2, ensure_ascii=False)
+        os.replace(temp_file, job_file)
+    
+    def load(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Read a job's state, or None if there is no such job."""
+        try:
+            with open(self._job_file(job_id), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+    
+    def list_jobs(self) -> List[Dict[str, Any]]:
+        """All jobs, oldest first."""
+        if not self.jobs_dir.exists():
+            return []
+        jobs = [self.load(path.stem) for path in self.jobs_dir.glob("*.json")]
+        return sorted((job for job in jobs if job), key=lambda job: job["created"])
+    
+    def save_results(self, job_id: str, records: List[Dict[str, Any]]):
+        """Write a job's output records, atomically."""
+        results_file = self.results_file(job_id)
+        temp_file = results_file.with_name(f"{results_file.name}.{os.getpid()}.tmp")
+        with open(temp_file, "w", encoding="utf-8") as f:
+            for record in records:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        os.replace(temp_file, results_file)
+    
+    def load_results(self, job_id: str) -> Optional[List[Dict[str, Any]]]:
+        """Read a job's output records, or None if it was not collected yet."""
+        try:
+            with open(self.results_file(job_id), "r", encoding="utf-8") as f:
+                return [json.loads(line) for line in f if line.strip()]
+        except (OSError, ValueError):
+            return None
+
+
+def submit_job(api_manager, store: BatchJobStore, items: List[Dict[str, Any]],
+               system_context: str = "", preferred_api: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Submit batch items to the providers' batch endpoints.
+    
+    Items are grouped by provider, one provider batch per group. The job
+    is saved after every submission, so the IDs of the batches already
+    submitted survive a later failure.
+    
+    Args:
+        api_manager: APIManager to submit with
+        store: Job store to record the job in
+        items: Items from core.batch.read_items
+        system_context: System information context, sent with every query
+        preferred_api: Provider for items that do not name one
+    
+    Returns:
+        The saved job
+    
+    Raises:
+        APIError: If a submission failed
+    """
+    job = {
+        "id": f"{time.strftime('%Y%m%d-%H%M%S')}-{os.urandom(2).hex()}",
+        "created": time.time(),
+        "items": [],
+        "batches": {}
+    }
+    queries: Dict[str, Dict[str, str]] = {}
+    for item in items:
+        api = api_manager.select_api(item.get("provider") or preferred_api)
+        entry = {**item, "provider": api, "custom_id": f"line-{item['line']}"}
+        job["items"].append(entry)
+        queries.setdefault(api, {})[entry["custom_id"]] = item["query"]
+    
+    for api, api_queries in queries.items():
+        batch_id = api_manager.submit_batch(api, api_queries, system_context)
+        job["batches"][api] = {
+            "batch_id": batch_id,
+            "model": api_manager.get_model(api),
+            "status": "submitted",
+            "ended": False
+        }
+        store.save(job)
+    
+    return job
+
+
+def poll_job(api_manager, store: BatchJobStore, job: Dict[str, Any]) -> bool:
+    """
+    Refresh the status of a job's provider batches that have not ended.
+    
+    Returns:
+        Whether every provider batch has ended
+    """
+    for api, batch in job["batches"].items():
+        if not batch["ended"]:
+            batch.update(api_manager.get_batch_status(api, batch["batch_id"]))
+    store.save(job)
+    return all(batch["ended"] for batch in job["batches"].values())
+
+
+def describe_job(job: Dict[str, Any]) -> str:
+    """One-line status of a job's provider batches."""
+    parts = []
+    for api, batch in job["batches"].items():
+        progress = ""
+        if batch.get("total"):
+            progress = f" {batch.get('completed', 0)}/{batch['total']}"
+            if batch.get("failed"):
+                progress += f" ({batch['failed']} failed)"
+        parts.append(f"{api} {batch['status']}{progress}")
+    return ", ".join(parts) or "nothing submitted"
+
+
+def collect_job(api_manager, store: BatchJobStore, job: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Download the results of a job whose provider batches have all ended.
+    
+    The records are kept in the store, so collecting again does not
+    download anything.
+    
+    Returns:
+        One output record per item, in input order, shaped like batch
+        mode's records; failed items have 'error' set and no command
+    """
+    records = store.load_results(job["id"])
+    if records is not None:
+        return records
+    
+    commands = {
+        api: api_manager.get_batch_results(api, batch["batch_id"])
+        for api, batch in job["batches"].items()
+    }
+    
+    records = []
+    for item in job["items"]:
+        api = item["provider"]
+        batch = job["batches"].get(api)
+        record = {"line": item["line"]}
+        if "id" in item:
+            record["id"] = item["id"]
+        record.update({
+            "query": item["query"],
+            "command": commands.get(api, {}).get(item["custom_id"]),
+            "provider": api,
+            "model": batch["model"] if batch else None,
+            "batch_id": batch["batch_id"] if batch else None
+        })
+        if record["command"] is None:
+            record["error"] = "generation failed" if batch else "not submitted"
+        records.append(record)
+    
+    store.save_results(job["id"], records)
+    return records
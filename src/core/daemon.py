@@ -0,0 +1,402 @@
+#!/usr/bin/env python3
+"""
+Background daemon for tinycode.
+Keeps configuration, API clients and system information warm in one
+long-lived process and answers queries over a per-user Unix socket.
+"""
+
+import io
+import os
+import sys
+import json
+import time
+import socket
+import struct
+import argparse
+import threading
+import socketserver
+from contextlib import nullcontext
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+# When run directly as a script, make the src directory importable
+if not __package__:
+    sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+
+# Default idle period after which the daemon exits, in seconds
+DEFAULT_IDLE_TIMEOUT = 900
+
+# Seconds the CLI waits when connecting to the daemon before falling back
+CONNECT_TIMEOUT = 0.5
+
+# Seconds the CLI waits for a reply beyond the longest a query can take
+REPLY_MARGIN = 10.0
+
+# Seconds between the daemon's checks for a stop request or idleness
+POLL_INTERVAL = 0.5
+
+# Output buffers of the request being served, by stream name
+_request_output: ContextVar[Optional[Dict[str, io.StringIO]]] = ContextVar("request_output", default=None)
+
+
+def get_socket_path() -> Path:
+    """
+    Get the per-user socket path.
+    
+    Uses $XDG_RUNTIME_DIR when available, otherwise the config directory.
+    
+    Returns:
+        Path of the Unix domain socket
+    """
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime_dir:
+        return Path(runtime_dir) / "tinycode" / "tinycoded.sock"
+    return Path.home() / ".config" / "tinycode" / "tinycoded.sock"
+
+
+def _send_message(sock: socket.socket, message: Dict[str, Any]):
+    """Send one newline-terminated JSON message."""
+    sock.sendall(json.dumps(message).encode("utf-8") + b"\n")
+
+
+def _recv_message(sock: socket.socket) -> Optional[Dict[str, Any]]:
+    """Receive one newline-terminated JSON message."""
+    data = b""
+    while not data.endswith(b"\n"):
+        chunk = sock.recv(65536)
+        if not chunk:
+            break
+        data += chunk
+    if not data.strip():
+        return None
+    return json.loads(data)
+
+
+def reply_timeout(config_manager) -> float:
+    """
+    Seconds the CLI waits for the reply to a forwarded query.
+    
+    Covers every attempt the retry policy allows, each a request and
+    possibly its re-ask without limits, both limited by the transport's
+    total timeout, plus a margin.
+    
+    Args:
+        config_manager: Configuration manager instance
+    
+    Returns:
+        Reply timeout in seconds
+    """
+    total_timeout = config_manager.get_transport_config().get("total_timeout", 30.0)
+    attempts = config_manager.get_retry_config().get("max_attempts", 3)
+    return 2 * total_timeout * max(1, attempts) + REPLY_MARGIN
+
+
+def _connect(timeout: Optional[float] = CONNECT_TIMEOUT,
+             reply_timeout: Optional[float] = None) -> Optional[socket.socket]:
+    """
+    Connect to the daemon socket, or return None if no daemon is listening.
+    
+    Args:
+        timeout: Seconds to wait for the connection
+        reply_timeout: Seconds each later read may wait (None: no limit)
+    """
+    socket_path = get_socket_path()
+    if not socket_path.exists():
+        return None
+    
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(timeout)
+    try:
+        sock.connect(str(socket_path))
+    except OSError:
+        sock.close()
+        return None
+    sock.settimeout(reply_timeout)
+    return sock
+
+
+def forward_to_daemon(argv: List[str], loading=None, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+    """
+    Forward a command line to the daemon.
+    
+    Args:
+        argv: Arguments without the program name
+        loading: Context manager shown while the daemon works (e.g. animation)
+        timeout: Seconds to wait for the reply (None: no limit)
+    
+    Returns:
+        Reply with 'stdout', 'stderr' and 'exit_code', or None if no daemon
+        is running or it did not reply in time, and the caller should
+        execute in-process
+    
+    Raises:
+        KeyboardInterrupt: If the user interrupted the wait
+    """
+    if os.environ.get("TINYCODE_NO_DAEMON"):
+        return None
+    
+    sock = _connect(reply_timeout=timeout)
+    if sock is None:
+        return None
+    
+    try:
+        with sock, (loading or nullcontext()):
+            _send_message(sock, {"argv": argv})
+            return _recv_message(sock)
+    except socket.timeout:
+        sys.stderr.write(f"tinycoded did not reply within {timeout:.0f}s; running in-process\n")
+        return None
+    except (OSError, ValueError):
+        return None
+
+
+class RequestOutput:
+    """
+    Stand-in for sys.stdout or sys.stderr that captures output per request.
+    
+    Writes go to the buffer of the request served in the current context
+    (event loop tasks inherit it from the thread that submitted them), and
+    to the original stream outside of requests.
+    """
+    
+    def __init__(self, name: str, stream):
+        """
+        Initialize the stream.
+        
+        Args:
+            name: 'stdout' or 'stderr'
+            stream: Stream to write to outside of requests
+        """
+        self.name = name
+        self.stream = stream
+    
+    def _target(self):
+        """Get the stream for the current context."""
+        output = _request_output.get()
+        return output[self.name] if output is not None else self.stream
+    
+    def write(self, text: str) -> int:
+        return self._target().write(text)
+    
+    def flush(self):
+        self._target().flush()
+    
+    def isatty(self) -> bool:
+        return False
+    
+    def __getattr__(self, name):
+        return getattr(self._target(), name)
+
+
+class DaemonRequestHandler(socketserver.StreamRequestHandler):
+    """Handles one forwarded command line per connection."""
+    
+    def handle(self):
+        """Read a request, run it and send the reply."""
+        if not self.server.is_same_user(self.request):
+            return
+        
+        try:
+            request = json.loads(self.rfile.readline())
+        except ValueError:
+            return
+        
+        if request.get("command") == "shutdown":
+            reply = {"stdout": "tinycoded stopped\n", "stderr": "", "exit_code": 0}
+            self.server.stopping = True
+        elif request.get("command") == "status":
+            reply = {"stdout": f"tinycoded running (pid {os.getpid()})\n", "stderr": "", "exit_code": 0}
+        else:
+            reply = self.server.execute(request.get("argv", []))
+        
+        try:
+            self.wfile.write(json.dumps(reply).encode("utf-8") + b"\n")
+        except (BrokenPipeError, ConnectionResetError):
+            # The CLI gave up waiting or was interrupted
+            pass
+
+
+class TinyCodeDaemon(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """
+    Unix socket server holding warm configuration and API clients.
+    
+    Each request is served on its own thread by a fresh TinyCode that
+    shares the warm managers, so concurrent queries run side by side on
+    the background event loop; output is captured per request.
+    """
+    
+    def __init__(self, socket_path: Path, idle_timeout: float = DEFAULT_IDLE_TIMEOUT):
+        """
+        Initialize the daemon and bind its socket.
+        
+        Args:
+            socket_path: Path of the Unix domain socket
+            idle_timeout: Seconds without requests before exiting
+        """
+        self.socket_path = socket_path
+        self.idle_timeout = idle_timeout
+        self.timeout = min(POLL_INTERVAL, idle_timeout)
+        self.last_request = time.monotonic()
+        self.stopping = False
+        self.app = None
+        self.config_mtime = None
+        self._reload_lock = threading.Lock()
+        
+        socket_path.parent.mkdir(parents=True, exist_ok=True, mode=0o700)
+        if socket_path.exists():
+            socket_path.unlink()
+        
+        old_umask = os.umask(0o177)
+        try:
+            super().__init__(str(socket_path), DaemonRequestHandler)
+        finally:
+            os.umask(old_umask)
+        
+        self._load_app()
+    
+    def _load_app(self):
+        """(Re)build the TinyCode instance from the current config file."""
+        from core.tinycode import TinyCode
+        
+        self.app = TinyCode(animate=False)
+        self.config_mtime = self._get_config_mtime()
+    
+    def _get_config_mtime(self) -> Optional[float]:
+        """Get the modification time of the config file, if it exists."""
+        try:
+            return self.app.config_manager.config_file.stat().st_mtime
+        except OSError:
+            return None
+    
+    def is_same_user(self, sock: socket.socket) -> bool:
+        """Check that the peer runs as the daemon's user."""
+        if not hasattr(socket, "SO_PEERCRED"):
+            return True
+        creds = sock.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize("3i"))
+        _, uid, _ = struct.unpack("3i", creds)
+        return uid == os.getuid()
+    
+    def execute(self, argv: List[str]) -> Dict[str, Any]:
+        """
+        Run a command line in-process and capture its output.
+        
+        Args:
+            argv: Arguments without the program name
+        
+        Returns:
+            Reply with 'stdout', 'stderr' and 'exit_code'
+        """
+        from core.tinycode import TinyCode, parse_args
+        
+        # Pick up edits to config.json (including --set-api-key runs)
+        with self._reload_lock:
+            if self._get_config_mtime() != self.config_mtime:
+                self._load_app()
+            warm = self.app
+        
+        # Timer, system context and history are per request; clients are shared
+        app = TinyCode(animate=False, config_manager=warm.config_manager, api_manager=warm.api_manager)
+        
+        stdout, stderr = io.StringIO(), io.StringIO()
+        exit_code = 0
+        token = _request_output.set({"stdout": stdout, "stderr": stderr})
+        try:
+            app.run(parse_args(argv))
+        except SystemExit as e:
+            exit_code = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+        finally:
+            _request_output.reset(token)
+        
+        return {"stdout": stdout.getvalue(), "stderr": stderr.getvalue(), "exit_code": exit_code}
+    
+    def process_request(self, request, client_address):
+        """Start serving a connection on its own thread."""
+        self.last_request = time.monotonic()
+        super().process_request(request, client_address)
+    
+    def handle_timeout(self):
+        """Exit after the idle timeout passes without requests."""
+        if time.monotonic() - self.last_request >= self.idle_timeout:
+            self.stopping = True
+    
+    def serve_until_idle(self):
+        """Serve requests until stopped or idle, then let those in flight finish."""
+        streams = sys.stdout, sys.stderr
+        sys.stdout, sys.stderr = RequestOutput("stdout", sys.stdout), RequestOutput("stderr", sys.stderr)
+        try:
+            while not self.stopping:
+                self.handle_request()
+        finally:
+            self.server_close()
+            if self.socket_path.exists():
+                self.socket_path.unlink()
+            sys.stdout, sys.stderr = streams
+
+
+def _daemonize():
+    """Detach from the terminal with the classic double fork."""
+    if os.fork() > 0:
+        os._exit(0)
+    os.setsid()
+    if os.fork() > 0:
+        os._exit(0)
+    
+    devnull = os.open(os.devnull, os.O_RDWR)
+    for fd in (0, 1, 2):
+        os.dup2(devnull, fd)
+    os.close(devnull)
+
+
+def _send_command(command: str) -> int:
+    """Send a control command to a running daemon."""
+    sock = _connect()
+    if sock is None:
+        print("tinycoded is not running")
+        return 1
+    with sock:
+        _send_message(sock, {"command": command})
+        reply = _recv_message(sock) or {}
+    sys.stdout.write(reply.get("stdout", ""))
+    return reply.get("exit_code", 0)
+
+
+def main():
+    """Main entry point for tinycoded."""
+    parser = argparse.ArgumentParser(
+        prog="tinycoded",
+        description="Background daemon that keeps tinycode warm"
+    )
+    parser.add_argument("--foreground", action="store_true", help="Do not detach from the terminal")
+    parser.add_argument("--idle-timeout", type=float, help="Seconds without requests before exiting")
+    parser.add_argument("--stop", action="store_true", help="Stop the running daemon")
+    parser.add_argument("--status", action="store_true", help="Show whether the daemon is running")
+    args = parser.parse_args()
+    
+    if args.stop:
+        sys.exit(_send_command("shutdown"))
+    if args.status:
+        sys.exit(_send_command("status"))
+    
+    if _connect() is not None:
+        print("tinycoded is already running")
+        sys.exit(0)
+    
+    idle_timeout = args.idle_timeout
+    if idle_timeout is None:
+        from utils.config import ConfigManager
+        idle_timeout = ConfigManager().get_daemon_config().get("idle_timeout", DEFAULT_IDLE_TIMEOUT)
+    
+    socket_path = get_socket_path()
+    if not args.foreground:
+        print(f"tinycoded listening on {socket_path}")
+        sys.stdout.flush()
+        _daemonize()
+    
+    server = TinyCodeDaemon(socket_path, idle_timeout=idle_timeout)
+    server.serve_until_idle()
+
+
+if __name__ == "__main__":
+    main()
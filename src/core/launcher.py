@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""
+Entry point for tinycode and tinycoded.
+Checks the Python version before anything else is imported. The rest of
+tinycode uses syntax and modules an older interpreter cannot even import,
+so the check lives in this module, written to parse on any Python 3.
+"""
+
+import os
+import sys
+
+# Minimum supported Python version
+MIN_PYTHON_VERSION = (3, 7)
+
+
+def check_python_version():
+    """Exit with an error if the running interpreter is too old."""
+    if sys.version_info < MIN_PYTHON_VERSION:
+        required = ".".join(str(part) for part in MIN_PYTHON_VERSION)
+        found = "%d.%d" % (sys.version_info[0], sys.version_info[1])
+        print("Error: Python %s or higher is required. Found: %s" % (required, found))
+        sys.exit(1)
+
+
+def main():
+    """Main entry point for tinycode."""
+    check_python_version()
+    from core.tinycode import main as tinycode_main
+    tinycode_main()
+
+
+def daemon_main():
+    """Main entry point for tinycoded."""
+    check_python_version()
+    from core.daemon import main as tinycoded_main
+    tinycoded_main()
+
+
+# When run directly as a script (e.g. by the bash wrapper), make the
+# src directory importable; installed packages and zipapps don't need this
+if not __package__:
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+if __name__ == "__main__":
+    main()
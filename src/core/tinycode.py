@@ -6,25 +6,46 @@ Handles CLI interface and coordinates all components.
 
 import sys
 import os
+import json
+import time
 import argparse
-from typing import Optional
+import threading
+from contextlib import nullcontext, redirect_stdout
+from typing import Optional, List
 
-# Add the src directory to the Python path
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+# When run directly as a script (e.g. by the bash wrapper), make the
+# src directory importable; installed packages and zipapps don't need this
+if not __package__:
+    sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
 from utils.config import ConfigManager
-from utils.system_info import get_system_info, format_system_context
+from utils.system_info import get_system_info, format_system_context, get_cached_system_context
+from utils.timing import PhaseTimer
 from api.api_manager import APIManager
 from ui.loading import show_loading
+from ui.output import StreamPrinter
 
 
 class TinyCode:
     """Main application class for tinycode."""
     
-    def __init__(self):
-        """Initialize the application."""
-        self.config_manager = ConfigManager()
-        self.api_manager = APIManager(self.config_manager)
+    def __init__(self, animate: bool = True, config_manager: Optional[ConfigManager] = None,
+                 api_manager: Optional[APIManager] = None):
+        """
+        Initialize the application.
+        
+        Args:
+            animate: Show the loading animation while waiting for the API
+            config_manager: Configuration to use instead of loading it
+            api_manager: API manager to share (e.g. the daemon's warm one)
+        """
+        self.animate = animate
+        self.timer = PhaseTimer()
+        with self.timer.phase("config"):
+            self.config_manager = config_manager or ConfigManager()
+            self.api_manager = api_manager or APIManager(self.config_manager)
+        self._system_context: Optional[str] = None
+        self._history = None
     
     def run(self, args):
         """
@@ -38,7 +59,7 @@ class TinyCode:
                 self._show_version()
                 return
             
-            if args.help or len(sys.argv) == 1:
+            if args.help:
                 self._show_help()
                 return
             
@@ -58,6 +79,34 @@ class TinyCode:
                 self._reset_config()
                 return
             
+            if args.history is not None:
+                self._show_history(args.history)
+                return
+            
+            if args.stats is not None:
+                self._show_stats(args.stats)
+                return
+            
+            if args.interactive:
+                self._interactive_session(args)
+                return
+            
+            if args.batch is not None:
+                self._run_batch(args)
+                return
+            
+            if args.submit_batch is not None:
+                self._submit_batch(args)
+                return
+            
+            if args.collect_batch is not None:
+                self._collect_batch(args.collect_batch, args.wait)
+                return
+            
+            if args.refresh_system_info and not args.query:
+                self._refresh_system_info()
+                return
+            
             # Main command generation
             if args.query:
                 self._generate_command(args.query, args)
@@ -80,51 +129,598 @@ class TinyCode:
             query: User's query
             args: Command line arguments
         """
-        # Get system context
-        system_context = ""
-        if self.config_manager.get_system_config().get("include_distro_in_prompt", True):
-            system_info = get_system_info()
-            system_context = format_system_context(system_info)
-        
         # Determine which API to use
-        preferred_api = None
-        if args.openai:
-            preferred_api = "openai"
-        elif args.claude:
-            preferred_api = "claude"
+        preferred_api = self._get_preferred_api(args)
         
         # Check if any API is available
-        available_apis = self.api_manager.get_available_apis()
-        if not available_apis:
-            print("Error: No API keys configured.")
-            print("Use 'tinycode --set-api-key openai YOUR_KEY' to configure OpenAI")
-            print("Use 'tinycode --set-api-key claude YOUR_KEY' to configure Claude")
-            sys.exit(1)
+        self._require_apis()
         
-        # Show loading animation
-        ui_config = self.config_manager.get_ui_config()
-        loading_message = "Thinking"
-        loading_style = ui_config.get("animation_style", "dots")
+        # Start connecting to the provider while the rest is set up locally
+        selected_api = self.api_manager.select_api(preferred_api)
+        self.api_manager.prewarm(selected_api, self.timer)
+        hedge_api = self.api_manager.get_hedge_api(selected_api, preferred_api)
+        if hedge_api:
+            self.api_manager.prewarm(hedge_api, self.timer)
         
-        with show_loading(loading_message, loading_style):
+        # Get system context
+        with self.timer.phase("system_context"):
+            system_context = self._get_system_context(refresh=args.refresh_system_info)
+        
+        # Show loading animation until the command starts streaming in
+        ui_config = self.config_manager.get_ui_config()
+        printer = self._stream_printer()
+        with self._loading() as loading:
+            if printer:
+                printer.loading = loading
+            self.api_manager.wait_for_warmup(selected_api)
+            
             # Generate command
-            command = self.api_manager.generate_command(
-                query=query,
-                system_context=system_context,
-                preferred_api=preferred_api
-            )
+            started = time.perf_counter()
+            with self.timer.phase("request"):
+                command = self.api_manager.generate_command(
+                    query=query,
+                    system_context=system_context,
+                    preferred_api=preferred_api,
+                    use_cache=not args.no_cache,
+                    refresh=args.refresh,
+                    on_text=printer.update if printer else None
+                )
+            latency_ms = (time.perf_counter() - started) * 1000
         
         # Display result
+        self._show_command(command, printer)
         if command:
-            print(command)
+            if not args.no_history:
+                self._record_history(query, command, system_context, latency_ms)
             
             # Copy to clipboard if enabled
             if ui_config.get("copy_to_clipboard", False):
                 self._copy_to_clipboard(command)
+            
+            if args.timing:
+                sys.stderr.write("\n".join(self.timer.report() + self._hedge_report() + self._retry_report() +
+                                           self._throttle_report() + self._prompt_cache_report()) + "\n")
         else:
             print("Error: Could not generate command. Please try again.")
             sys.exit(1)
     
+    def _interactive_session(self, args):
+        """
+        Answer queries in a loop until EOF or 'exit'.
+        
+        The API clients (and their kept-alive connections) and the system
+        context are shared by every query of the session. Ctrl-C cancels
+        the request in flight and returns to the prompt.
+        
+        Args:
+            args: Command line arguments
+        """
+        try:
+            import readline  # noqa: F401 - enables line editing and history for input()
+        except ImportError:
+            pass
+        
+        preferred_api = self._get_preferred_api(args)
+        self._require_apis()
+        self.api_manager.prewarm(self.api_manager.select_api(preferred_api))
+        system_context = self._get_system_context(refresh=args.refresh_system_info)
+        ui_config = self.config_manager.get_ui_config()
+        cache_options = {"use_cache": not args.no_cache, "refresh": args.refresh}
+        
+        print("tinycode interactive session (Ctrl-C cancels a request, Ctrl-D or 'exit' quits)")
+        
+        while True:
+            try:
+                query = input("tinycode> ").strip()
+            except EOFError:
+                print()
+                break
+            except KeyboardInterrupt:
+                print()
+                continue
+            
+            if not query:
+                continue
+            if query in ("exit", "quit"):
+                break
+            
+            printer = self._stream_printer()
+            try:
+                started = time.perf_counter()
+                command = self._generate_cancellable(query, system_context, preferred_api, cache_options, printer)
+                latency_ms = (time.perf_counter() - started) * 1000
+            except KeyboardInterrupt:
+                self._show_command(None, printer)
+                print("Request cancelled.")
+                continue
+            
+            self._show_command(command, printer)
+            if command:
+                if not args.no_history:
+                    self._record_history(query, command, system_context, latency_ms)
+                if ui_config.get("copy_to_clipboard", False):
+                    self._copy_to_clipboard(command)
+            else:
+                print("Error: Could not generate command. Please try again.")
+    
+    def _run_batch(self, args):
+        """
+        Generate commands for every query of a batch file, as JSON lines.
+        
+        Results go to stdout; provider errors and the summary go to stderr
+        so that stdout stays valid JSONL.
+        
+        Args:
+            args: Command line arguments
+        """
+        from core.batch import run_batch, BatchJournal
+        
+        preferred_api = self._get_preferred_api(args)
+        self._require_apis()
+        self.api_manager.prewarm(self.api_manager.select_api(preferred_api))
+        
+        batch_config = self.config_manager.get_batch_config()
+        concurrency = args.concurrency or batch_config.get("concurrency", 8)
+        order = args.order or batch_config.get("order", "input")
+        pack_size = args.pack or batch_config.get("pack_size", 1)
+        if concurrency < 1 or pack_size < 1 or order not in ("input", "completion"):
+            print("Error: Batch concurrency and pack size must be at least 1 and order 'input' or 'completion'.")
+            sys.exit(1)
+        
+        items = self._read_batch_items(args.batch)
+        try:
+            journal = BatchJournal(args.journal) if args.journal else None
+        except OSError as e:
+            print(f"Error: Cannot open journal: {e}")
+            sys.exit(1)
+        
+        system_context = self._get_system_context(refresh=args.refresh_system_info)
+        out = sys.stdout
+        started = time.perf_counter()
+        usage_before = self.api_manager.get_usage()
+        counts = {"done": 0, "failed": 0, "resumed": 0}
+        records = run_batch(
+            self.api_manager, items, system_context,
+            concurrency=concurrency,
+            ordered=order == "input",
+            journal=journal,
+            preferred_api=preferred_api,
+            use_cache=not args.no_cache,
+            refresh=args.refresh,
+            pack_size=pack_size
+        )
+        try:
+            with redirect_stdout(sys.stderr):
+                for record in records:
+                    out.write(json.dumps(record, ensure_ascii=False) + "\n")
+                    out.flush()
+                    counts["done"] += 1
+                    counts["failed"] += record["command"] is None
+                    counts["resumed"] += record.get("resumed", False)
+        except BrokenPipeError:
+            # The reader went away (e.g. piped to head): cancel the remaining requests
+            records.close()
+            os.dup2(os.open(os.devnull, os.O_WRONLY), out.fileno())
+            sys.exit(1)
+        except KeyboardInterrupt:
+            hint = "; rerun with the same --journal to resume" if journal else ""
+            sys.stderr.write(f"Batch interrupted after {counts['done']} items{hint}\n")
+            sys.exit(130)
+        finally:
+            if journal:
+                journal.close()
+        
+        elapsed = time.perf_counter() - started
+        generated = counts["done"] - counts["resumed"]
+        usage = self.api_manager.get_usage()
+        requests = usage["requests"] - usage_before["requests"]
+        tokens = sum(usage[key] - usage_before[key] for key in ("input_tokens", "output_tokens"))
+        summary = (
+            f"Batch: {counts['done']} items ({counts['resumed']} resumed, {counts['failed']} failed) "
+            f"in {elapsed:.1f}s, {generated / elapsed if elapsed else 0:.1f} items/s, {requests} requests"
+        )
+        if tokens and generated:
+            summary += f", {tokens / generated:.0f} tokens/command"
+        retries = usage["retries"] - usage_before["retries"]
+        if retries:
+            backoff = usage["backoff_seconds"] - usage_before["backoff_seconds"]
+            summary += f", {retries} retries ({backoff:.1f}s backoff)"
+        truncated = usage["truncated"] - usage_before["truncated"]
+        if truncated:
+            summary += f", {truncated} answers asked again past their output budget"
+        throttled = usage["throttled"] - usage_before["throttled"]
+        if throttled:
+            waited = usage["throttle_seconds"] - usage_before["throttle_seconds"]
+            summary += f", {throttled} requests held by the rate limit ({waited:.1f}s)"
+        sys.stderr.write(summary + "\n")
+        if counts["failed"]:
+            sys.exit(1)
+    
+    def _read_batch_items(self, source: str) -> list:
+        """Read batch items from a file or stdin ('-'), exiting on errors."""
+        from core.batch import read_items
+        
+        try:
+            if source == "-":
+                return read_items(sys.stdin)
+            with open(source, "r", encoding="utf-8") as f:
+                return read_items(f)
+        except (OSError, ValueError) as e:
+            print(f"Error: Cannot read batch: {e}")
+            sys.exit(1)
+    
+    def _submit_batch(self, args):
+        """
+        Submit a batch file to the providers' offline batch endpoints.
+        
+        Prints the local job ID to stdout; collect the results later with
+        --collect-batch.
+        
+        Args:
+            args: Command line arguments
+        """
+        from core.batch_jobs import BatchJobStore, submit_job
+        
+        preferred_api = self._get_preferred_api(args)
+        self._require_apis()
+        items = self._read_batch_items(args.submit_batch)
+        if not items:
+            print("Error: The batch has no queries.")
+            sys.exit(1)
+        
+        system_context = self._get_system_context(refresh=args.refresh_system_info)
+        job = submit_job(self.api_manager, BatchJobStore(self.config_manager.config_dir),
+                         items, system_context, preferred_api)
+        
+        batches = ", ".join(f"{api} {batch['batch_id']}" for api, batch in job["batches"].items())
+        sys.stderr.write(f"Submitted {len(items)} items as batch job {job['id']} ({batches})\n")
+        sys.stderr.write(f"Collect the results with: tinycode --collect-batch {job['id']}\n")
+        print(job["id"])
+    
+    def _collect_batch(self, job_id: str, wait: bool = False):
+        """
+        Print the results of an offline batch job as JSON lines.
+        
+        Without a job ID, lists the stored jobs with their status instead.
+        
+        Args:
+            job_id: Local job ID printed by --submit-batch, or '' to list jobs
+            wait: Poll until the job has ended rather than exiting early
+        """
+        from core.batch_jobs import BatchJobStore, poll_job, describe_job, collect_job
+        
+        store = BatchJobStore(self.config_manager.config_dir)
+        if not job_id:
+            jobs = store.list_jobs()
+            if not jobs:
+                print("No batch jobs.")
+            for job in jobs:
+                if store.load_results(job["id"]) is None:
+                    poll_job(self.api_manager, store, job)
+                    status = describe_job(job)
+                else:
+                    status = "collected"
+                created = time.strftime("%Y-%m-%d %H:%M", time.localtime(job["created"]))
+                print(f"{job['id']}  {created}  {len(job['items'])} items  {status}")
+            return
+        
+        job = store.load(job_id)
+        if not job:
+            print(f"Error: No batch job '{job_id}'. Run 'tinycode --collect-batch' to list jobs.")
+            sys.exit(1)
+        
+        interval = self.config_manager.get_batch_config().get("poll_interval", 60)
+        while store.load_results(job_id) is None and not poll_job(self.api_manager, store, job):
+            if not wait:
+                sys.stderr.write(f"Batch job {job_id} is not finished: {describe_job(job)}\n")
+                sys.stderr.write("Rerun later, or add --wait to poll until it is\n")
+                sys.exit(1)
+            sys.stderr.write(f"Waiting for batch job {job_id}: {describe_job(job)}\n")
+            time.sleep(interval)
+        
+        records = collect_job(self.api_manager, store, job)
+        for record in records:
+            sys.stdout.write(json.dumps(record, ensure_ascii=False) + "\n")
+        failed = sum(record["command"] is None for record in records)
+        sys.stderr.write(f"Batch job {job_id}: {len(records)} items ({failed} failed)\n")
+        if failed:
+            sys.exit(1)
+    
+    def _generate_cancellable(self, query: str, system_context: str, preferred_api: Optional[str],
+                              options: dict, printer: Optional[StreamPrinter] = None) -> Optional[str]:
+        """
+        Generate a command on a worker thread so Ctrl-C can abandon it.
+        
+        Args:
+            query: User's query
+            system_context: System information context
+            preferred_api: Manually specified API to use
+            options: Extra keyword arguments for APIManager.generate_command
+            printer: Printer to stream the command to
+        
+        Returns:
+            Generated command or None if generation failed
+        
+        Raises:
+            KeyboardInterrupt: If the user cancelled the request
+        """
+        result = {}
+        
+        def worker():
+            result["command"] = self.api_manager.generate_command(
+                query=query,
+                system_context=system_context,
+                preferred_api=preferred_api,
+                on_text=printer.update if printer else None,
+                **options
+            )
+        
+        thread = threading.Thread(target=worker, daemon=True)
+        with self._loading() as loading:
+            if printer:
+                printer.loading = loading
+            thread.start()
+            try:
+                while thread.is_alive():
+                    thread.join(0.1)
+            except KeyboardInterrupt:
+                self.api_manager.cancel()
+                raise
+        
+        return result.get("command")
+    
+    def _hedge_report(self) -> List[str]:
+        """Describe how the last hedged request went, for --timing."""
+        hedge = self.api_manager.last_call.get("hedge")
+        if not hedge:
+            return []
+        
+        if hedge["fired_after"] is None:
+            fired = f"{hedge['secondary']} not needed"
+        else:
+            fired = f"{hedge['secondary']} fired after {hedge['fired_after'] * 1000:.0f} ms"
+        winner = hedge["winner"] or "none"
+        return [f"Hedge: {winner} won in {hedge['latency'] * 1000:.0f} ms ({hedge['primary']} first, {fired})"]
+    
+    def _retry_report(self) -> List[str]:
+        """Describe the retries of the last request, for --timing."""
+        retries = self.api_manager.last_call.get("retries")
+        if not retries:
+            return []
+        return [f"Retries: {retries} ({self.api_manager.last_call['backoff_seconds'] * 1000:.0f} ms backoff)"]
+    
+    def _throttle_report(self) -> List[str]:
+        """Describe the wait for the local rate limit, for --timing."""
+        waited = self.api_manager.last_call.get("throttle_seconds")
+        if not waited:
+            return []
+        return [f"Rate limit: waited {waited * 1000:.0f} ms"]
+    
+    def _prompt_cache_report(self) -> List[str]:
+        """Describe the input tokens read from the provider's prompt cache, for --timing."""
+        input_tokens = self.api_manager.last_call.get("input_tokens")
+        if input_tokens is None:
+            return []
+        cache_read_tokens = self.api_manager.last_call.get("cache_read_tokens")
+        if cache_read_tokens is None:
+            # E.g. an OpenAI stream closed before its usage chunk
+            return [f"Prompt cache: not reported for this request ({input_tokens:,} input tokens)"]
+        return [f"Prompt cache: {cache_read_tokens:,} of {input_tokens:,} input tokens read from the cache"]
+    
+    def _get_preferred_api(self, args) -> Optional[str]:
+        """Get the API forced on the command line, if any."""
+        if args.openai:
+            return "openai"
+        if args.claude:
+            return "claude"
+        return None
+    
+    def _require_apis(self):
+        """Exit with instructions if no API key is configured."""
+        if not self.api_manager.get_available_apis():
+            print("Error: No API keys configured.")
+            print("Use 'tinycode --set-api-key openai YOUR_KEY' to configure OpenAI")
+            print("Use 'tinycode --set-api-key claude YOUR_KEY' to configure Claude")
+            sys.exit(1)
+    
+    def _loading(self):
+        """Get the loading animation context, or a no-op if disabled."""
+        ui_config = self.config_manager.get_ui_config()
+        if self.animate and ui_config.get("loading_animation", True):
+            return show_loading("Thinking", ui_config.get("animation_style", "dots"))
+        return nullcontext()
+    
+    def _stream_printer(self) -> Optional[StreamPrinter]:
+        """
+        Get a printer for streamed output, or None if streaming is disabled.
+        
+        Streaming also pays off when stdout is not a terminal, since the
+        stream is closed after the first line; the command is then only
+        printed once complete.
+        """
+        if not self.config_manager.get_ui_config().get("stream_output", True):
+            return None
+        return StreamPrinter(live=self.animate and sys.stdout.isatty())
+    
+    def _show_command(self, command: Optional[str], printer: Optional[StreamPrinter]):
+        """
+        Print the generated command (or end a partially streamed one).
+        
+        Args:
+            command: Generated command, or None if generation failed
+            printer: Printer the command was streamed to
+        """
+        if printer:
+            printer.finish(command)
+        elif command:
+            print(command)
+    
+    def _get_system_context(self, refresh: bool = False) -> str:
+        """
+        Get the system context for the prompt.
+        
+        When system.cache_system_info is on, the persisted snapshot is
+        checked on every call (a few stat calls), so long-lived processes
+        such as the daemon notice OS upgrades; otherwise the system is
+        detected once per TinyCode instance.
+        
+        Args:
+            refresh: Detect again, ignoring both the memo and the snapshot
+        
+        Returns:
+            Formatted system context, or an empty string if disabled
+        """
+        system_config = self.config_manager.get_system_config()
+        if not system_config.get("include_distro_in_prompt", True):
+            return ""
+        
+        if system_config.get("cache_system_info", True):
+            snapshot_file = self.config_manager.config_dir / "system_info.json"
+            self._system_context = get_cached_system_context(snapshot_file, refresh=refresh)
+        elif self._system_context is None or refresh:
+            system_info = get_system_info()
+            self._system_context = format_system_context(system_info)
+        
+        return self._system_context
+    
+    def _refresh_system_info(self):
+        """Detect the system again and update the persisted snapshot."""
+        snapshot_file = self.config_manager.config_dir / "system_info.json"
+        self._system_context = get_cached_system_context(snapshot_file, refresh=True)
+        print("System information refreshed:")
+        print(f"  {self._system_context}")
+    
+    def _get_history(self):
+        """Get the query history, or None if it is disabled or unavailable."""
+        if self._history is not None:
+            return self._history
+        
+        history_config = self.config_manager.get_history_config()
+        if not history_config.get("enabled", True):
+            return None
+        
+        try:
+            from utils.history import History
+            self._history = History(
+                self.config_manager.config_dir / "history.db",
+                max_entries=history_config.get("max_entries", 10000),
+                retention_days=history_config.get("retention_days", 365)
+            )
+        except Exception as e:
+            print(f"Warning: History unavailable: {e}", file=sys.stderr)
+            return None
+        
+        return self._history
+    
+    def _record_history(self, query: str, command: str, system_context: str, latency_ms: float):
+        """
+        Append an answered query to the history.
+        
+        Args:
+            query: User's query
+            command: Generated command
+            system_context: System information context
+            latency_ms: Time taken to produce the command
+        """
+        history = self._get_history()
+        if not history:
+            return
+        
+        last_call = self.api_manager.last_call
+        try:
+            history.record(
+                query, command,
+                provider=last_call.get("api"),
+                model=last_call.get("model"),
+                latency_ms=latency_ms,
+                cache=last_call.get("cache"),
+                system_context=system_context
+            )
+        except Exception as e:
+            print(f"Warning: Could not record history: {e}", file=sys.stderr)
+    
+    def _show_history(self, text: str):
+        """
+        Search the history and print the matches.
+        
+        Args:
+            text: Search words; empty shows the most recent entries
+        """
+        history = self._get_history()
+        if not history:
+            print("History is disabled. Set history.enabled to true in the config to keep it.")
+            return
+        
+        entries = history.search(text, limit=self.config_manager.get_history_config().get("search_limit", 20))
+        if not entries:
+            print("No matching history entries.")
+            return
+        
+        for entry in entries:
+            when = time.strftime("%Y-%m-%d %H:%M", time.localtime(entry["created_at"]))
+            source = entry["provider"] or "unknown"
+            if entry["cache"] in ("hit", "stale", "similar"):
+                source += ", cached"
+            print(f"{when}  [{source}] {entry['query']}")
+            print(f"    {entry['command']}")
+    
+    def _show_stats(self, days: int):
+        """
+        Print usage and latency statistics from the ledger.
+        
+        Args:
+            days: Number of days covered, today included
+        """
+        if not self.config_manager.get_ledger_config().get("enabled", True):
+            print("The usage ledger is disabled. Set ledger.enabled to true in the config to keep it.")
+            return
+        
+        try:
+            from utils.ledger import Ledger
+            report = Ledger(self.config_manager.config_dir / "ledger.db").report(days)
+        except Exception as e:
+            print(f"Error: Could not read the usage ledger: {e}")
+            sys.exit(1)
+        
+        if not report["days"]:
+            print(f"No requests recorded in the last {days} days.")
+            return
+        
+        def number(value, unit=""):
+            return f"{value:,.0f}{unit}" if value is not None else "-"
+        
+        print(f"Usage over the last {days} days")
+        print(f"\n{'Provider / model':<40} {'Requests':>9} {'Failed':>7} {'Retries':>7} {'p50':>8} {'p95':>8} "
+              f"{'p99':>8} {'TTFB p50':>9} {'Tokens in':>11} {'Tokens out':>11} {'Tokens/s':>9}")
+        for entry in report["models"]:
+            print(f"{entry['provider'] + ' / ' + entry['model']:<40} {number(entry['requests']):>9} "
+                  f"{number(entry['failed']):>7} {number(entry['retries']):>7} {number(entry['p50'], ' ms'):>8} "
+                  f"{number(entry['p95'], ' ms'):>8} {number(entry['p99'], ' ms'):>8} "
+                  f"{number(entry['ttfb_p50'], ' ms'):>9} {number(entry['input_tokens']):>11} "
+                  f"{number(entry['output_tokens']):>11} {number(entry['tokens_per_second']):>9}")
+        
+        cached_models = [entry for entry in report["models"] if entry["cache_read_tokens"]]
+        if cached_models:
+            print(f"\n{'Prompt cache':<40} {'Read':>7} {'TTFB p50 cached':>16} {'uncached':>9}")
+            for entry in cached_models:
+                share = entry["cache_read_tokens"] / entry["input_tokens"] if entry["input_tokens"] else 0.0
+                print(f"{entry['provider'] + ' / ' + entry['model']:<40} {share:>7.1%} "
+                      f"{number(entry['ttfb_p50_cached'], ' ms'):>16} {number(entry['ttfb_p50_uncached'], ' ms'):>9}")
+        
+        cache = dict(report["cache"])
+        requests = cache.pop("requests", 0)
+        cached = sum(cache.values())
+        if cached:
+            kinds = ", ".join(f"{kind} {count:,}" for kind, count in sorted(cache.items()))
+            print(f"\nCache: {cached / (cached + requests):.1%} of answers from the cache ({kinds})")
+        else:
+            print("\nCache: no answers from the cache")
+        
+        print(f"\n{'Day':<12} {'Requests':>9} {'Failed':>7} {'Cached':>7} {'Tokens in':>11} {'Tokens out':>11}")
+        for day in report["days"]:
+            print(f"{day['day']:<12} {number(day['requests']):>9} {number(day['failed']):>7} "
+                  f"{number(day['cached']):>7} {number(day['input_tokens']):>11} {number(day['output_tokens']):>11}")
+    
     def _set_api_key(self, api_name: str, api_key: str):
         """
         Set API key for specified service.
@@ -184,18 +780,33 @@ class TinyCode:
             api_config = config.get(api_name, {})
             enabled = api_config.get("enabled", False)
             model = api_config.get("model", "Unknown")
-            print(f"  {api_name}: {'✓' if enabled else '✗'} ({model})")
+            key_count = len(self.config_manager.get_api_keys(api_name))
+            keys = f", {key_count} keys" if key_count > 1 else ""
+            print(f"  {api_name}: {'✓' if enabled else '✗'} ({model}{keys})")
         
         # General settings
         print(f"\nGeneral Settings:")
         print(f"  Auto-select API: {config.get('auto_select_api', True)}")
         print(f"  Preferred API: {config.get('preferred_api', 'openai')}")
+        selection_policy = config.get("selection_policy", "static")
+        print(f"  Selection policy: {selection_policy}")
+        if selection_policy == "adaptive":
+            adaptive_config = config.get("adaptive", {})
+            print(f"    Half life: {adaptive_config.get('half_life', 3600)}s, "
+                  f"exploration: {adaptive_config.get('exploration', 0.05):.0%}")
+            for api_name, stats in self.api_manager.get_api_stats().items():
+                if stats and stats["p50"] is not None:
+                    print(f"    {api_name}: p50 {stats['p50'] * 1000:.0f} ms, p95 {stats['p95'] * 1000:.0f} ms, "
+                          f"{stats['error_rate']:.0%} errors ({stats['samples']:.1f} recent calls)")
+                else:
+                    print(f"    {api_name}: no recent calls")
         
         # System settings
         system_config = config.get("system", {})
         print(f"\nSystem Settings:")
         print(f"  Auto-detect distro: {system_config.get('auto_detect_distro', True)}")
         print(f"  Include distro in prompt: {system_config.get('include_distro_in_prompt', True)}")
+        print(f"  Cache system info: {system_config.get('cache_system_info', True)}")
         
         # UI settings
         ui_config = config.get("ui", {})
@@ -203,6 +814,109 @@ class TinyCode:
         print(f"  Loading animation: {ui_config.get('loading_animation', True)}")
         print(f"  Animation style: {ui_config.get('animation_style', 'dots')}")
         print(f"  Copy to clipboard: {ui_config.get('copy_to_clipboard', False)}")
+        print(f"  Stream output: {ui_config.get('stream_output', True)}")
+        
+        # Hedging settings
+        hedging_config = config.get("hedging", {})
+        print(f"\nHedging Settings:")
+        print(f"  Enabled: {hedging_config.get('enabled', False)}")
+        print(f"  Delay: {hedging_config.get('delay', 1.0)}s")
+        
+        # Retry settings
+        retry_config = config.get("retry", {})
+        print(f"\nRetry Settings:")
+        print(f"  Max attempts: {retry_config.get('max_attempts', 3)}")
+        print(f"  Backoff: {retry_config.get('base_delay', 0.5)}s doubling up to {retry_config.get('max_delay', 8.0)}s, with jitter")
+        print(f"  Max Retry-After: {retry_config.get('max_retry_after', 30.0)}s")
+        
+        # Key pool settings
+        print(f"\nKey Pool Settings:")
+        print(f"  Cool-off after a rate limit: {config.get('key_pool', {}).get('cooldown', 30.0)}s")
+        
+        # Rate limit settings
+        rate_limit_config = config.get("rate_limit", {})
+        print(f"\nRate Limit Settings:")
+        print(f"  Enabled: {rate_limit_config.get('enabled', False)}")
+        for api in ("openai", "claude"):
+            limits = rate_limit_config.get(api, {})
+            print(f"  {api}: {limits.get('requests_per_minute', 0) or 'unlimited'} requests/min, "
+                  f"{limits.get('tokens_per_minute', 0) or 'unlimited'} tokens/min")
+        print(f"  Max wait: {rate_limit_config.get('max_wait', 60)}s")
+        
+        # Transport settings
+        transport_config = config.get("transport", {})
+        print(f"\nTransport Settings:")
+        print(f"  Mode: {transport_config.get('mode', 'sdk')}")
+        print(f"  Timeouts: connect {transport_config.get('connect_timeout', 5.0)}s, "
+              f"read {transport_config.get('read_timeout', 30.0)}s, "
+              f"total {transport_config.get('total_timeout', 30.0)}s")
+        print(f"  Connections: {transport_config.get('max_connections', 20)} max, "
+              f"{transport_config.get('max_keepalive', 10)} kept alive for "
+              f"{transport_config.get('keepalive_expiry', 60.0)}s")
+        print(f"  HTTP/2: {transport_config.get('http2', False)}")
+        print(f"  Proxy: {transport_config.get('proxy') or 'from environment'}")
+        
+        # Prompt cache settings
+        prompt_cache_config = config.get("prompt_cache", {})
+        print(f"\nPrompt Cache Settings:")
+        print(f"  Enabled: {prompt_cache_config.get('enabled', True)}")
+        from api.prompts import STABLE_PREFIX_TOKENS, min_cacheable_tokens
+        for api in ("openai", "claude"):
+            model = self.api_manager.get_model(api)
+            minimum = min_cacheable_tokens(model)
+            if minimum is None:
+                status = "model does not cache prompts, few-shot examples not sent"
+            elif STABLE_PREFIX_TOKENS < minimum:
+                status = f"below the model's minimum of {minimum} tokens, few-shot examples not sent"
+            elif api == "claude" and not prompt_cache_config.get("enabled", True):
+                status = "disabled, few-shot examples not sent"
+            else:
+                status = f"cached (minimum {minimum} tokens)"
+            print(f"  {api} ({model}): prefix of ~{STABLE_PREFIX_TOKENS} tokens, {status}")
+        
+        # Output budget settings
+        output_budget_config = config.get("output_budget", {})
+        print(f"\nOutput Budget Settings:")
+        print(f"  Enabled: {output_budget_config.get('enabled', True)}")
+        print(f"  Stop sequences: {output_budget_config.get('stop_sequences', True)}")
+        if output_budget_config.get("enabled", True):
+            print(f"  Covers: {output_budget_config.get('quantile', 0.99):.0%} of answers "
+                  f"x{output_budget_config.get('headroom', 1.5)}, at least "
+                  f"{output_budget_config.get('min_tokens', 16)} tokens, after "
+                  f"{output_budget_config.get('min_samples', 20)} answers")
+            print(f"  Half life: {output_budget_config.get('half_life', 604800)}s")
+            for api_name in self.api_manager.get_available_apis():
+                budget = self.api_manager.get_output_budget(api_name)
+                print(f"  {api_name}: {f'{budget} tokens' if budget else 'max_tokens (too few answers)'}")
+        
+        # Cache settings
+        cache_config = config.get("cache", {})
+        print(f"\nCache Settings:")
+        print(f"  Enabled: {cache_config.get('enabled', True)}")
+        print(f"  Max entries: {cache_config.get('max_entries', 1000)}")
+        print(f"  TTL: {cache_config.get('ttl', 86400)}s")
+        print(f"  Stale-while-revalidate: {cache_config.get('stale_while_revalidate', False)}")
+        
+        # History settings
+        history_config = config.get("history", {})
+        print(f"\nHistory Settings:")
+        print(f"  Enabled: {history_config.get('enabled', True)}")
+        print(f"  Max entries: {history_config.get('max_entries', 10000)}")
+        print(f"  Retention: {history_config.get('retention_days', 365)} days")
+        
+        # Ledger settings
+        ledger_config = config.get("ledger", {})
+        print(f"\nLedger Settings:")
+        print(f"  Enabled: {ledger_config.get('enabled', True)}")
+        print(f"  Retention: {ledger_config.get('retention_days', 90)} days")
+        
+        # Batch settings
+        batch_config = config.get("batch", {})
+        print(f"\nBatch Settings:")
+        print(f"  Concurrency: {batch_config.get('concurrency', 8)}")
+        print(f"  Order: {batch_config.get('order', 'input')}")
+        print(f"  Pack size: {batch_config.get('pack_size', 1)}")
+        print(f"  Offline poll interval: {batch_config.get('poll_interval', 60)}s")
     
     def _reset_config(self):
         """Reset configuration to defaults."""
@@ -259,16 +973,38 @@ EXAMPLES:
     tinycode "give me a code to remove all files in a directory"
     tinycode --openai "find all files modified in last 24 hours"
     tinycode --claude "compress a directory to tar.gz"
+    tinycode -i
+    tinycode --history tar
+    tinycode --stats 7
+    tinycode --batch runbook.txt --journal runbook.journal > commands.jsonl
+    tinycode --submit-batch runbook.txt
+    tinycode --collect-batch JOB --wait > commands.jsonl
 
 OPTIONS:
     -h, --help              Show this help message
     -v, --version           Show version information
+    -i, --interactive       Start an interactive session
     --openai                Force use of OpenAI (ChatGPT) API
     --claude                Force use of Claude API
     --set-api-key API KEY   Set API key for specified service (openai/claude)
     --check-apis            Check available APIs and their status
     --config                Show current configuration
     --reset-config          Reset configuration to defaults
+    --refresh-system-info   Re-detect the system instead of using the cached snapshot
+    --timing                Print how long each phase took (to stderr)
+    --no-cache              Don't read or write the response cache
+    --refresh               Ask the API again and update the cached answer
+    --no-history            Don't record the query in the history
+    --history [WORDS]       Search past queries and commands (recent ones without WORDS)
+    --stats [DAYS]          Show usage, latency and cache statistics (last 30 days by default)
+    --batch FILE|-          Generate a command per input line, printed as JSON lines
+    --concurrency N         Requests in flight at once in batch mode
+    --order ORDER           Batch output order: 'input' or 'completion'
+    --journal FILE          Record finished batch items in FILE and skip them when rerun
+    --pack N                Send N batch queries per request as a numbered list
+    --submit-batch FILE|-   Submit a file of queries to the providers' offline batch APIs
+    --collect-batch [JOB]   Print the results of a submitted job (list jobs without JOB)
+    --wait                  With --collect-batch, poll until the job has finished
 
 API CONFIGURATION:
     tinycode --set-api-key openai sk-your-openai-key
@@ -279,17 +1015,19 @@ FEATURES:
     • Linux distribution detection for better command generation
     • Animated loading indicator
     • Fallback between APIs if one fails
-    • Single-line command output
+    • Single-line command output, streamed as it is generated
     • Copy to clipboard support
+    • Optional tinycoded daemon keeps clients warm between calls
 
 For more information, visit: https://github.com/poaxy/tinycode
 """
         print(help_text)
 
 
-def main():
-    """Main entry point."""
+def build_parser() -> argparse.ArgumentParser:
+    """Build the command line argument parser."""
     parser = argparse.ArgumentParser(
+        prog="tinycode",
         description="AI-powered command line generator",
         add_help=False  # We'll handle help manually
     )
@@ -300,15 +1038,82 @@ def main():
     # Options
     parser.add_argument("-h", "--help", action="store_true", help="Show help message")
     parser.add_argument("-v", "--version", action="store_true", help="Show version information")
+    parser.add_argument("-i", "--interactive", action="store_true", help="Start an interactive session")
     parser.add_argument("--openai", action="store_true", help="Force use of OpenAI API")
     parser.add_argument("--claude", action="store_true", help="Force use of Claude API")
     parser.add_argument("--set-api-key", nargs=2, metavar=("API", "KEY"), help="Set API key")
     parser.add_argument("--check-apis", action="store_true", help="Check available APIs")
     parser.add_argument("--config", action="store_true", help="Show configuration")
     parser.add_argument("--reset-config", action="store_true", help="Reset configuration")
+    parser.add_argument("--refresh-system-info", action="store_true", help="Re-detect system information")
+    parser.add_argument("--timing", action="store_true", help="Print per-phase timing")
+    parser.add_argument("--no-cache", action="store_true", help="Bypass the response cache")
+    parser.add_argument("--refresh", action="store_true", help="Refresh the cached answer")
+    parser.add_argument("--no-history", action="store_true", help="Do not record the query in the history")
+    parser.add_argument("--history", nargs="?", const="", metavar="WORDS", help="Search history")
+    parser.add_argument("--stats", nargs="?", const=30, type=int, metavar="DAYS",
+                        help="Show usage and latency statistics")
+    parser.add_argument("--batch", metavar="FILE", help="Generate commands for a file of queries ('-' for stdin)")
+    parser.add_argument("--concurrency", type=int, metavar="N", help="Batch requests in flight")
+    parser.add_argument("--order", choices=["input", "completion"], help="Batch output order")
+    parser.add_argument("--journal", metavar="FILE", help="Batch resume journal")
+    parser.add_argument("--pack", type=int, metavar="N", help="Batch queries per request")
+    parser.add_argument("--submit-batch", metavar="FILE", help="Submit a file of queries as an offline batch job")
+    parser.add_argument("--collect-batch", nargs="?", const="", metavar="JOB", help="Collect an offline batch job")
+    parser.add_argument("--wait", action="store_true", help="Poll until the batch job has finished")
     
+    return parser
+
+
+def parse_args(argv: List[str]) -> argparse.Namespace:
+    """
+    Parse command line arguments.
+    
+    Args:
+        argv: Arguments without the program name
+    
+    Returns:
+        Parsed arguments; help is implied when no arguments are given
+    """
+    args = build_parser().parse_args(argv)
+    if not argv:
+        args.help = True
+    return args
+
+
+def is_query(args: argparse.Namespace) -> bool:
+    """Check whether the arguments lead to command generation."""
+    return bool(args.query) and not (
+        args.version or args.help or args.interactive or args.set_api_key
+        or args.check_apis or args.config or args.reset_config
+        or args.history is not None or args.stats is not None or args.batch is not None
+        or args.submit_batch is not None or args.collect_batch is not None
+    )
+
+
+def main():
+    """Main entry point; core.launcher checks the Python version before importing this module."""
     # Parse arguments
-    args = parser.parse_args()
+    argv = sys.argv[1:]
+    args = parse_args(argv)
+    
+    # Hand queries to a running tinycoded, if there is one
+    if is_query(args):
+        from core.daemon import forward_to_daemon, reply_timeout
+        config_manager = ConfigManager()
+        ui_config = config_manager.get_ui_config()
+        loading = None
+        if sys.stdout.isatty() and ui_config.get("loading_animation", True):
+            loading = show_loading("Thinking", ui_config.get("animation_style", "dots"))
+        try:
+            reply = forward_to_daemon(argv, loading, reply_timeout(config_manager))
+        except KeyboardInterrupt:
+            print("\nOperation cancelled by user.")
+            sys.exit(1)
+        if reply is not None:
+            sys.stdout.write(reply["stdout"])
+            sys.stderr.write(reply["stderr"])
+            sys.exit(reply["exit_code"])
     
     # Create and run application
     app = TinyCode()
@@ -19,6 +19,7 @@ class BaseLoadingAnimation(ABC):
         self.speed = speed
         self.running = False
         self.thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
     
     @abstractmethod
     def _animate(self):
@@ -31,6 +32,7 @@ class BaseLoadingAnimation(ABC):
             return
         
         self.running = True
+        self._stop_event.clear()
         self.thread = threading.Thread(target=self._animate, daemon=True)
         self.thread.start()
     
@@ -40,6 +42,7 @@ class BaseLoadingAnimation(ABC):
             return
         
         self.running = False
+        self._stop_event.set()
         if self.thread:
             self.thread.join(timeout=0.5)
         
@@ -75,8 +78,8 @@ class LoadingAnimation(BaseLoadingAnimation):
             # Move to next dot
             self.current_dot = (self.current_dot + 1) % len(self.dots)
             
-            # Wait before next frame
-            time.sleep(self.speed)
+            # Wait before next frame (returns early when stopped)
+            self._stop_event.wait(self.speed)
     
     def stop(self):
         """Stop the loading animation and clear the line."""
@@ -84,6 +87,7 @@ class LoadingAnimation(BaseLoadingAnimation):
             return
         
         self.running = False
+        self._stop_event.set()
         if self.thread:
             self.thread.join(timeout=0.5)
         
@@ -112,8 +116,8 @@ class SimpleLoadingAnimation(BaseLoadingAnimation):
             # Cycle dots
             self.dot_count = (self.dot_count + 1) % 4
             
-            # Wait before next frame
-            time.sleep(self.speed)
+            # Wait before next frame (returns early when stopped)
+            self._stop_event.wait(self.speed)
 
 
 def show_loading(message: str = "Thinking", style: str = "dots") -> BaseLoadingAnimation:
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Output module for tinycode.
+Shows a streamed command on the terminal as it arrives.
+"""
+
+import sys
+from typing import Optional
+
+
+class StreamPrinter:
+    """Prints a streamed command in place of the loading animation."""
+    
+    def __init__(self, live: bool = True, loading=None):
+        """
+        Initialize stream printer.
+        
+        Args:
+            live: Show the command while it streams (only sensible on a terminal)
+            loading: Loading animation to stop at the first streamed text
+        """
+        self.live = live
+        self.loading = loading
+        self.shown = ""
+    
+    def update(self, preview: str):
+        """
+        Show the command received so far.
+        
+        Args:
+            preview: Command preview; normally extends the previous one
+        """
+        if not self.live or not preview:
+            return
+        
+        if self.loading:
+            self.loading.stop()
+            self.loading = None
+        
+        if preview.startswith(self.shown):
+            sys.stdout.write(preview[len(self.shown):])
+        else:
+            # Another provider took over after a failure: redraw the line
+            sys.stdout.write("\r\033[K" + preview)
+        sys.stdout.flush()
+        self.shown = preview
+    
+    def finish(self, command: Optional[str]):
+        """
+        Complete the output with the final command.
+        
+        Args:
+            command: Final command, or None if generation failed
+        """
+        if not self.shown:
+            if command:
+                print(command)
+            return
+        
+        if command and command != self.shown:
+            self.update(command)
+        sys.stdout.write("\n")
+        sys.stdout.flush()
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Answer lengths for tinycode.
+Keeps an exponentially decayed histogram of the output tokens of past
+answers per provider and model in SQLite under the config directory, so
+that requests can ask for a max_tokens budget that covers nearly every
+answer instead of the configured maximum. Old answers fade out with a
+configurable half life, so the budget follows a change of model or prompt.
+"""
+
+import json
+import math
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+from .storage import open_database
+
+
+def estimate_answer_tokens(command: str) -> int:
+    """
+    Estimate the output tokens of an answer the provider did not count.
+    
+    Commands are dense in symbols, so this is about three characters per
+    token, which errs on the long side.
+    """
+    return len(command) // 3 + 1
+
+
+class AnswerLengths:
+    """Decayed output token histograms per provider and model."""
+    
+    def __init__(self, db_path: Path, half_life: float = 604800.0):
+        """
+        Initialize answer lengths.
+        
+        Args:
+            db_path: Database file path
+            half_life: Seconds after which an answer counts half as much
+        """
+        self.half_life = half_life
+        self.conn = open_database(db_path)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS answer_lengths (
+                provider TEXT NOT NULL,
+                model TEXT NOT NULL,
+                histogram TEXT NOT NULL,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (provider, model)
+            )
+        """)
+    
+    def _decay(self, updated_at: float, now: float) -> float:
+        """Weight left of an answer recorded at updated_at."""
+        return 0.5 ** (max(0.0, now - updated_at) / self.half_life)
+    
+    def record(self, provider: str, model: str, tokens: int):
+        """
+        Record the length of a complete answer.
+        
+        Args:
+            provider: API name
+            model: Model that answered
+            tokens: Output tokens of the answer
+        """
+        now = time.time()
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = self.conn.execute(
+                "SELECT histogram, updated_at FROM answer_lengths WHERE provider = ? AND model = ?",
+                (provider, model)
+            ).fetchone()
+            
+            histogram: Dict[str, float] = {}
+            if row:
+                decay = self._decay(row[1], now)
+                # Drop weights too small to matter, so the histogram stays small
+                histogram = {length: weight * decay for length, weight in json.loads(row[0]).items()
+                             if weight * decay >= 0.001}
+            
+            key = str(max(1, int(tokens)))
+            histogram[key] = histogram.get(key, 0.0) + 1
+            
+            self.conn.execute(
+                "INSERT OR REPLACE INTO answer_lengths (provider, model, histogram, updated_at) "
+                "VALUES (?, ?, ?, ?)",
+                (provider, model, json.dumps({length: round(weight, 6) for length, weight in histogram.items()}),
+                 now)
+            )
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+    
+    def budget(self, provider: str, model: str, quantile: float = 0.99, headroom: float = 1.5,
+               min_samples: float = 20) -> Optional[int]:
+        """
+        Output token budget that covers nearly every answer of a model.
+        
+        Args:
+            provider: API name
+            model: Model the request goes to
+            quantile: Share of past answers the budget must cover
+            headroom: Factor applied to that length
+            min_samples: Decayed number of answers needed for a budget
+        
+        Returns:
+            Budget in tokens, or None with too few answers recorded
+        """
+        row = self.conn.execute(
+            "SELECT histogram, updated_at FROM answer_lengths WHERE provider = ? AND model = ?",
+            (provider, model)
+        ).fetchone()
+        if not row:
+            return None
+        
+        histogram = sorted((int(length), weight) for length, weight in json.loads(row[0]).items())
+        total = sum(weight for _, weight in histogram)
+        if total * self._decay(row[1], time.time()) < min_samples:
+            return None
+        
+        cumulative = 0.0
+        for length, weight in histogram:
+            cumulative += weight
+            if cumulative >= quantile * total:
+                return math.ceil(length * headroom)
+        return math.ceil(histogram[-1][0] * headroom)
@@ -7,7 +7,7 @@ Handles API keys, settings, and configuration file operations.
 import os
 import json
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 
 
 class ConfigManager:
@@ -46,26 +46,118 @@ class ConfigManager:
         return {
             "auto_select_api": True,
             "preferred_api": "openai",
+            "selection_policy": "static",
             "openai": {
                 "api_key": "",
+                "api_keys": [],
+                "api_keys_file": "",
                 "model": "gpt-3.5-turbo",
                 "max_tokens": 100,
                 "enabled": False
             },
             "claude": {
                 "api_key": "",
+                "api_keys": [],
+                "api_keys_file": "",
                 "model": "claude-3-sonnet-20240229",
                 "max_tokens": 100,
                 "enabled": False
             },
             "system": {
                 "auto_detect_distro": True,
-                "include_distro_in_prompt": True
+                "include_distro_in_prompt": True,
+                "cache_system_info": True
             },
             "ui": {
                 "loading_animation": True,
                 "copy_to_clipboard": False,
-                "animation_style": "dots"
+                "animation_style": "dots",
+                "stream_output": True
+            },
+            "transport": {
+                "mode": "sdk",
+                "connect_timeout": 5.0,
+                "read_timeout": 30.0,
+                "total_timeout": 30.0,
+                "max_connections": 20,
+                "max_keepalive": 10,
+                "keepalive_expiry": 60.0,
+                "http2": False,
+                "proxy": ""
+            },
+            "prompt_cache": {
+                "enabled": True
+            },
+            "output_budget": {
+                "enabled": True,
+                "stop_sequences": True,
+                "quantile": 0.99,
+                "headroom": 1.5,
+                "min_tokens": 16,
+                "min_samples": 20,
+                "half_life": 604800
+            },
+            "daemon": {
+                "idle_timeout": 900
+            },
+            "cache": {
+                "enabled": True,
+                "max_entries": 1000,
+                "ttl": 86400,
+                "stale_while_revalidate": False,
+                "stale_ttl": 2592000,
+                "similarity": {
+                    "enabled": False,
+                    "threshold": 0.7,
+                    "max_entries": 10000,
+                    "dimensions": 256
+                }
+            },
+            "hedging": {
+                "enabled": False,
+                "delay": 1.0
+            },
+            "retry": {
+                "max_attempts": 3,
+                "base_delay": 0.5,
+                "max_delay": 8.0,
+                "max_retry_after": 30.0
+            },
+            "adaptive": {
+                "half_life": 3600,
+                "exploration": 0.05,
+                "min_samples": 5
+            },
+            "key_pool": {
+                "cooldown": 30.0
+            },
+            "rate_limit": {
+                "enabled": False,
+                "max_wait": 60,
+                "openai": {
+                    "requests_per_minute": 0,
+                    "tokens_per_minute": 0
+                },
+                "claude": {
+                    "requests_per_minute": 0,
+                    "tokens_per_minute": 0
+                }
+            },
+            "history": {
+                "enabled": True,
+                "max_entries": 10000,
+                "retention_days": 365,
+                "search_limit": 20
+            },
+            "ledger": {
+                "enabled": True,
+                "retention_days": 90
+            },
+            "batch": {
+                "concurrency": 8,
+                "order": "input",
+                "pack_size": 1,
+                "poll_interval": 60
             }
         }
     
@@ -92,11 +184,36 @@ class ConfigManager:
         Returns:
             API key if available, None otherwise
         """
+        api_keys = self.get_api_keys(api_name)
+        return api_keys[0] if api_keys else None
+    
+    def get_api_keys(self, api_name: str) -> List[str]:
+        """
+        Get all API keys for specified service.
+        
+        Keys come from 'api_key', the 'api_keys' list and the file named by
+        'api_keys_file' (one key per line, '#' starts a comment), in that
+        order and without duplicates; the first one is the primary key.
+        
+        Args:
+            api_name: Name of the API ('openai' or 'claude')
+        
+        Returns:
+            List of API keys, empty if none is configured
+        """
         if api_name not in self.config:
-            return None
+            return []
         
-        api_key = self.config[api_name].get("api_key", "")
-        return api_key if api_key else None
+        api_config = self.config[api_name]
+        api_keys = [api_config.get("api_key", "")] + list(api_config.get("api_keys", []))
+        keys_file = api_config.get("api_keys_file", "")
+        if keys_file:
+            try:
+                with open(Path(keys_file).expanduser(), 'r') as f:
+                    api_keys += [line.split("#", 1)[0].strip() for line in f]
+            except IOError:
+                pass
+        return list(dict.fromkeys(key for key in api_keys if key))
     
     def set_api_key(self, api_name: str, api_key: str) -> bool:
         """
@@ -131,7 +248,7 @@ class ConfigManager:
         
         return (
             self.config[api_name].get("enabled", False) and
-            bool(self.config[api_name].get("api_key", ""))
+            bool(self.get_api_keys(api_name))
         )
     
     def get_available_apis(self) -> list:
@@ -197,6 +314,58 @@ class ConfigManager:
         """Get system configuration."""
         return self.config.get("system", {})
     
+    def get_transport_config(self) -> Dict[str, Any]:
+        """Get HTTP transport configuration."""
+        return self.config.get("transport", {})
+    
+    def get_prompt_cache_config(self) -> Dict[str, Any]:
+        """Get provider prompt cache configuration."""
+        return self.config.get("prompt_cache", {})
+    
+    def get_output_budget_config(self) -> Dict[str, Any]:
+        """Get output token budget configuration."""
+        return self.config.get("output_budget", {})
+    
+    def get_daemon_config(self) -> Dict[str, Any]:
+        """Get tinycoded daemon configuration."""
+        return self.config.get("daemon", {})
+    
+    def get_cache_config(self) -> Dict[str, Any]:
+        """Get response cache configuration."""
+        return self.config.get("cache", {})
+    
+    def get_hedging_config(self) -> Dict[str, Any]:
+        """Get request hedging configuration."""
+        return self.config.get("hedging", {})
+    
+    def get_history_config(self) -> Dict[str, Any]:
+        """Get query history configuration."""
+        return self.config.get("history", {})
+    
+    def get_retry_config(self) -> Dict[str, Any]:
+        """Get retry policy configuration."""
+        return self.config.get("retry", {})
+    
+    def get_ledger_config(self) -> Dict[str, Any]:
+        """Get usage ledger configuration."""
+        return self.config.get("ledger", {})
+    
+    def get_adaptive_config(self) -> Dict[str, Any]:
+        """Get adaptive API selection configuration."""
+        return self.config.get("adaptive", {})
+    
+    def get_key_pool_config(self) -> Dict[str, Any]:
+        """Get API key pool configuration."""
+        return self.config.get("key_pool", {})
+    
+    def get_rate_limit_config(self) -> Dict[str, Any]:
+        """Get host-wide rate limit configuration."""
+        return self.config.get("rate_limit", {})
+    
+    def get_batch_config(self) -> Dict[str, Any]:
+        """Get batch mode configuration."""
+        return self.config.get("batch", {})
+    
     def update_config(self, updates: Dict[str, Any]) -> bool:
         """
         Update configuration with new values.
@@ -249,14 +418,36 @@ class ConfigManager:
         if preferred and preferred not in ["openai", "claude"]:
             issues["warnings"].append(f"Unknown preferred API: {preferred}")
         
+        # Check selection policy
+        selection_policy = self.config.get("selection_policy", "static")
+        if selection_policy not in ["static", "adaptive"]:
+            issues["warnings"].append(f"Unknown selection policy: {selection_policy}")
+        
+        # Check transport mode
+        transport_mode = self.get_transport_config().get("mode", "sdk")
+        if transport_mode not in ["sdk", "lean"]:
+            issues["warnings"].append(f"Unknown transport mode: {transport_mode}")
+        
+        # Check transport timeouts and proxy
+        transport_config = self.get_transport_config()
+        for name in ["connect_timeout", "read_timeout", "total_timeout"]:
+            value = transport_config.get(name, 1)
+            if not isinstance(value, (int, float)) or value <= 0:
+                issues["warnings"].append(f"Transport {name} must be a positive number of seconds")
+        proxy = transport_config.get("proxy", "")
+        if proxy and not proxy.startswith(("http://", "https://")):
+            issues["warnings"].append(f"Transport proxy should be an http:// URL: {proxy}")
+        
         # Check API key formats
         for api_name in ["openai", "claude"]:
-            api_key = self.get_api_key(api_name)
-            if api_key:
-                if api_name == "openai" and not api_key.startswith("sk-"):
-                    issues["warnings"].append(f"OpenAI API key format may be invalid")
-                elif api_name == "claude" and not api_key.startswith("sk-ant-"):
-                    issues["warnings"].append(f"Claude API key format may be invalid")
+            keys_file = self.config.get(api_name, {}).get("api_keys_file", "")
+            if keys_file and not os.access(Path(keys_file).expanduser(), os.R_OK):
+                issues["warnings"].append(f"Cannot read {api_name} API keys file: {keys_file}")
+            api_keys = self.get_api_keys(api_name)
+            if api_name == "openai" and any(not key.startswith("sk-") for key in api_keys):
+                issues["warnings"].append(f"OpenAI API key format may be invalid")
+            elif api_name == "claude" and any(not key.startswith("sk-ant-") for key in api_keys):
+                issues["warnings"].append(f"Claude API key format may be invalid")
         
         return issues
 
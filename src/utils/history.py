@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+History module for tinycode.
+Keeps every answered query with its command in a local SQLite database
+with an FTS5 full-text index, so past answers can be searched offline.
+"""
+
+import re
+import time
+import hashlib
+import sqlite3
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+from .storage import open_database
+
+
+# Number of recorded entries between two compactions
+COMPACT_EVERY = 100
+
+SECONDS_PER_DAY = 86400
+
+
+class History:
+    """Searchable, size-bounded log of queries and generated commands."""
+    
+    def __init__(self, db_path: Path, max_entries: int = 10000, retention_days: float = 365):
+        """
+        Initialize history.
+        
+        Args:
+            db_path: Database file path
+            max_entries: Entries kept; older ones are dropped on compaction
+            retention_days: Days an entry is kept (0 keeps entries forever)
+        """
+        self.max_entries = max_entries
+        self.retention_days = retention_days
+        self.conn = open_database(db_path)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS contexts (
+                id INTEGER PRIMARY KEY,
+                digest TEXT NOT NULL UNIQUE,
+                text TEXT NOT NULL
+            )
+        """)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS history (
+                id INTEGER PRIMARY KEY,
+                created_at REAL NOT NULL,
+                query TEXT NOT NULL,
+                command TEXT NOT NULL,
+                provider TEXT,
+                model TEXT,
+                latency_ms REAL,
+                cache TEXT,
+                context_id INTEGER REFERENCES contexts (id)
+            )
+        """)
+        self.fts = self._create_index()
+    
+    def _create_index(self) -> bool:
+        """
+        Create the FTS5 index over queries and commands.
+        
+        Returns:
+            False if this SQLite build lacks FTS5 (search falls back to LIKE)
+        """
+        try:
+            self.conn.execute("""
+                CREATE VIRTUAL TABLE IF NOT EXISTS history_fts USING fts5 (
+                    query, command, content='history', content_rowid='id', prefix='2 3'
+                )
+            """)
+        except sqlite3.OperationalError:
+            return False
+        
+        self.conn.execute("""
+            CREATE TRIGGER IF NOT EXISTS history_insert AFTER INSERT ON history BEGIN
+                INSERT INTO history_fts (rowid, query, command)
+                VALUES (new.id, new.query, new.command);
+            END
+        """)
+        self.conn.execute("""
+            CREATE TRIGGER IF NOT EXISTS history_delete AFTER DELETE ON history BEGIN
+                INSERT INTO history_fts (history_fts, rowid, query, command)
+                VALUES ('delete', old.id, old.query, old.command);
+            END
+        """)
+        return True
+    
+    def record(self, query: str, command: str, provider: Optional[str] = None,
+               model: Optional[str] = None, latency_ms: Optional[float] = None,
+               cache: Optional[str] = None, system_context: str = ""):
+        """
+        Append an answered query.
+        
+        Args:
+            query: User's query
+            command: Generated command
+            provider: API that answered
+            model: Model that answered
+            latency_ms: Time taken to produce the command
+            cache: How the cache answered ('hit', 'stale', 'similar', 'miss' or None)
+            system_context: System information context sent with the query
+        """
+        digest = hashlib.sha256(system_context.encode("utf-8")).hexdigest()
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            # System contexts repeat across queries, so each is stored once
+            self.conn.execute(
+                "INSERT OR IGNORE INTO contexts (digest, text) VALUES (?, ?)",
+                (digest, system_context)
+            )
+            cursor = self.conn.execute(
+                "INSERT INTO history "
+                "(created_at, query, command, provider, model, latency_ms, cache, context_id) "
+                "SELECT ?, ?, ?, ?, ?, ?, ?, id FROM contexts WHERE digest = ?",
+                (time.time(), query, command, provider, model, latency_ms, cache, digest)
+            )
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+        
+        if cursor.lastrowid % COMPACT_EVERY == 0:
+            self.compact()
+    
+    def compact(self):
+        """Drop expired and excess entries, then shrink the index and the file."""
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            if self.retention_days:
+                self.conn.execute(
+                    "DELETE FROM history WHERE created_at < ?",
+                    (time.time() - self.retention_days * SECONDS_PER_DAY,)
+                )
+            self.conn.execute(
+                "DELETE FROM history WHERE id <= ("
+                "SELECT id FROM history ORDER BY id DESC LIMIT 1 OFFSET ?)",
+                (self.max_entries,)
+            )
+            self.conn.execute(
+                "DELETE FROM contexts WHERE id NOT IN (SELECT context_id FROM history)"
+            )
+            if self.fts:
+                self.conn.execute("INSERT INTO history_fts (history_fts) VALUES ('optimize')")
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+        
+        self.conn.execute("PRAGMA incremental_vacuum")
+    
+    def search(self, text: str = "", limit: int = 20) -> List[Dict[str, Any]]:
+        """
+        Search past queries and commands.
+        
+        Every word of the text must match the start of a word in the query
+        or the command; matches are ranked by relevance, then recency.
+        
+        Args:
+            text: Search words; empty returns the most recent entries
+            limit: Maximum number of entries returned
+        
+        Returns:
+            Matching entries, best first
+        """
+        columns = "h.created_at, h.query, h.command, h.provider, h.model, h.latency_ms, h.cache"
+        words = re.findall(r'\w+', text)
+        
+        if not words:
+            rows = self.conn.execute(
+                f"SELECT {columns} FROM history h ORDER BY h.id DESC LIMIT ?", (limit,)
+            )
+        elif self.fts:
+            match = " ".join(f'"{word}"*' for word in words)
+            rows = self.conn.execute(
+                f"SELECT {columns} FROM history_fts JOIN history h ON h.id = history_fts.rowid "
+                f"WHERE history_fts MATCH ? ORDER BY bm25(history_fts), h.id DESC LIMIT ?",
+                (match, limit)
+            )
+        else:
+            conditions = " AND ".join(["(h.query LIKE ? OR h.command LIKE ?)"] * len(words))
+            params = [f"%{word}%" for word in words for _ in range(2)]
+            rows = self.conn.execute(
+                f"SELECT {columns} FROM history h WHERE {conditions} ORDER BY h.id DESC LIMIT ?",
+                params + [limit]
+            )
+        
+        keys = ("created_at", "query", "command", "provider", "model", "latency_ms", "cache")
+        return [dict(zip(keys, row)) for row in rows]
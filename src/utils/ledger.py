@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+"""
+Usage ledger for tinycode.
+Appends one row per provider request or cache answer (provider, model,
+tokens, prompt cache reads, time to first byte, latency, retries, cache)
+to a local SQLite
+database. Each append also updates a per-day rollup with the totals and
+latency histograms, so that `tinycode --stats` summarizes a month from a
+few dozen rollup rows instead of scanning every request.
+"""
+
+import json
+import math
+import time
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+from .storage import open_database
+
+
+# Number of recorded rows between two compactions
+COMPACT_EVERY = 1000
+
+SECONDS_PER_DAY = 86400
+
+# Latency histogram buckets grow by 5% from 1 ms, which bounds the error
+# of a reported percentile to 5%
+BUCKET_BASE_MS = 1.0
+BUCKET_GROWTH = 1.05
+
+
+def _bucket(latency_ms: float) -> int:
+    """Histogram bucket of a latency."""
+    if latency_ms <= BUCKET_BASE_MS:
+        return 0
+    return math.ceil(math.log(latency_ms / BUCKET_BASE_MS, BUCKET_GROWTH))
+
+
+def _percentile(histogram: Dict[int, int], q: float) -> Optional[float]:
+    """Upper edge of the bucket holding the q-th share of a histogram, None if empty."""
+    total = sum(histogram.values())
+    if not total:
+        return None
+    rank = max(1, math.ceil(q * total))
+    for bucket in sorted(histogram):
+        rank -= histogram[bucket]
+        if rank <= 0:
+            return BUCKET_BASE_MS * BUCKET_GROWTH ** bucket
+    return None
+
+
+def _merge(target: Dict[int, int], histogram: Dict[int, int]):
+    """Add a histogram's counts to another one."""
+    for bucket, count in histogram.items():
+        target[bucket] = target.get(bucket, 0) + count
+
+
+class Ledger:
+    """Append-only log of provider requests and cache answers, with daily rollups."""
+    
+    def __init__(self, db_path: Path, retention_days: float = 90):
+        """
+        Initialize ledger.
+        
+        Args:
+            db_path: Database file path
+            retention_days: Days requests and rollups are kept (0 keeps
+                them forever)
+        """
+        self.retention_days = retention_days
+        self.conn = open_database(db_path)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS requests (
+                id INTEGER PRIMARY KEY,
+                created_at REAL NOT NULL,
+                provider TEXT,
+                model TEXT,
+                cache TEXT,
+                ok INTEGER NOT NULL,
+                queries INTEGER NOT NULL,
+                input_tokens INTEGER,
+                output_tokens INTEGER,
+                cache_read_tokens INTEGER,
+                ttfb_ms REAL,
+                latency_ms REAL,
+                retries INTEGER NOT NULL
+            )
+        """)
+        # One row per local day, provider, model and cache outcome ('' for
+        # provider requests); histograms map bucket numbers to counts, the
+        # cached TTFB one covering requests that read from the prompt cache
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS daily (
+                day TEXT NOT NULL,
+                provider TEXT NOT NULL,
+                model TEXT NOT NULL,
+                cache TEXT NOT NULL,
+                requests INTEGER NOT NULL,
+                failed INTEGER NOT NULL,
+                retries INTEGER NOT NULL,
+                input_tokens INTEGER NOT NULL,
+                output_tokens INTEGER NOT NULL,
+                cache_read_tokens INTEGER NOT NULL DEFAULT 0,
+                generation_ms REAL NOT NULL,
+                latency_histogram TEXT NOT NULL,
+                ttfb_histogram TEXT NOT NULL,
+                ttfb_cached_histogram TEXT NOT NULL DEFAULT '{}',
+                PRIMARY KEY (day, provider, model, cache)
+            )
+        """)
+        # Ledgers created before prompt cache reads were recorded
+        self._add_columns("requests", {"cache_read_tokens": "INTEGER"})
+        self._add_columns("daily", {"cache_read_tokens": "INTEGER NOT NULL DEFAULT 0",
+                                    "ttfb_cached_histogram": "TEXT NOT NULL DEFAULT '{}'"})
+    
+    def _add_columns(self, table: str, columns: Dict[str, str]):
+        """Add the columns a table lacks."""
+        existing = {row[1] for row in self.conn.execute(f"PRAGMA table_info({table})")}
+        for name, definition in columns.items():
+            if name not in existing:
+                self.conn.execute(f"ALTER TABLE {table} ADD COLUMN {name} {definition}")
+    
+    def record(self, provider: str, model: str, ok: bool, latency_ms: float,
+               ttfb_ms: Optional[float] = None, input_tokens: Optional[int] = None,
+               output_tokens: Optional[int] = None, cache_read_tokens: Optional[int] = None,
+               retries: int = 0, cache: Optional[str] = None, queries: int = 1):
+        """
+        Append a provider request or a cache answer.
+        
+        Args:
+            provider: API that answered (or would have)
+            model: Model that answered
+            ok: Whether a command was produced
+            latency_ms: Total time taken, retries included
+            ttfb_ms: Time until the first byte of the successful response,
+                if the transport could tell
+            input_tokens: Prompt tokens the provider reported
+            output_tokens: Completion tokens the provider reported
+            cache_read_tokens: Prompt tokens read from the provider's
+                prompt cache
+            retries: Retries the request needed
+            cache: How the cache answered ('hit', 'stale' or 'similar'),
+                None for a provider request
+            queries: Queries packed into the request
+        """
+        now = time.time()
+        day = time.strftime("%Y-%m-%d", time.localtime(now))
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            cursor = self.conn.execute(
+                "INSERT INTO requests (created_at, provider, model, cache, ok, queries, "
+                "input_tokens, output_tokens, cache_read_tokens, ttfb_ms, latency_ms, retries) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (now, provider, model, cache, int(ok), queries, input_tokens, output_tokens,
+                 cache_read_tokens, ttfb_ms, latency_ms, retries)
+            )
+            
+            key = (day, provider, model, cache or "")
+            row = self.conn.execute(
+                "SELECT requests, failed, retries, input_tokens, output_tokens, cache_read_tokens, "
+                "generation_ms, latency_histogram, ttfb_histogram, ttfb_cached_histogram FROM daily "
+                "WHERE day = ? AND provider = ? AND model = ? AND cache = ?", key
+            ).fetchone() or (0, 0, 0, 0, 0, 0, 0.0, "{}", "{}", "{}")
+            
+            histograms = [json.loads(text) for text in row[7:10]]
+            # Percentiles only describe successful single-query answers
+            if ok and queries == 1:
+                entries = [(histograms[0], latency_ms)]
+                if ttfb_ms is not None:
+                    entries.append((histograms[1], ttfb_ms))
+                    if cache_read_tokens:
+                        entries.append((histograms[2], ttfb_ms))
+                for histogram, value in entries:
+                    bucket = str(_bucket(value))
+                    histogram[bucket] = histogram.get(bucket, 0) + 1
+            
+            self.conn.execute(
+                "INSERT OR REPLACE INTO daily (day, provider, model, cache, requests, failed, retries, "
+                "input_tokens, output_tokens, cache_read_tokens, generation_ms, latency_histogram, "
+                "ttfb_histogram, ttfb_cached_histogram) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                key + (row[0] + 1, row[1] + (not ok), row[2] + retries,
+                       row[3] + (input_tokens or 0), row[4] + (output_tokens or 0),
+                       row[5] + (cache_read_tokens or 0),
+                       row[6] + (latency_ms if output_tokens else 0.0))
+                    + tuple(json.dumps(histogram) for histogram in histograms)
+            )
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+        
+        if cursor.lastrowid % COMPACT_EVERY == 0:
+            self.compact()
+    
+    def compact(self):
+        """Drop requests and rollups past the retention period and shrink the file."""
+        if not self.retention_days:
+            return
+        cutoff = time.time() - self.retention_days * SECONDS_PER_DAY
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            self.conn.execute("DELETE FROM requests WHERE created_at < ?", (cutoff,))
+            self.conn.execute("DELETE FROM daily WHERE day < ?",
+                              (time.strftime("%Y-%m-%d", time.localtime(cutoff)),))
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+        
+        self.conn.execute("PRAGMA incremental_vacuum")
+    
+    def report(self, days: int = 30) -> Dict[str, Any]:
+        """
+        Summarize the last days of the ledger, today included.
+        
+        Latency percentiles cover successful single-query provider
+        requests; tokens per second is the output tokens over the time of
+        the requests that reported them. The median time to first byte is
+        also given separately for requests that did and did not read from
+        the provider's prompt cache.
+        
+        Args:
+            days: Number of days
+        
+        Returns:
+            Dict with 'models' (per provider and model: requests, failed,
+            retries, p50, p95, p99, ttfb_p50, ttfb_p50_cached and
+            ttfb_p50_uncached in ms, input_tokens, output_tokens,
+            cache_read_tokens, tokens_per_second), 'cache' (answers by cache
+            outcome, 'requests' for provider requests) and 'days' (per
+            day: requests, failed, cached, input_tokens, output_tokens)
+        """
+        first_day = time.strftime("%Y-%m-%d", time.localtime(time.time() - (days - 1) * SECONDS_PER_DAY))
+        
+        models: Dict[tuple, Dict[str, Any]] = {}
+        histograms: Dict[tuple, tuple] = {}
+        cache: Dict[str, int] = {}
+        daily: Dict[str, Dict[str, Any]] = {}
+        for row in self.conn.execute(
+            "SELECT day, provider, model, cache, requests, failed, retries, input_tokens, output_tokens, "
+            "cache_read_tokens, generation_ms, latency_histogram, ttfb_histogram, ttfb_cached_histogram "
+            "FROM daily WHERE day >= ? ORDER BY day",
+            (first_day,)
+        ):
+            day, provider, model, outcome, requests, failed, retries, input_tokens, output_tokens = row[:9]
+            cache[outcome or "requests"] = cache.get(outcome or "requests", 0) + requests
+            
+            totals = daily.setdefault(day, {"day": day, "requests": 0, "failed": 0, "cached": 0,
+                                            "input_tokens": 0, "output_tokens": 0})
+            totals["requests" if not outcome else "cached"] += requests
+            totals["failed"] += failed
+            totals["input_tokens"] += input_tokens
+            totals["output_tokens"] += output_tokens
+            if outcome:
+                continue
+            
+            entry = models.setdefault((provider, model), {
+                "provider": provider, "model": model, "requests": 0, "failed": 0, "retries": 0,
+                "input_tokens": 0, "output_tokens": 0, "cache_read_tokens": 0, "generation_ms": 0.0
+            })
+            entry["requests"] += requests
+            entry["failed"] += failed
+            entry["retries"] += retries
+            entry["input_tokens"] += input_tokens
+            entry["output_tokens"] += output_tokens
+            entry["cache_read_tokens"] += row[9]
+            entry["generation_ms"] += row[10]
+            for histogram, text in zip(histograms.setdefault((provider, model), ({}, {}, {})), row[11:14]):
+                _merge(histogram, {int(bucket): count for bucket, count in json.loads(text).items()})
+        
+        for key, entry in models.items():
+            latency, ttfb, ttfb_cached = histograms[key]
+            ttfb_uncached = {bucket: count - ttfb_cached.get(bucket, 0) for bucket, count in ttfb.items()}
+            generation_ms = entry.pop("generation_ms")
+            entry.update({
+                "p50": _percentile(latency, 0.5),
+                "p95": _percentile(latency, 0.95),
+                "p99": _percentile(latency, 0.99),
+                "ttfb_p50": _percentile(ttfb, 0.5),
+                "ttfb_p50_cached": _percentile(ttfb_cached, 0.5),
+                "ttfb_p50_uncached": _percentile(ttfb_uncached, 0.5),
+                "tokens_per_second": (entry["output_tokens"] / (generation_ms / 1000)
+                                      if entry["output_tokens"] and generation_ms else None)
+            })
+        
+        return {
+            "models": sorted(models.values(), key=lambda entry: -entry["requests"]),
+            "cache": cache,
+            "days": list(daily.values())
+        }
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Provider statistics for tinycode.
+Keeps an exponentially decayed latency histogram and error rate per
+provider and model in SQLite under the config directory, so that the
+adaptive selection policy sees how each provider has performed lately,
+across processes and runs. Old calls fade out with a configurable half
+life, so a provider recovers from a bad hour on its own.
+"""
+
+import json
+import time
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+from .storage import open_database
+
+
+# Upper edges of the latency histogram buckets in seconds, 50 ms to about
+# two minutes in steps of 25%; slower calls count in the last bucket
+LATENCY_BUCKETS = tuple(0.05 * 1.25 ** i for i in range(36))
+
+
+def _quantile(histogram: List[float], q: float) -> float:
+    """Latency below which a share q of the histogram's weight lies."""
+    target = q * sum(histogram)
+    cumulative = 0.0
+    for index, weight in enumerate(histogram):
+        if weight and cumulative + weight >= target:
+            lower = LATENCY_BUCKETS[index - 1] if index else 0.0
+            return lower + (LATENCY_BUCKETS[index] - lower) * (target - cumulative) / weight
+        cumulative += weight
+    return LATENCY_BUCKETS[-1]
+
+
+class ProviderStats:
+    """Decayed latency and error statistics per provider and model."""
+    
+    def __init__(self, db_path: Path, half_life: float = 3600.0):
+        """
+        Initialize provider statistics.
+        
+        Args:
+            db_path: Database file path
+            half_life: Seconds after which a call counts half as much
+        """
+        self.half_life = half_life
+        self.conn = open_database(db_path)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS provider_stats (
+                provider TEXT NOT NULL,
+                model TEXT NOT NULL,
+                histogram TEXT NOT NULL,
+                successes REAL NOT NULL,
+                errors REAL NOT NULL,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (provider, model)
+            )
+        """)
+    
+    def _decay(self, updated_at: float, now: float) -> float:
+        """Weight left of a call made at updated_at."""
+        return 0.5 ** (max(0.0, now - updated_at) / self.half_life)
+    
+    def record(self, provider: str, model: str, latency: Optional[float]):
+        """
+        Record the outcome of a call.
+        
+        Args:
+            provider: API name
+            model: Model the call went to
+            latency: Seconds the call took, or None if it failed
+        """
+        now = time.time()
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = self.conn.execute(
+                "SELECT histogram, successes, errors, updated_at FROM provider_stats "
+                "WHERE provider = ? AND model = ?", (provider, model)
+            ).fetchone()
+            
+            histogram, successes, errors = [0.0] * len(LATENCY_BUCKETS), 0.0, 0.0
+            if row:
+                decay = self._decay(row[3], now)
+                histogram = [weight * decay for weight in json.loads(row[0])]
+                successes, errors = row[1] * decay, row[2] * decay
+            
+            if latency is None:
+                errors += 1
+            else:
+                successes += 1
+                bucket = next((index for index, edge in enumerate(LATENCY_BUCKETS) if latency <= edge),
+                              len(LATENCY_BUCKETS) - 1)
+                histogram[bucket] += 1
+            
+            self.conn.execute(
+                "INSERT OR REPLACE INTO provider_stats "
+                "(provider, model, histogram, successes, errors, updated_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (provider, model, json.dumps([round(weight, 6) for weight in histogram]),
+                 successes, errors, now)
+            )
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+    
+    def get(self, provider: str, model: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the decayed statistics of a provider and model.
+        
+        Returns:
+            Dict with 'samples' (decayed number of calls), 'error_rate',
+            'p50' and 'p95' (seconds, None without successful calls), or
+            None if no call was recorded
+        """
+        row = self.conn.execute(
+            "SELECT histogram, successes, errors, updated_at FROM provider_stats "
+            "WHERE provider = ? AND model = ?", (provider, model)
+        ).fetchone()
+        if not row:
+            return None
+        
+        histogram, successes, errors, updated_at = json.loads(row[0]), row[1], row[2], row[3]
+        samples = (successes + errors) * self._decay(updated_at, time.time())
+        return {
+            "samples": samples,
+            "error_rate": errors / (successes + errors) if successes + errors else 0.0,
+            "p50": _quantile(histogram, 0.5) if successes else None,
+            "p95": _quantile(histogram, 0.95) if successes else None
+        }
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Rate limiter module for tinycode.
+Token buckets for requests per minute and tokens per minute, per API key,
+kept in SQLite under the config directory so that every tinycode process
+on the host draws from the same buckets. Callers reserve capacity before
+a request and sleep until it is theirs, which spreads a burst of
+processes out locally instead of having the provider reject it.
+"""
+
+import time
+import hashlib
+from pathlib import Path
+from typing import Optional
+
+from .storage import open_database
+
+
+# Seconds of full-rate traffic a bucket holds, i.e. the largest burst
+BURST_SECONDS = 10
+
+
+def limiter_key(provider: str, api_key: str) -> str:
+    """
+    Identify the buckets of an API key without storing the key itself.
+    
+    Args:
+        provider: API name
+        api_key: API key
+    
+    Returns:
+        Provider name and a short digest of the key
+    """
+    return f"{provider}:{hashlib.sha256(api_key.encode('utf-8')).hexdigest()[:16]}"
+
+
+class RateLimiter:
+    """Per-key request and token buckets shared by all processes."""
+    
+    def __init__(self, db_path: Path):
+        """
+        Initialize rate limiter.
+        
+        Args:
+            db_path: Database file path
+        """
+        self.conn = open_database(db_path)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS buckets (
+                key TEXT PRIMARY KEY,
+                requests REAL NOT NULL,
+                tokens REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )
+        """)
+    
+    def reserve(self, key: str, requests_per_minute: float, tokens_per_minute: float,
+                tokens: int, max_wait: float) -> Optional[float]:
+        """
+        Reserve one request and its tokens from a key's buckets.
+        
+        The buckets may go negative: a reservation queues behind the ones
+        made before it, and the returned wait is how long until the
+        buckets have refilled to cover it.
+        
+        Args:
+            key: Bucket key from limiter_key
+            requests_per_minute: Request limit; 0 for none
+            tokens_per_minute: Token limit; 0 for none
+            tokens: Tokens the request is expected to use
+            max_wait: Longest acceptable wait in seconds
+        
+        Returns:
+            Seconds to wait before sending the request, or None (and
+            nothing reserved) if that would be longer than max_wait
+        """
+        now = time.time()
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = self.conn.execute(
+                "SELECT requests, tokens, updated_at FROM buckets WHERE key = ?", (key,)
+            ).fetchone()
+            
+            levels = []
+            wait = 0.0
+            for index, (limit, need) in enumerate(((requests_per_minute, 1), (tokens_per_minute, tokens))):
+                if not limit:
+                    levels.append(0.0)
+                    continue
+                rate = limit / 60
+                capacity = rate * BURST_SECONDS
+                level = capacity if not row else min(capacity, row[index] + (now - row[2]) * rate)
+                # A request larger than the bucket waits for a full bucket
+                need = min(need, capacity)
+                wait = max(wait, (need - level) / rate)
+                levels.append(level - need)
+            
+            if wait > max_wait:
+                self.conn.execute("ROLLBACK")
+                return None
+            
+            self.conn.execute(
+                "INSERT OR REPLACE INTO buckets (key, requests, tokens, updated_at) VALUES (?, ?, ?, ?)",
+                (key, levels[0], levels[1], now)
+            )
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+        
+        return wait
+    
+    def remaining(self, key: str, requests_per_minute: float, tokens_per_minute: float) -> float:
+        """
+        How full a key's buckets are, for sending requests to the least loaded key.
+        
+        Args:
+            key: Bucket key from limiter_key
+            requests_per_minute: Request limit; 0 for none
+            tokens_per_minute: Token limit; 0 for none
+        
+        Returns:
+            Level of the emptiest limited bucket as a share of its
+            capacity: 1 when full, negative while reservations queue
+        """
+        row = self.conn.execute(
+            "SELECT requests, tokens, updated_at FROM buckets WHERE key = ?", (key,)
+        ).fetchone()
+        if not row:
+            return 1.0
+        
+        now = time.time()
+        shares = []
+        for index, limit in enumerate((requests_per_minute, tokens_per_minute)):
+            if limit:
+                rate = limit / 60
+                capacity = rate * BURST_SECONDS
+                shares.append(min(capacity, row[index] + (now - row[2]) * rate) / capacity)
+        return min(shares, default=1.0)
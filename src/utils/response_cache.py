@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Response cache module for tinycode.
+Stores generated commands on disk, keyed on the normalized query and
+everything else that shapes the answer, with LRU eviction and a TTL.
+"""
+
+import re
+import json
+import time
+import hashlib
+from pathlib import Path
+from typing import Dict, Any, Optional
+
+from .storage import open_database
+
+
+# Seconds during which another process is assumed to be refreshing an entry
+REFRESH_LOCK_SECONDS = 60
+
+# Version of the cache key; bump it whenever normalize_query or the key
+# material changes, so entries keyed the old way are no longer used
+CACHE_KEY_VERSION = 2
+
+
+def normalize_query(query: str) -> str:
+    """
+    Normalize a query so trivially different spellings share an entry.
+    
+    Case is kept: file names, patterns and branch names in a query are
+    case-sensitive.
+    
+    Args:
+        query: User's query
+    
+    Returns:
+        Query with collapsed whitespace and no trailing punctuation
+    """
+    query = re.sub(r'\s+', ' ', query.strip())
+    return query.rstrip('?.! ')
+
+
+def make_cache_key(query: str, system_context: str, provider: str, model: str,
+                   prompt_version: int) -> str:
+    """
+    Build the cache key for a query.
+    
+    Args:
+        query: User's query
+        system_context: System information context
+        provider: API name
+        model: Model name
+        prompt_version: Version of the system prompt
+    
+    Returns:
+        Hex digest identifying the request
+    """
+    material = json.dumps(
+        [CACHE_KEY_VERSION, normalize_query(query), system_context, provider, model, prompt_version]
+    )
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """SQLite-backed cache of generated commands, shared by all processes."""
+    
+    def __init__(self, db_path: Path, max_entries: int = 1000, ttl: float = 86400,
+                 stale_ttl: float = 0):
+        """
+        Initialize response cache.
+        
+        Args:
+            db_path: Database file path
+            max_entries: Entries kept before the least recently used are evicted
+            ttl: Seconds an entry is fresh
+            stale_ttl: Extra seconds an expired entry may still be served stale
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.conn = open_database(db_path)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                command TEXT NOT NULL,
+                provider TEXT NOT NULL,
+                model TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL,
+                refreshing_at REAL
+            )
+        """)
+        self.conn.execute(
+            "CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed_at)"
+        )
+    
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up an entry and mark it as recently used.
+        
+        Args:
+            key: Cache key
+        
+        Returns:
+            Dict with 'command', 'provider', 'model', 'age' and 'fresh', or
+            None if there is no usable (fresh or stale-servable) entry
+        """
+        row = self.conn.execute(
+            "SELECT command, provider, model, created_at FROM responses WHERE key = ?",
+            (key,)
+        ).fetchone()
+        if not row:
+            return None
+        
+        now = time.time()
+        command, provider, model, created_at = row
+        age = now - created_at
+        if age > self.ttl + self.stale_ttl:
+            return None
+        
+        self.conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+        return {
+            "command": command,
+            "provider": provider,
+            "model": model,
+            "age": age,
+            "fresh": age <= self.ttl
+        }
+    
+    def put(self, key: str, command: str, provider: str, model: str):
+        """
+        Store an entry, evicting expired and least recently used entries.
+        
+        Args:
+            key: Cache key
+            command: Generated command
+            provider: API that generated it
+            model: Model that generated it
+        """
+        now = time.time()
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO responses "
+                "(key, command, provider, model, created_at, accessed_at, refreshing_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, NULL)",
+                (key, command, provider, model, now, now)
+            )
+            self.conn.execute(
+                "DELETE FROM responses WHERE created_at < ?",
+                (now - self.ttl - self.stale_ttl,)
+            )
+            self.conn.execute(
+                "DELETE FROM responses WHERE key IN ("
+                "SELECT key FROM responses ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+    
+    def claim_refresh(self, key: str) -> bool:
+        """
+        Claim the right to refresh a stale entry in the background.
+        
+        Only one process wins the claim per REFRESH_LOCK_SECONDS, so a
+        burst of stale hits starts a single refresh.
+        
+        Args:
+            key: Cache key
+        
+        Returns:
+            True if the caller should start the refresh
+        """
+        now = time.time()
+        cursor = self.conn.execute(
+            "UPDATE responses SET refreshing_at = ? WHERE key = ? "
+            "AND (refreshing_at IS NULL OR refreshing_at < ?)",
+            (now, key, now - REFRESH_LOCK_SECONDS)
+        )
+        return cursor.rowcount == 1
+    
+    def clear(self):
+        """Remove every entry."""
+        self.conn.execute("DELETE FROM responses")
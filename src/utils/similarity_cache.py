@@ -0,0 +1,324 @@
+#!/usr/bin/env python3
+"""
+Similarity cache module for tinycode.
+Finds a past query that is a near-duplicate of a new one (e.g. "list all
+the files in this folder sorted by size" and "list files in the directory
+sorted by size") and returns its stored command.
+
+Queries are embedded locally with character n-gram feature hashing; the
+vectors live in a memory-mapped NumPy matrix and are searched with a
+single matrix-vector product, masked to the rows of the query's scope by
+a memory-mapped array of per-row scope ids. Metadata lives in SQLite. NumPy is an
+optional dependency: without it the cache reports itself unavailable.
+
+A close vector alone is no match: "enable the firewall" and "disable the
+firewall" are close in n-grams but need opposite commands. A candidate
+must first agree with the query on every content word, path, file name,
+flag and number, and on every on/off word; only filler words and
+wording may differ.
+"""
+
+import time
+import zlib
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from .storage import open_database
+from .response_cache import normalize_query
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
+
+# Character n-gram sizes hashed into the query vector
+NGRAM_SIZES = (3, 4)
+
+# Candidates checked (best first) before giving up on a lookup
+TOP_K = 5
+
+# Words that do not change the command asked for
+STOPWORDS = frozenset((
+    "a", "an", "the", "this", "that", "these", "those", "my", "me", "i", "you", "please",
+    "can", "could", "would", "how", "do", "does", "what", "which", "is", "are", "be", "all",
+    "some", "any", "and", "of", "for", "in", "on", "at", "with", "by", "every", "each"
+))
+
+# Words that name the same thing, mapped to one spelling
+SYNONYMS = {
+    "dir": "directory", "dirs": "directory", "directories": "directory", "folder": "directory",
+    "biggest": "largest", "bigger": "larger"
+}
+
+# Pairs of words asking for opposite commands; a query and a candidate must
+# use the same ones, even where the rest of the query ignores the word
+ANTONYMS = (
+    ("enable", "disable"), ("start", "stop"), ("read", "write"), ("on", "off"), ("up", "down"),
+    ("in", "out"), ("allow", "deny"), ("add", "remove"), ("install", "uninstall"),
+    ("mount", "unmount"), ("lock", "unlock"), ("show", "hide"), ("open", "close"),
+    ("increase", "decrease"), ("upload", "download"), ("compress", "decompress"),
+    ("encrypt", "decrypt"), ("include", "exclude"), ("before", "after"), ("older", "newer"),
+    ("larger", "smaller"), ("largest", "smallest"), ("more", "less"), ("first", "last"),
+    ("max", "min"), ("ascending", "descending"), ("to", "from")
+)
+ANTONYM_WORDS = frozenset(word for pair in ANTONYMS for word in pair)
+
+
+def _terms(query: str) -> List[Tuple[str, bool]]:
+    """
+    Split a query into terms.
+    
+    Returns:
+        List of (term, literal) pairs: literals (paths, file names, flags,
+        numbers, capitalized names) are kept verbatim, plain words are
+        lowercased, stripped of a plural 's' and mapped to one synonym
+    """
+    terms = []
+    for index, token in enumerate(normalize_query(query).split()):
+        token = token.strip("\"'`,;:()[]{}!?").rstrip(".")
+        if not token:
+            continue
+        plain = token.isascii() and token.isalpha() and \
+            (token.islower() or (index == 0 and token.istitle()) or token == "I")
+        if not plain:
+            terms.append((token, True))
+            continue
+        word = token.lower()
+        if word in SYNONYMS or word in STOPWORDS or word in ANTONYM_WORDS:
+            terms.append((SYNONYMS.get(word, word), False))
+            continue
+        if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+            word = word[:-1]
+        terms.append((SYNONYMS.get(word, word), False))
+    return terms
+
+
+def _opposed(terms: List[Tuple[str, bool]], other: List[Tuple[str, bool]]) -> bool:
+    """Whether two queries use different on/off words ("enable" and "disable")."""
+    def polarity(terms):
+        return sorted(term for term, literal in terms if not literal and term in ANTONYM_WORDS)
+    return polarity(terms) != polarity(other)
+
+
+def _content(terms: List[Tuple[str, bool]]) -> Tuple[tuple, tuple]:
+    """
+    What a paraphrase must keep: the literals in order, and the other
+    content words in any order.
+    """
+    return (tuple(term for term, literal in terms if literal),
+            tuple(sorted(term for term, literal in terms if not literal and term not in STOPWORDS)))
+
+
+def same_request(query: str, other: str) -> bool:
+    """
+    Whether two queries ask for the same command, apart from their wording.
+    
+    On/off words are compared first and any difference is a mismatch;
+    then every content word and literal must match exactly.
+    """
+    terms, other_terms = _terms(query), _terms(other)
+    if _opposed(terms, other_terms):
+        return False
+    return _content(terms) == _content(other_terms)
+
+
+def _scope_id(scope: str) -> int:
+    """Id of a scope in the scope array; collisions are caught by the scope column."""
+    return zlib.crc32(scope.encode("utf-8"))
+
+
+def vectorize(query: str, dimensions: int):
+    """
+    Embed a query as a unit vector of hashed character n-grams.
+    
+    Args:
+        query: User's query
+        dimensions: Vector length
+    
+    Returns:
+        float32 NumPy vector with unit length (all zeros for an empty query)
+    """
+    vector = np.zeros(dimensions, dtype=np.float32)
+    for word in normalize_query(query).lower().split():
+        # Pad words so that short words and word boundaries get n-grams too
+        word = f" {word} "
+        for size in NGRAM_SIZES:
+            for i in range(len(word) - size + 1):
+                # crc32 is stable across processes, unlike hash()
+                vector[zlib.crc32(word[i:i + size].encode("utf-8")) % dimensions] += 1.0
+    
+    norm = np.linalg.norm(vector)
+    if norm:
+        vector /= norm
+    return vector
+
+
+class SimilarityCache:
+    """Near-duplicate query index backed by a memmapped vector matrix."""
+    
+    def __init__(self, directory: Path, max_entries: int = 10000, dimensions: int = 256):
+        """
+        Initialize similarity cache.
+        
+        Args:
+            directory: Directory holding the index files
+            max_entries: Entries kept before the least recently used are evicted
+            dimensions: Length of the query vectors
+        
+        Raises:
+            RuntimeError: If NumPy is not installed
+        """
+        if not NUMPY_AVAILABLE:
+            raise RuntimeError("numpy is not installed")
+        
+        self.max_entries = max_entries
+        self.dimensions = dimensions
+        self.conn = open_database(directory / "similarity.db")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS entries (
+                slot INTEGER PRIMARY KEY,
+                query TEXT NOT NULL,
+                scope TEXT NOT NULL,
+                command TEXT NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+        """)
+        self.conn.execute(
+            "CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed_at)"
+        )
+        self.conn.execute(
+            "CREATE INDEX IF NOT EXISTS entries_query ON entries (query, scope)"
+        )
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value INTEGER NOT NULL)"
+        )
+        self.vectors = self._open_vectors(directory / "similarity.f32")
+        self.scopes = self._open_scopes(directory / "similarity.scope")
+    
+    def _open_vectors(self, path: Path):
+        """
+        Map the vector matrix, recreating it if its shape changed.
+        
+        Row i holds the vector of the entry in slot i; unused rows are zero
+        and therefore never match.
+        """
+        shape = (self.max_entries, self.dimensions)
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            stored = dict(self.conn.execute("SELECT name, value FROM meta"))
+            expected_size = shape[0] * shape[1] * 4
+            if (stored.get("rows"), stored.get("dimensions")) != shape or \
+                    not path.exists() or path.stat().st_size != expected_size:
+                # The slots no longer line up with the rows: start over
+                self.conn.execute("DELETE FROM entries")
+                vectors = np.memmap(str(path), dtype=np.float32, mode="w+", shape=shape)
+                vectors.flush()
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO meta (name, value) VALUES ('rows', ?), ('dimensions', ?)",
+                    shape
+                )
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+        
+        return np.memmap(str(path), dtype=np.float32, mode="r+", shape=shape)
+    
+    def _open_scopes(self, path: Path):
+        """
+        Map the scope id array, rebuilding it from the entries if it is missing.
+        
+        Element i holds the scope id of the entry in slot i, so a lookup
+        only considers the rows of its own scope.
+        """
+        if path.exists() and path.stat().st_size == self.max_entries * 4:
+            return np.memmap(str(path), dtype=np.uint32, mode="r+", shape=(self.max_entries,))
+        
+        scopes = np.memmap(str(path), dtype=np.uint32, mode="w+", shape=(self.max_entries,))
+        for slot, scope in self.conn.execute("SELECT slot, scope FROM entries"):
+            scopes[slot] = _scope_id(scope)
+        scopes.flush()
+        return scopes
+    
+    def lookup(self, query: str, scope: str, threshold: float) -> Optional[Tuple[str, float]]:
+        """
+        Find the stored command of the most similar past query.
+        
+        Args:
+            query: User's query
+            scope: Identifies everything besides the query that shapes the
+                answer (system context, provider, model, prompt version)
+            threshold: Minimum cosine similarity to accept, for a candidate
+                that asks for the same command (see same_request)
+        
+        Returns:
+            Tuple of the command and its similarity, or None
+        """
+        scores = self.vectors @ vectorize(query, self.dimensions)
+        # Entries of other scopes must not take the candidate slots
+        scores[self.scopes != _scope_id(scope)] = -np.inf
+        k = min(TOP_K, len(scores))
+        candidates = np.argpartition(scores, -k)[-k:]
+        candidates = candidates[np.argsort(scores[candidates])[::-1]]
+        
+        for slot in candidates:
+            score = float(scores[slot])
+            if score < threshold:
+                break
+            
+            row = self.conn.execute(
+                "SELECT query, command FROM entries WHERE slot = ? AND scope = ?",
+                (int(slot), scope)
+            ).fetchone()
+            if row and same_request(query, row[0]):
+                self.conn.execute(
+                    "UPDATE entries SET accessed_at = ? WHERE slot = ?", (time.time(), int(slot))
+                )
+                return row[1], score
+        
+        return None
+    
+    def add(self, query: str, scope: str, command: str):
+        """
+        Index a query and its command, evicting the least recently used entry if full.
+        
+        Args:
+            query: User's query
+            scope: Scope the command is valid in (see lookup)
+            command: Generated command
+        """
+        vector = vectorize(query, self.dimensions)
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Replace an earlier entry for the same query rather than duplicating it
+            row = self.conn.execute(
+                "SELECT slot FROM entries WHERE query = ? AND scope = ?",
+                (normalize_query(query), scope)
+            ).fetchone()
+            if row:
+                slot = row[0]
+            else:
+                # Slots fill up densely from 0; once full, reuse the LRU slot
+                last = self.conn.execute("SELECT MAX(slot) FROM entries").fetchone()[0]
+                slot = 0 if last is None else last + 1
+                if slot >= self.max_entries:
+                    slot = self.conn.execute(
+                        "SELECT slot FROM entries ORDER BY accessed_at LIMIT 1"
+                    ).fetchone()[0]
+            
+            self.vectors[slot] = vector
+            self.vectors.flush()
+            self.scopes[slot] = _scope_id(scope)
+            self.scopes.flush()
+            self.conn.execute(
+                "INSERT OR REPLACE INTO entries (slot, query, scope, command, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (slot, normalize_query(query), scope, command, time.time())
+            )
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
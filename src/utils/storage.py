@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+"""
+SQLite storage helpers for tinycode.
+Opens the local databases kept under the config directory so that they
+are safe to use from many tinycode processes at once.
+"""
+
+import sqlite3
+from pathlib import Path
+
+
+# Seconds a writer waits for another process to release the database
+BUSY_TIMEOUT = 5.0
+
+
+def open_database(path: Path) -> sqlite3.Connection:
+    """
+    Open (creating if needed) a SQLite database for concurrent use.
+    
+    The database runs in WAL mode so readers never block the single
+    writer, and in autocommit mode so that callers open transactions
+    explicitly (BEGIN IMMEDIATE) only where they need them.
+    
+    Args:
+        path: Database file path
+    
+    Returns:
+        Open connection
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(str(path), timeout=BUSY_TIMEOUT, isolation_level=None,
+                           check_same_thread=False)
+    # Must precede the switch to WAL, and only affects new databases; lets
+    # callers return freed pages to the filesystem with incremental_vacuum
+    conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
@@ -6,10 +6,20 @@ Detects Linux distribution and provides system context.
 
 import os
 import re
+import json
 import subprocess
+from functools import lru_cache
+from pathlib import Path
 from typing import Dict, Optional, Tuple
 
 
+# Bump when the snapshot layout or the detection logic changes
+SNAPSHOT_VERSION = 1
+
+# Files whose modification time invalidates the system info snapshot
+SNAPSHOT_SOURCES = ('/etc/os-release', '/etc/issue')
+
+
 def detect_linux_distro() -> Dict[str, str]:
     """
     Detect Linux distribution and version.
@@ -64,17 +74,13 @@ def detect_linux_distro() -> Dict[str, str]:
             pass
     
     # Method 3: Check /proc/version as last resort
-    if distro_info['name'] == 'Unknown' and os.path.exists('/proc/version'):
-        try:
-            with open('/proc/version', 'r') as f:
-                content = f.read()
-                # Look for common distribution names
-                for distro in ['Ubuntu', 'Debian', 'CentOS', 'Red Hat', 'Fedora', 'Arch', 'Alpine']:
-                    if distro.lower() in content.lower():
-                        distro_info['name'] = distro
-                        break
-        except Exception:
-            pass
+    if distro_info['name'] == 'Unknown':
+        content = _read_proc_version()
+        # Look for common distribution names
+        for distro in ['Ubuntu', 'Debian', 'CentOS', 'Red Hat', 'Fedora', 'Arch', 'Alpine']:
+            if distro.lower() in content.lower():
+                distro_info['name'] = distro
+                break
     
     return distro_info
 
@@ -123,16 +129,21 @@ def get_system_info() -> Dict[str, str]:
     return system_info
 
 
-def get_kernel_version() -> str:
-    """Get kernel version."""
+@lru_cache(maxsize=1)
+def _read_proc_version() -> str:
+    """Read /proc/version once per process."""
     try:
         with open('/proc/version', 'r') as f:
-            content = f.read()
-            match = re.search(r'Linux version ([0-9.]+)', content)
-            if match:
-                return match.group(1)
+            return f.read()
     except Exception:
-        pass
+        return ''
+
+
+def get_kernel_version() -> str:
+    """Get kernel version."""
+    match = re.search(r'Linux version ([0-9.]+)', _read_proc_version())
+    if match:
+        return match.group(1)
     return 'Unknown'
 
 
@@ -171,6 +182,76 @@ def format_system_context(system_info: Dict[str, str]) -> str:
     return ' | '.join(context_parts) if context_parts else "Generic Linux System"
 
 
+def _get_fingerprint() -> Dict[str, Optional[int]]:
+    """
+    Get the values that invalidate a system info snapshot.
+    
+    Returns:
+        Modification times of the source files and the running kernel release
+    """
+    fingerprint = {}
+    for path in SNAPSHOT_SOURCES:
+        try:
+            fingerprint[path] = os.stat(path).st_mtime_ns
+        except OSError:
+            fingerprint[path] = None
+    
+    try:
+        fingerprint['kernel_release'] = os.uname().release
+    except Exception:
+        fingerprint['kernel_release'] = None
+    
+    return fingerprint
+
+
+def get_cached_system_context(snapshot_file: Path, refresh: bool = False) -> str:
+    """
+    Get the formatted system context, using a persisted snapshot when valid.
+    
+    The snapshot is reused as long as /etc/os-release, /etc/issue and the
+    running kernel release are unchanged, so the common path costs a couple
+    of stat calls and one small read instead of full detection.
+    
+    Args:
+        snapshot_file: Path of the snapshot file
+        refresh: Ignore any existing snapshot and detect again
+    
+    Returns:
+        Formatted system context
+    """
+    fingerprint = _get_fingerprint()
+    
+    if not refresh:
+        try:
+            with open(snapshot_file, 'r') as f:
+                snapshot = json.load(f)
+            if (snapshot.get('version') == SNAPSHOT_VERSION and
+                    snapshot.get('fingerprint') == fingerprint):
+                return snapshot['context']
+        except (OSError, ValueError, KeyError, AttributeError):
+            pass
+    
+    system_info = get_system_info()
+    context = format_system_context(system_info)
+    
+    snapshot = {
+        'version': SNAPSHOT_VERSION,
+        'fingerprint': fingerprint,
+        'system_info': system_info,
+        'context': context
+    }
+    try:
+        snapshot_file.parent.mkdir(parents=True, exist_ok=True)
+        temp_file = snapshot_file.with_name(f"{snapshot_file.name}.{os.getpid()}.tmp")
+        with open(temp_file, 'w') as f:
+            json.dump(snapshot, f, indent=2)
+        os.replace(temp_file, snapshot_file)
+    except OSError:
+        pass
+    
+    return context
+
+
 if __name__ == "__main__":
     # Test the module
     info = get_system_info()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Phase timing module for tinycode.
+Records how long each startup/request phase takes, including phases
+that run in the background, and reports how much the overlap saved.
+"""
+
+import time
+import threading
+from contextlib import contextmanager
+from typing import List, Tuple
+
+
+class PhaseTimer:
+    """Collects named, possibly overlapping, timed phases."""
+    
+    def __init__(self):
+        """Initialize the timer; its clock starts now."""
+        self.start = time.perf_counter()
+        self.phases: List[Tuple[str, float, float, bool]] = []
+        self._lock = threading.Lock()
+    
+    @contextmanager
+    def phase(self, name: str, background: bool = False):
+        """
+        Time the enclosed block as a phase.
+        
+        Args:
+            name: Phase name
+            background: Whether the phase runs alongside other phases
+        """
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            ended = time.perf_counter()
+            with self._lock:
+                self.phases.append((name, started, ended, background))
+    
+    def report(self) -> List[str]:
+        """
+        Format the recorded phases.
+        
+        Returns:
+            Report lines: one per phase, then the total with the time
+            saved by running phases concurrently
+        """
+        with self._lock:
+            phases = sorted(self.phases, key=lambda phase: phase[1])
+        
+        if not phases:
+            return []
+        
+        lines = ["Timing:"]
+        for name, started, ended, background in phases:
+            note = "  (background)" if background else ""
+            lines.append(f"  {name:<16} {(ended - started) * 1000:8.1f} ms{note}")
+        
+        total = max(phase[2] for phase in phases) - self.start
+        sequential = sum(ended - started for _, started, ended, _ in phases)
+        saved = max(0.0, sequential - total)
+        lines.append(
+            f"  {'total':<16} {total * 1000:8.1f} ms"
+            f"  (sequential {sequential * 1000:.1f} ms, overlap saved {saved * 1000:.1f} ms)"
+        )
+        return lines
+
+
+if __name__ == "__main__":
+    # Test the phase timer
+    timer = PhaseTimer()
+    
+    def background_work():
+        with timer.phase("connect", background=True):
+            time.sleep(0.2)
+    
+    worker = threading.Thread(target=background_work)
+    worker.start()
+    with timer.phase("system_context"):
+        time.sleep(0.1)
+    worker.join()
+    with timer.phase("request"):
+        time.sleep(0.1)
+    
+    print("\n".join(timer.report()))
@@ -106,6 +106,44 @@ else
     exit 1
 fi
 
+# Test 10: Check that startup paths do not import the provider SDKs, and
+# stay within an import-time budget if one is set
+echo -e "${YELLOW}Test 10: Checking startup imports...${NC}"
+IMPORT_BUDGET_MS="${TINYCODE_IMPORT_BUDGET_MS:-}"
+if "$VENV_DIR/bin/python" - "$IMPORT_BUDGET_MS" << 'PYEOF'
+import io
+import sys
+import time
+from contextlib import redirect_stdout
+
+budget_ms = float(sys.argv[1]) if sys.argv[1] else None
+sdk_modules = ("openai", "anthropic")
+
+start = time.perf_counter()
+from core.tinycode import main
+elapsed_ms = (time.perf_counter() - start) * 1000
+
+# None of these paths talk to a provider, so neither SDK may be imported
+for flags in (["--version"], ["--help"], ["--config"], ["--check-apis"]):
+    sys.argv = ["tinycode"] + flags
+    with redirect_stdout(io.StringIO()):
+        main()
+
+loaded = [name for name in sdk_modules if name in sys.modules]
+print(f"  Import took {elapsed_ms:.0f}ms" + (f" (budget {budget_ms:.0f}ms)" if budget_ms else ""))
+if loaded:
+    print(f"  SDK modules loaded at startup: {', '.join(loaded)}")
+    sys.exit(1)
+if budget_ms and elapsed_ms > budget_ms:
+    sys.exit(1)
+PYEOF
+then
+    echo -e "${GREEN}✓ tinycode starts without importing the provider SDKs${NC}"
+else
+    echo -e "${RED}✗ tinycode startup imported an SDK or exceeded TINYCODE_IMPORT_BUDGET_MS${NC}"
+    exit 1
+fi
+
 echo
 echo -e "${GREEN}All tests passed! tinycode is properly installed and working.${NC}"
 echo
@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""
+Tests for batch input parsing.
+"""
+
+import sys
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from core.batch import read_items  # noqa: E402
+
+
+class ReadItemsTest(unittest.TestCase):
+    """Plain and JSON input lines."""
+    
+    def test_plain_and_json_lines(self):
+        items = read_items(["list files\n", "\n", '{"query": "disk usage", "provider": "claude", "id": 7}\n'])
+        self.assertEqual(items, [
+            {"line": 1, "query": "list files"},
+            {"line": 3, "query": "disk usage", "provider": "claude", "id": 7},
+        ])
+    
+    def test_invalid_lines(self):
+        cases = {
+            '{"query": ': "line 1: invalid JSON",
+            '{"id": 1}': "line 1: missing 'query'",
+            '{"query": "x", "provider": "gemini"}': "line 1: unknown provider 'gemini'",
+            '{"query": "x", "api": "claude"}': "line 1: unknown key 'api'",
+        }
+        for line, message in cases.items():
+            with self.subTest(line=line):
+                with self.assertRaises(ValueError) as raised:
+                    read_items([line])
+                self.assertIn(message, str(raised.exception))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Tests for offline batch jobs.
+Submits a job with --submit-batch against the benchmark stub provider,
+which stands in for the OpenAI Batch API and Anthropic Message Batches,
+and collects it with --collect-batch.
+"""
+
+import os
+import sys
+import json
+import tempfile
+import subprocess
+import unittest
+from pathlib import Path
+
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR / "benchmarks"))
+
+from stub_server import serve, STUB_COMMAND, FAIL_MARKER  # noqa: E402
+
+
+# Queries of the submitted job; the one with FAIL_MARKER fails at the provider
+BATCH_LINES = [
+    "list all files",
+    json.dumps({"query": "show disk usage", "provider": "claude", "id": "disk"}),
+    f"this one fails {FAIL_MARKER}",
+]
+
+
+class BatchJobTest(unittest.TestCase):
+    """Submitting, listing and collecting an offline batch job."""
+    
+    @classmethod
+    def setUpClass(cls):
+        cls.server = serve(0, batch_delay=0.0)
+        cls.home = tempfile.TemporaryDirectory()
+        config_dir = Path(cls.home.name) / ".config" / "tinycode"
+        config_dir.mkdir(parents=True)
+        base_url = f"http://127.0.0.1:{cls.server.server_port}"
+        config = {
+            "openai": {"api_key": "sk-test", "enabled": True, "base_url": f"{base_url}/v1"},
+            "claude": {"api_key": "sk-ant-test", "enabled": True, "base_url": base_url},
+            "transport": {"mode": "lean"},
+            "cache": {"enabled": False},
+            "ui": {"loading_animation": False, "stream_output": False}
+        }
+        (config_dir / "config.json").write_text(json.dumps(config))
+        cls.batch_file = Path(cls.home.name) / "queries.txt"
+        cls.batch_file.write_text("\n".join(BATCH_LINES) + "\n")
+    
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        cls.home.cleanup()
+    
+    def tinycode(self, *args: str) -> subprocess.CompletedProcess:
+        """Run the CLI, bypassing any daemon, with the test home directory."""
+        env = dict(os.environ, HOME=self.home.name, TINYCODE_NO_DAEMON="1")
+        env.pop("XDG_RUNTIME_DIR", None)
+        return subprocess.run(
+            [sys.executable, str(ROOT_DIR / "src" / "core" / "launcher.py"), *args],
+            capture_output=True, text=True, env=env, timeout=60
+        )
+    
+    def submit(self) -> str:
+        """Submit the batch file and return the job ID."""
+        result = self.tinycode("--submit-batch", str(self.batch_file))
+        self.assertEqual(result.returncode, 0, result.stdout + result.stderr)
+        job_id = result.stdout.strip()
+        self.assertTrue(job_id)
+        self.assertIn(f"Submitted {len(BATCH_LINES)} items as batch job {job_id}", result.stderr)
+        return job_id
+    
+    def test_submit_list_and_collect(self):
+        job_id = self.submit()
+        
+        listing = self.tinycode("--collect-batch")
+        self.assertEqual(listing.returncode, 0, listing.stdout)
+        line = next(line for line in listing.stdout.splitlines() if line.startswith(job_id))
+        self.assertIn(f"{len(BATCH_LINES)} items", line)
+        
+        collected = self.tinycode("--collect-batch", job_id)
+        # One item failed at the provider
+        self.assertEqual(collected.returncode, 1, collected.stderr)
+        records = [json.loads(line) for line in collected.stdout.splitlines()]
+        self.assertEqual([record["line"] for record in records], [1, 2, 3])
+        self.assertEqual(records[0]["command"], STUB_COMMAND)
+        self.assertEqual(records[1]["id"], "disk")
+        self.assertEqual(records[1]["command"], STUB_COMMAND)
+        self.assertIsNone(records[2]["command"])
+        self.assertIn(f"{len(BATCH_LINES)} items (1 failed)", collected.stderr)
+        
+        # Collected results are kept: listing says so and collecting again needs no provider
+        listing = self.tinycode("--collect-batch")
+        self.assertIn("collected", next(line for line in listing.stdout.splitlines() if line.startswith(job_id)))
+        again = self.tinycode("--collect-batch", job_id)
+        self.assertEqual([json.loads(line) for line in again.stdout.splitlines()], records)
+    
+    def test_unknown_job(self):
+        result = self.tinycode("--collect-batch", "no-such-job")
+        self.assertEqual(result.returncode, 1)
+        self.assertIn("No batch job 'no-such-job'", result.stdout)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Startup tests for tinycode.
+Checks that commands which never talk to a provider start without
+importing the provider SDKs. Set TINYCODE_IMPORT_BUDGET_MS to also fail
+when importing the CLI takes longer than that many milliseconds.
+"""
+
+import os
+import sys
+import json
+import tempfile
+import subprocess
+import unittest
+from pathlib import Path
+
+
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+
+# Modules that only requests to a provider may import
+SDK_MODULES = ("openai", "anthropic")
+
+# Run in a fresh interpreter: import the CLI, run each command line and
+# report the import time and the SDK modules loaded
+PROBE = """
+import io
+import sys
+import json
+import time
+from contextlib import redirect_stdout
+
+command_lines, sdk_modules = json.loads(sys.argv[1]), json.loads(sys.argv[2])
+
+start = time.perf_counter()
+from core.tinycode import main
+import_ms = (time.perf_counter() - start) * 1000
+
+for flags in command_lines:
+    sys.argv = ["tinycode"] + flags
+    with redirect_stdout(io.StringIO()):
+        try:
+            main()
+        except SystemExit:
+            pass
+
+print(json.dumps({"import_ms": import_ms, "loaded": [name for name in sdk_modules if name in sys.modules]}))
+"""
+
+
+def run_probe(flags):
+    """
+    Run command lines in a fresh interpreter with an empty home directory.
+    
+    Args:
+        flags: Command lines to run, without the program name
+    
+    Returns:
+        Dict with 'import_ms' and the 'loaded' SDK modules
+    """
+    with tempfile.TemporaryDirectory() as home:
+        env = dict(os.environ, HOME=home, PYTHONPATH=str(SRC_DIR), TINYCODE_NO_DAEMON="1")
+        result = subprocess.run(
+            [sys.executable, "-c", PROBE, json.dumps(flags), json.dumps(SDK_MODULES)],
+            capture_output=True, text=True, env=env, timeout=60
+        )
+    if result.returncode != 0:
+        raise AssertionError(f"Probe failed: {result.stderr}")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+class StartupImportTest(unittest.TestCase):
+    """Commands that do not send requests must not import the SDKs."""
+    
+    def test_import_does_not_load_sdks(self):
+        self.assertEqual(run_probe([])["loaded"], [])
+    
+    def test_local_commands_do_not_load_sdks(self):
+        for flags in (["--version"], ["--help"], ["--config"], ["--check-apis"]):
+            with self.subTest(flags=flags):
+                self.assertEqual(run_probe([flags])["loaded"], [])
+    
+    @unittest.skipUnless(os.environ.get("TINYCODE_IMPORT_BUDGET_MS"), "no import-time budget set")
+    def test_import_time_budget(self):
+        budget_ms = float(os.environ["TINYCODE_IMPORT_BUDGET_MS"])
+        # Best of a few runs, so a busy machine does not fail the test
+        import_ms = min(run_probe([])["import_ms"] for _ in range(3))
+        self.assertLessEqual(import_ms, budget_ms)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,334 @@
+#!/usr/bin/env python3
+"""
+Tests for the lean transport.
+Runs LeanTransport against the benchmark stub provider (Content-Length
+JSON and chunked server-sent events), a local server answering with error
+statuses, and an HTTPS server reached through a CONNECT proxy.
+"""
+
+import os
+import ssl
+import sys
+import json
+import shutil
+import asyncio
+import tempfile
+import subprocess
+import unittest
+from pathlib import Path
+
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR / "src"))
+sys.path.insert(0, str(ROOT_DIR / "benchmarks"))
+
+from api.transport import (LeanTransport, HTTPSettings, APIError, APITimeoutError,  # noqa: E402
+                           AuthenticationError, RateLimitError)
+from stub_server import serve, STUB_COMMAND  # noqa: E402
+
+
+CHAT_REQUEST = {"model": "gpt-test", "messages": [{"role": "user", "content": "list files"}], "max_tokens": 50}
+
+
+async def read_request(reader: asyncio.StreamReader):
+    """Read one HTTP request, returning its request line (None at EOF) and body."""
+    request_line = await reader.readline()
+    if not request_line:
+        return None, b""
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        if name.strip().lower() == "content-length":
+            length = int(value)
+    return request_line.decode("latin-1").strip(), await reader.readexactly(length)
+
+
+class LocalServer:
+    """
+    Keep-alive HTTP/1.1 server on asyncio for error and reuse tests.
+    
+    Answers /status/<code> with that status and a provider-style error
+    body, /slow after a second, and anything else with the client's port.
+    """
+    
+    def __init__(self, ssl_context=None):
+        """Initialize the server; start() binds it."""
+        self.ssl_context = ssl_context
+        self.connections = 0
+        self.server = None
+    
+    async def start(self) -> int:
+        """Start listening on a free port and return it."""
+        self.server = await asyncio.start_server(self.handle, "127.0.0.1", 0, ssl=self.ssl_context)
+        return self.server.sockets[0].getsockname()[1]
+    
+    async def stop(self):
+        """Stop listening."""
+        self.server.close()
+        await self.server.wait_closed()
+    
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Serve requests on one connection until the client closes it."""
+        self.connections += 1
+        peer_port = writer.get_extra_info("peername")[1]
+        try:
+            while True:
+                request_line, _ = await read_request(reader)
+                if request_line is None:
+                    break
+                path = request_line.split()[1]
+                status = 200
+                payload = {"peer_port": peer_port, "path": path}
+                if "/status/" in path:
+                    status = int(path.rsplit("/", 1)[1])
+                    payload = {"error": {"message": f"failed with {status}"}}
+                elif path.endswith("/slow"):
+                    await asyncio.sleep(1.0)
+                body = json.dumps(payload).encode("utf-8")
+                writer.write((f"HTTP/1.1 {status} X\r\nContent-Type: application/json\r\n"
+                              f"Retry-After: 7\r\nContent-Length: {len(body)}\r\n\r\n").encode("latin-1") + body)
+                await writer.drain()
+        except (ConnectionResetError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+
+class ConnectProxy:
+    """HTTP proxy that only tunnels CONNECT requests, recording their targets."""
+    
+    def __init__(self):
+        """Initialize the proxy; start() binds it."""
+        self.targets = []
+        self.server = None
+    
+    async def start(self) -> int:
+        """Start listening on a free port and return it."""
+        self.server = await asyncio.start_server(self.handle, "127.0.0.1", 0)
+        return self.server.sockets[0].getsockname()[1]
+    
+    async def stop(self):
+        """Stop listening."""
+        self.server.close()
+        await self.server.wait_closed()
+    
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Open the tunnel and copy bytes both ways until either side closes."""
+        request_line, _ = await read_request(reader)
+        target = request_line.split()[1]
+        self.targets.append(target)
+        _, port = target.rsplit(":", 1)
+        upstream_reader, upstream_writer = await asyncio.open_connection("127.0.0.1", int(port))
+        writer.write(b"HTTP/1.1 200 Connection established\r\n\r\n")
+        await writer.drain()
+        
+        async def pipe(source, sink):
+            try:
+                while True:
+                    data = await source.read(65536)
+                    if not data:
+                        break
+                    sink.write(data)
+                    await sink.drain()
+            except (ConnectionResetError, BrokenPipeError):
+                pass
+            finally:
+                sink.close()
+        
+        await asyncio.gather(pipe(reader, upstream_writer), pipe(upstream_reader, writer))
+
+
+class StubTransportTest(unittest.TestCase):
+    """Responses and streams from the stub provider."""
+    
+    @classmethod
+    def setUpClass(cls):
+        cls.server = serve(0)
+        cls.base_url = f"http://127.0.0.1:{cls.server.server_port}/v1"
+    
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+    
+    def test_post_json(self):
+        async def run():
+            transport = LeanTransport(self.base_url)
+            try:
+                return await transport.post_json("/chat/completions", CHAT_REQUEST, timeout=5)
+            finally:
+                transport.close()
+        
+        data = asyncio.run(run())
+        self.assertEqual(data["choices"][0]["message"]["content"], STUB_COMMAND)
+        self.assertGreater(data["usage"]["completion_tokens"], 0)
+    
+    def test_stream_json_decodes_chunked_events(self):
+        async def run():
+            transport = LeanTransport(self.base_url)
+            try:
+                payload = dict(CHAT_REQUEST, stream=True, stream_options={"include_usage": True})
+                return [event async for event in transport.stream_json("/chat/completions", payload, timeout=5)]
+            finally:
+                transport.close()
+        
+        events = asyncio.run(run())
+        text = "".join((event["choices"][0]["delta"].get("content") or "") for event in events if event["choices"])
+        self.assertTrue(text.startswith(STUB_COMMAND))
+        self.assertEqual(events[-2]["choices"][0]["finish_reason"], "stop")
+        self.assertIn("usage", events[-1])
+    
+    def test_stream_json_named_events(self):
+        async def run():
+            transport = LeanTransport(f"http://127.0.0.1:{self.server.server_port}")
+            try:
+                payload = {"model": "claude-test", "max_tokens": 50, "stream": True,
+                           "messages": [{"role": "user", "content": "list files"}]}
+                return [event async for event in transport.stream_json("/v1/messages", payload, timeout=5)]
+            finally:
+                transport.close()
+        
+        events = asyncio.run(run())
+        self.assertEqual(events[0]["type"], "message_start")
+        self.assertEqual(events[-1]["type"], "message_stop")
+    
+    def test_connection_reused_after_json_and_stream(self):
+        async def run():
+            transport = LeanTransport(self.base_url)
+            opened = []
+            open_connection = transport._open
+            
+            async def counting_open(timeout):
+                opened.append(timeout)
+                return await open_connection(timeout)
+            
+            transport._open = counting_open
+            try:
+                await transport.post_json("/chat/completions", CHAT_REQUEST, timeout=5)
+                async for _ in transport.stream_json("/chat/completions", dict(CHAT_REQUEST, stream=True), timeout=5):
+                    pass
+                await transport.post_json("/chat/completions", CHAT_REQUEST, timeout=5)
+            finally:
+                transport.close()
+            return len(opened)
+        
+        self.assertEqual(asyncio.run(run()), 1)
+
+
+class ErrorStatusTest(unittest.TestCase):
+    """Unsuccessful statuses map to the matching APIError subclasses."""
+    
+    def request(self, path: str, stream: bool = False, timeout: float = 5):
+        """Send a request to a fresh local server and return what it raised, or the response."""
+        async def run():
+            server = LocalServer()
+            port = await server.start()
+            transport = LeanTransport(f"http://127.0.0.1:{port}")
+            try:
+                if stream:
+                    return [event async for event in transport.stream_json(path, {}, timeout=timeout)]
+                return await transport.post_json(path, {}, timeout=timeout)
+            except APIError as e:
+                return e
+            finally:
+                transport.close()
+                await server.stop()
+        
+        return asyncio.run(run())
+    
+    def test_status_mapping(self):
+        expected = {401: AuthenticationError, 403: AuthenticationError, 429: RateLimitError,
+                    500: APIError, 503: APIError}
+        for status, error_class in expected.items():
+            for stream in (False, True):
+                with self.subTest(status=status, stream=stream):
+                    error = self.request(f"/status/{status}", stream)
+                    self.assertIs(type(error), error_class)
+                    self.assertEqual(error.status_code, status)
+                    self.assertEqual(error.headers["retry-after"], "7")
+                    self.assertIn(f"failed with {status}", str(error))
+    
+    def test_timeout(self):
+        self.assertIsInstance(self.request("/slow", timeout=0.2), APITimeoutError)
+    
+    def test_connection_refused(self):
+        async def run():
+            server = LocalServer()
+            port = await server.start()
+            await server.stop()
+            transport = LeanTransport(f"http://127.0.0.1:{port}")
+            with self.assertRaises(APIError):
+                await transport.post_json("/", {}, timeout=2)
+        
+        asyncio.run(run())
+    
+    def test_keep_alive_connection_reused(self):
+        async def run():
+            server = LocalServer()
+            port = await server.start()
+            transport = LeanTransport(f"http://127.0.0.1:{port}")
+            try:
+                first = await transport.post_json("/a", {}, timeout=5)
+                second = await transport.post_json("/b", {}, timeout=5)
+            finally:
+                transport.close()
+                await server.stop()
+            return first, second, server.connections
+        
+        first, second, connections = asyncio.run(run())
+        self.assertEqual(first["peer_port"], second["peer_port"])
+        self.assertEqual(connections, 1)
+
+
+@unittest.skipUnless(shutil.which("openssl"), "openssl is needed to create a test certificate")
+class ConnectTunnelTest(unittest.TestCase):
+    """HTTPS requests go through a proxy's CONNECT tunnel."""
+    
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.TemporaryDirectory()
+        cls.cert = os.path.join(cls.directory.name, "cert.pem")
+        cls.key = os.path.join(cls.directory.name, "key.pem")
+        subprocess.run(
+            ["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1",
+             "-keyout", cls.key, "-out", cls.cert, "-subj", "/CN=localhost",
+             "-addext", "subjectAltName=DNS:localhost"],
+            check=True, capture_output=True
+        )
+    
+    @classmethod
+    def tearDownClass(cls):
+        cls.directory.cleanup()
+    
+    def test_request_through_tunnel(self):
+        async def run():
+            server_context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+            server_context.load_cert_chain(self.cert, self.key)
+            server = LocalServer(server_context)
+            proxy = ConnectProxy()
+            port, proxy_port = await server.start(), await proxy.start()
+            
+            transport = LeanTransport(f"https://localhost:{port}/v1",
+                                      settings=HTTPSettings(proxy=f"http://127.0.0.1:{proxy_port}"))
+            transport._ssl_context = ssl.create_default_context(cafile=self.cert)
+            try:
+                first = await transport.post_json("/first", {}, timeout=5)
+                second = await transport.post_json("/second", {}, timeout=5)
+            finally:
+                transport.close()
+                await server.stop()
+                await proxy.stop()
+            return port, first, second, proxy.targets
+        
+        port, first, second, targets = asyncio.run(run())
+        self.assertEqual(first["path"], "/v1/first")
+        self.assertEqual(second["path"], "/v1/second")
+        # Both requests went over the one tunnel
+        self.assertEqual(targets, [f"localhost:{port}"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -36,6 +36,14 @@ if [[ -f "$INSTALL_DIR/tinycode" ]]; then
     echo -e "${GREEN}✓ Wrapper script removed${NC}"
 fi
 
+# Stop the daemon and remove its wrapper script
+if [[ -f "$INSTALL_DIR/tinycoded" ]]; then
+    echo -e "${YELLOW}Removing daemon wrapper script...${NC}"
+    "$INSTALL_DIR/tinycoded" --stop &> /dev/null || true
+    rm -f "$INSTALL_DIR/tinycoded"
+    echo -e "${GREEN}✓ Daemon wrapper script removed${NC}"
+fi
+
 # Remove virtual environment
 if [[ -d "$VENV_DIR" ]]; then
     echo -e "${YELLOW}Removing virtual environment...${NC}"